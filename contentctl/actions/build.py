@@ -2,13 +2,16 @@ import datetime
 import json
 import pathlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Any
 
 from contentctl.input.director import DirectorOutputDto
 from contentctl.objects.config import build
 from contentctl.output.api_json_output import JSON_API_VERSION, ApiJsonOutput
 from contentctl.output.conf_output import ConfOutput
 from contentctl.output.conf_writer import ConfWriter
+from contentctl.output.manifest_writer import ManifestWriter
 
 
 @dataclass(frozen=True)
@@ -19,6 +22,14 @@ class BuildInputDto:
 
 class Build:
     def execute(self, input_dto: BuildInputDto) -> DirectorOutputDto:
+        # Load the previous manifest before anything is written, since it may be the
+        # manifest at the default location which this build is about to replace
+        previous_manifest: dict[str, Any] | None = None
+        if input_dto.config.diff_against is not None:
+            previous_manifest = ManifestWriter.loadManifest(
+                input_dto.config.diff_against
+            )
+
         if input_dto.config.build_app:
             updated_conf_files: set[pathlib.Path] = set()
             conf_output = ConfOutput(input_dto.config)
@@ -54,27 +65,79 @@ class Build:
             for conf_file in updated_conf_files:
                 ConfWriter.validateConfFile(conf_file)
 
+            if conf_output.compressed_lookup_count > 0:
+                print(
+                    f"Shipped {conf_output.compressed_lookup_count} lookup(s) gzip-compressed, "
+                    f"saving {conf_output.compressed_lookup_bytes_saved:,} bytes"
+                )
+
             conf_output.packageApp()
 
             print(
                 f"Build of '{input_dto.config.app.title}' APP successful to {input_dto.config.getPackageFilePath()}"
             )
 
+            manifest = ManifestWriter.buildManifest(
+                input_dto.config, input_dto.director_output_dto
+            )
+            ManifestWriter.writeManifest(
+                input_dto.config.getManifestFilePath(), manifest
+            )
+            print(f"Build manifest written to {input_dto.config.getManifestFilePath()}")
+
+            if previous_manifest is not None:
+                assert input_dto.config.diff_against is not None
+                manifest_diff = ManifestWriter.diffManifests(
+                    previous_manifest, manifest
+                )
+                ManifestWriter.writeManifest(
+                    input_dto.config.getManifestDiffFilePath(), manifest_diff
+                )
+                ManifestWriter.printManifestDiff(
+                    manifest_diff, input_dto.config.diff_against
+                )
+
         if input_dto.config.build_api:
             shutil.rmtree(input_dto.config.getAPIPath(), ignore_errors=True)
             input_dto.config.getAPIPath().mkdir(parents=True)
             api_json_output = ApiJsonOutput(
                 input_dto.config.getAPIPath(), input_dto.config.app.label
             )
-            api_json_output.writeDetections(input_dto.director_output_dto.detections)
-            api_json_output.writeStories(input_dto.director_output_dto.stories)
-            api_json_output.writeBaselines(input_dto.director_output_dto.baselines)
-            api_json_output.writeInvestigations(
-                input_dto.director_output_dto.investigations
-            )
-            api_json_output.writeLookups(input_dto.director_output_dto.lookups)
-            api_json_output.writeMacros(input_dto.director_output_dto.macros)
-            api_json_output.writeDeployments(input_dto.director_output_dto.deployments)
+            # Each type of object is written to its own file, so they are written
+            # concurrently. Any exception raised while writing is re-raised here.
+            with ThreadPoolExecutor() as api_executor:
+                api_futures = [
+                    api_executor.submit(
+                        api_json_output.writeDetections,
+                        input_dto.director_output_dto.detections,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeStories,
+                        input_dto.director_output_dto.stories,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeBaselines,
+                        input_dto.director_output_dto.baselines,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeInvestigations,
+                        input_dto.director_output_dto.investigations,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeLookups,
+                        input_dto.director_output_dto.lookups,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeMacros,
+                        input_dto.director_output_dto.macros,
+                    ),
+                    api_executor.submit(
+                        api_json_output.writeDeployments,
+                        input_dto.director_output_dto.deployments,
+                    ),
+                ]
+                for api_future in api_futures:
+                    api_future.result()
 
             # create version file for sse api
             version_file = (
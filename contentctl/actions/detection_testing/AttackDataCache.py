@@ -0,0 +1,304 @@
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is not available on Windows. The cache will not coordinate eviction with other runs.
+    fcntl = None
+
+import requests  # type: ignore
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from contentctl.objects.detection import Detection
+
+ATTACK_DATA_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_sha256 ON entries (sha256);
+"""
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Timeouts for connecting to the server and for each read of an attack data download, so that a
+# stalled server fails the test rather than hanging the instance indefinitely
+DOWNLOAD_CONNECT_TIMEOUT_SECONDS = 30
+DOWNLOAD_READ_TIMEOUT_SECONDS = 120
+
+
+class AttackDataCache(BaseModel):
+    """
+    A persistent cache of attack data files downloaded over HTTP, shared by every test instance
+    and every test run. Files are stored by the SHA256 of their contents, so URLs which serve
+    identical data share one copy on disk. An index records, for each URL, the ETag the server
+    returned along with the hash of the file; the ETag is revalidated once per test run with a
+    conditional request, so a file that changed upstream is downloaded again. When the cache
+    grows beyond max_size_bytes, the least recently used files are evicted. Files used during
+    the current run are never evicted, since an instance may be replaying them. Every run holds a
+    shared lock on the cache for as long as it is open, and files are only evicted while no other
+    run holds one, since another run may be reading files that this run has not used.
+
+    The cache can also prefetch the attack data of detections which are waiting in the queue,
+    so that downloads happen while other detections are being tested.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    cache_directory: pathlib.Path
+    max_size_bytes: int
+    prefetch_workers: int = 2
+    _connection: sqlite3.Connection = PrivateAttr()
+    # Guards the connection and the dictionaries below
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # Held while a URL is being fetched, so that it is only downloaded once even if an instance
+    # and the prefetcher ask for it at the same time
+    _url_locks: dict[str, threading.Lock] = PrivateAttr(default_factory=dict)
+    # URLs whose ETag has been revalidated during this run
+    _validated: set[str] = PrivateAttr(default_factory=set)
+    _prefetch_executor: concurrent.futures.ThreadPoolExecutor = PrivateAttr()
+    _prefetched: set[str] = PrivateAttr(default_factory=set)
+    _run_start_time: float = PrivateAttr(default_factory=time.time)
+    # Holds a shared lock for as long as the cache is open. These are POSIX record locks, which
+    # belong to the process, so the lock can be upgraded to an exclusive one in order to evict
+    # and downgraded again without ever being released
+    _lock_file: Optional[IO[bytes]] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: object) -> None:
+        self.objects_directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is not None:
+            try:
+                self._lock_file = open(self.cache_directory / "in_use.lock", "a+b")
+                # Only blocks while another run is evicting files
+                fcntl.lockf(self._lock_file, fcntl.LOCK_SH)
+            except OSError as e:
+                raise Exception(
+                    f"Error locking attack data cache '{self.cache_directory}': {e!s}"
+                )
+        try:
+            # Several runs of contentctl may share the cache, so wait for, rather than fail on,
+            # a database that is locked by another process
+            self._connection = sqlite3.connect(
+                self.cache_directory / "index.sqlite",
+                check_same_thread=False,
+                timeout=30,
+            )
+            self._connection.executescript(ATTACK_DATA_CACHE_SCHEMA)
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise Exception(
+                f"Error opening attack data cache '{self.cache_directory}': {e!s}"
+            )
+        self._prefetch_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.prefetch_workers,
+            thread_name_prefix="attack_data_prefetch",
+        )
+
+    @property
+    def objects_directory(self) -> pathlib.Path:
+        return self.cache_directory / "objects"
+
+    def get_object_path(self, sha256: str) -> pathlib.Path:
+        return self.objects_directory / sha256[:2] / sha256
+
+    def get_url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def get(self, url: str) -> pathlib.Path:
+        """
+        Get the path to a cached copy of the file at a URL, downloading it if it is not already
+        in the cache or if it has changed on the server. The returned file must not be modified.
+        :param url: the URL of the attack data
+        :returns: path to the file in the cache
+        """
+        with self.get_url_lock(url):
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT etag, sha256 FROM entries WHERE url = ?", (url,)
+                ).fetchone()
+                validated = url in self._validated
+
+            etag: Optional[str] = None
+            sha256: Optional[str] = None
+            if row is not None and self.get_object_path(row[1]).is_file():
+                etag, sha256 = row
+
+            if sha256 is None:
+                etag, sha256 = self.download(url, None, None)
+            elif not validated:
+                try:
+                    etag, sha256 = self.download(url, etag, sha256)
+                except Exception:
+                    # The server could not be reached to revalidate the file, but a copy which
+                    # was good the last time it was checked is still better than failing
+                    pass
+
+            with self._lock, self._connection:
+                self._validated.add(url)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        etag,
+                        sha256,
+                        self.get_object_path(sha256).stat().st_size,
+                        time.time(),
+                    ),
+                )
+
+        self.evict()
+        return self.get_object_path(sha256)
+
+    def download(
+        self,
+        url: str,
+        etag: Optional[str],
+        sha256: Optional[str],
+    ) -> tuple[Optional[str], str]:
+        """
+        Download a file into the cache. If a cached copy exists, the download is conditional on
+        its ETag and is skipped when the server reports that the file has not changed.
+        :param url: the URL of the attack data
+        :param etag: the ETag of the cached copy, if any
+        :param sha256: the hash of the cached copy, if any
+        :returns: the ETag and the hash of the file now in the cache
+        """
+        headers: dict[str, str] = {}
+        if sha256 is not None and etag is not None:
+            headers["If-None-Match"] = etag
+
+        try:
+            with requests.get(
+                url,
+                headers=headers,
+                stream=True,
+                timeout=(
+                    DOWNLOAD_CONNECT_TIMEOUT_SECONDS,
+                    DOWNLOAD_READ_TIMEOUT_SECONDS,
+                ),
+            ) as response:
+                if response.status_code == 304 and sha256 is not None:
+                    return etag, sha256
+                response.raise_for_status()
+
+                # Download to a temporary file in the cache so that it can be atomically
+                # moved into place once it is complete
+                sha = hashlib.sha256()
+                fd, temp_name = tempfile.mkstemp(
+                    prefix=".download.", dir=self.objects_directory
+                )
+                try:
+                    with os.fdopen(fd, "wb") as temp_file:
+                        for chunk in response.iter_content(
+                            chunk_size=DOWNLOAD_CHUNK_SIZE
+                        ):
+                            temp_file.write(chunk)
+                            sha.update(chunk)
+                    downloaded_sha256 = sha.hexdigest()
+                    object_path = self.get_object_path(downloaded_sha256)
+                    object_path.parent.mkdir(exist_ok=True)
+                    os.replace(temp_name, object_path)
+                finally:
+                    pathlib.Path(temp_name).unlink(missing_ok=True)
+
+                return response.headers.get("ETag"), downloaded_sha256
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Could not download attack data file [{url}]: {e!s}")
+
+    def evict(self) -> None:
+        """
+        Delete the least recently used files until the cache is no larger than max_size_bytes.
+        Files used during the current run are never deleted. If another run is using the cache,
+        nothing is deleted; the cache is trimmed by a later run instead.
+        """
+        with self._lock, self._connection:
+            # URLs with identical content share one file, so each file is only counted once
+            total_size = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM "
+                "(SELECT sha256, MAX(size) AS size FROM entries GROUP BY sha256)"
+            ).fetchone()[0]
+            if total_size <= self.max_size_bytes or not self.try_lock_exclusive():
+                return
+
+            try:
+                candidates = self._connection.execute(
+                    "SELECT sha256, MAX(size), MAX(last_used) AS used FROM entries "
+                    "GROUP BY sha256 HAVING used < ? ORDER BY used ASC",
+                    (self._run_start_time,),
+                ).fetchall()
+                for sha256, size, _ in candidates:
+                    if total_size <= self.max_size_bytes:
+                        break
+                    self._connection.execute(
+                        "DELETE FROM entries WHERE sha256 = ?", (sha256,)
+                    )
+                    self.get_object_path(sha256).unlink(missing_ok=True)
+                    total_size -= size
+            finally:
+                self.unlock_exclusive()
+
+    def try_lock_exclusive(self) -> bool:
+        """
+        :returns: whether the exclusive lock on the cache was acquired, which means that no other
+            run is using it. Always True if locking is not supported on this platform.
+        """
+        if fcntl is None or self._lock_file is None:
+            return True
+        try:
+            # Upgrading a POSIX record lock is atomic: if another run holds a shared lock, this
+            # fails and the shared lock held by this run is left in place
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def unlock_exclusive(self) -> None:
+        if fcntl is None or self._lock_file is None:
+            return
+        fcntl.lockf(self._lock_file, fcntl.LOCK_SH)
+
+    def prefetch(self, detections: list[Detection]) -> None:
+        """
+        Download, in the background, the attack data of detections that will be tested soon.
+        Failures are ignored here; they are reported when the detection is actually tested.
+        :param detections: the detections whose attack data should be fetched
+        """
+        for detection in detections:
+            for test_group in detection.test_groups:
+                if test_group.all_tests_skipped():
+                    continue
+                for attack_data in test_group.attack_data:
+                    url = str(attack_data.data)
+                    if not url.startswith(("http://", "https://")):
+                        continue
+                    with self._lock:
+                        if url in self._prefetched:
+                            continue
+                        self._prefetched.add(url)
+                    self._prefetch_executor.submit(self.prefetch_url, url)
+
+    def prefetch_url(self, url: str) -> None:
+        try:
+            self.get(url)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._connection.close()
+            if self._lock_file is not None:
+                # Closing the file releases the lock
+                self._lock_file.close()
+                self._lock_file = None
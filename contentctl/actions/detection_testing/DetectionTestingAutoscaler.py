@@ -0,0 +1,124 @@
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+# How often the manager checks on its instances, samples host resources and decides whether
+# to start another instance
+AUTOSCALE_INTERVAL_SECONDS = 5
+
+PROC_MEMINFO_PATH = "/proc/meminfo"
+
+
+class HostResourceUsage(BaseModel):
+    """
+    A sample of the CPU and memory usage of the host running the tests. Values which cannot be
+    determined on the current platform are None.
+    """
+
+    cpu_count: int
+    load_average: Optional[float] = None
+    memory_total_bytes: Optional[int] = None
+    memory_available_bytes: Optional[int] = None
+
+    @classmethod
+    def sample(cls) -> "HostResourceUsage":
+        try:
+            load_average: Optional[float] = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            # Not available on Windows
+            load_average = None
+
+        memory_total_bytes = None
+        memory_available_bytes = None
+        try:
+            with open(PROC_MEMINFO_PATH) as meminfo:
+                for line in meminfo:
+                    key, _, value = line.partition(":")
+                    # Values are reported in kB
+                    if key == "MemTotal":
+                        memory_total_bytes = int(value.split()[0]) * 1024
+                    elif key == "MemAvailable":
+                        memory_available_bytes = int(value.split()[0]) * 1024
+        except (OSError, ValueError, IndexError):
+            # Only available on Linux
+            pass
+
+        return cls(
+            cpu_count=os.cpu_count() or 1,
+            load_average=load_average,
+            memory_total_bytes=memory_total_bytes,
+            memory_available_bytes=memory_available_bytes,
+        )
+
+    @property
+    def load_per_cpu(self) -> Optional[float]:
+        if self.load_average is None:
+            return None
+        return self.load_average / self.cpu_count
+
+    def __str__(self) -> str:
+        parts = []
+        if self.load_average is not None:
+            parts.append(f"load {self.load_average:.2f}/{self.cpu_count} CPUs")
+        if self.memory_available_bytes is not None and self.memory_total_bytes:
+            parts.append(
+                f"{self.memory_available_bytes / 2**30:.1f}/"
+                f"{self.memory_total_bytes / 2**30:.1f} GiB free"
+            )
+        return ", ".join(parts) if len(parts) > 0 else "unknown"
+
+
+class DetectionTestingAutoscaler(BaseModel):
+    """
+    Decides when to start another test instance: while the queue of detections is long enough
+    to keep another instance busy and the host has the CPU and memory to run it. Instances are
+    added one at a time, since setting one up is itself CPU intensive, and retire on their own
+    as soon as there is nothing left in the queue for them to test.
+
+    :param max_instances: the most instances which may be running at once
+    :param detections_per_instance: only add an instance while there are more than this many
+        queued detections for each running instance
+    :param memory_per_instance_bytes: memory which must be available before adding an instance
+    :param max_load_per_cpu: only add an instance while the 1 minute load average, divided by
+        the number of CPUs, is below this
+    """
+
+    max_instances: int
+    detections_per_instance: int
+    memory_per_instance_bytes: int
+    max_load_per_cpu: float
+
+    def should_add_instance(
+        self,
+        queue_length: int,
+        running_instances: int,
+        starting_instances: int,
+        usage: HostResourceUsage,
+    ) -> bool:
+        """
+        :param queue_length: the number of detections waiting to be tested
+        :param running_instances: the number of instances set up, or being set up, which have
+            not finished testing
+        :param starting_instances: the number of those instances still being set up
+        :param usage: the current resource usage of the host
+        :returns: whether another instance should be started now
+        """
+        if starting_instances > 0:
+            # Wait for the load of setting up the last instance to show in the host's usage
+            return False
+        if running_instances >= self.max_instances:
+            return False
+        if queue_length <= running_instances * self.detections_per_instance:
+            return False
+        if (
+            usage.load_per_cpu is not None
+            and usage.load_per_cpu >= self.max_load_per_cpu
+        ):
+            return False
+        if (
+            usage.memory_available_bytes is not None
+            and usage.memory_available_bytes < self.memory_per_instance_bytes
+        ):
+            return False
+        return True
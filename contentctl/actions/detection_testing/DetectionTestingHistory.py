@@ -0,0 +1,190 @@
+import pathlib
+import sqlite3
+import threading
+import time
+import uuid
+from enum import StrEnum
+
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from contentctl.helper.utils import Utils
+from contentctl.objects.detection import Detection
+
+# The number of most recent runs of a detection which are averaged to produce its
+# expected duration
+HISTORY_SAMPLE_SIZE = 5
+
+TEST_HISTORY_FILENAME = "test_history.sqlite"
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detection_durations (
+    run_id TEXT NOT NULL,
+    detection_id TEXT NOT NULL,
+    detection_name TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    infrastructure TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS detection_durations_by_id
+    ON detection_durations (detection_id, recorded_at);
+CREATE TABLE IF NOT EXISTS phase_durations (
+    run_id TEXT NOT NULL,
+    detection_id TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    infrastructure TEXT NOT NULL,
+    phase TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phase_durations_by_id
+    ON phase_durations (detection_id, phase, recorded_at);
+"""
+
+
+class DetectionTestingPhase(StrEnum):
+    download = "download"
+    replay = "replay"
+    hec_ack_wait = "hec_ack_wait"
+    index_wait = "index_wait"
+    search = "search"
+    integration = "integration"
+    cleanup = "cleanup"
+
+
+class DetectionTestingHistory(BaseModel):
+    """
+    A local SQLite database recording how long each detection, and each phase of testing it,
+    took in previous test runs. Records are keyed by the id of the detection, a hash of its
+    YML (so that changes to a detection can be taken into account) and the infrastructure it
+    was tested on. The history is used to schedule the longest tests first and to estimate
+    how much longer a test run will take.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    database_path: pathlib.Path
+    run_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    _connection: sqlite3.Connection = PrivateAttr()
+    # sqlite3 connections may be shared between threads, but not used concurrently
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _content_hashes: dict[str, str] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: object) -> None:
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._connection = sqlite3.connect(
+                self.database_path, check_same_thread=False
+            )
+            self._connection.executescript(HISTORY_SCHEMA)
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise Exception(
+                f"Error opening test history database '{self.database_path}': {e!s}"
+            )
+
+    def get_content_hash(self, detection: Detection) -> str:
+        """
+        Get the SHA256 of the YML that defines a detection
+        :param detection: the detection
+        :returns: the hash, or an empty string if the detection has no file
+        """
+        if detection.file_path is None:
+            return ""
+        key = str(detection.file_path)
+        if key not in self._content_hashes:
+            self._content_hashes[key] = Utils.get_file_sha256(detection.file_path)
+        return self._content_hashes[key]
+
+    def record_detection(
+        self,
+        detection: Detection,
+        infrastructure: str,
+        duration: float,
+        phase_durations: dict[DetectionTestingPhase, float],
+    ) -> None:
+        """
+        Record how long it took to test a detection and each of its phases
+        :param detection: the detection that was tested
+        :param infrastructure: identifies the infrastructure the detection was tested on
+        :param duration: total time spent testing the detection, in seconds
+        :param phase_durations: time spent in each phase of testing, in seconds
+        """
+        content_hash = self.get_content_hash(detection)
+        recorded_at = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO detection_durations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.run_id,
+                    str(detection.id),
+                    detection.name,
+                    content_hash,
+                    infrastructure,
+                    str(detection.test_status),
+                    duration,
+                    recorded_at,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT INTO phase_durations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        self.run_id,
+                        str(detection.id),
+                        content_hash,
+                        infrastructure,
+                        str(phase),
+                        phase_duration,
+                        recorded_at,
+                    )
+                    for phase, phase_duration in phase_durations.items()
+                ],
+            )
+
+    def get_expected_duration(
+        self, detection: Detection, infrastructure: str | None = None
+    ) -> float | None:
+        """
+        Get the expected time to test a detection: the average of its most recent durations.
+        Durations recorded for the current version of the detection, and for the same
+        infrastructure, are preferred over older versions and other infrastructure.
+        :param detection: the detection
+        :param infrastructure: the infrastructure it will be tested on, if known
+        :returns: expected duration in seconds, or None if it has never been tested
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT duration FROM detection_durations WHERE detection_id = ? "
+                "ORDER BY content_hash = ? DESC, infrastructure = ? DESC, recorded_at DESC "
+                "LIMIT ?",
+                (
+                    str(detection.id),
+                    self.get_content_hash(detection),
+                    infrastructure or "",
+                    HISTORY_SAMPLE_SIZE,
+                ),
+            ).fetchall()
+        if len(rows) == 0:
+            return None
+        return sum(row[0] for row in rows) / len(rows)
+
+    def get_expected_durations(
+        self, detections: list[Detection], infrastructure: str | None = None
+    ) -> dict[str, float]:
+        """
+        Get the expected duration of every detection that has been tested before
+        :param detections: the detections
+        :param infrastructure: the infrastructure they will be tested on, if known
+        :returns: mapping of detection name to expected duration in seconds
+        """
+        expected_durations: dict[str, float] = {}
+        for detection in detections:
+            expected_duration = self.get_expected_duration(detection, infrastructure)
+            if expected_duration is not None:
+                expected_durations[detection.name] = expected_duration
+        return expected_durations
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
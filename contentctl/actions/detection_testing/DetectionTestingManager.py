@@ -1,14 +1,38 @@
 import concurrent.futures
 import datetime
+import json
+import pathlib
 import signal
 import traceback
 from dataclasses import dataclass
-from typing import List, Union
+from typing import List, Optional, Union
 
 import docker
 from pydantic import BaseModel
 
+from contentctl.actions.detection_testing.AttackDataCache import AttackDataCache
+from contentctl.actions.detection_testing.DetectionTestingAutoscaler import (
+    AUTOSCALE_INTERVAL_SECONDS,
+    DetectionTestingAutoscaler,
+    HostResourceUsage,
+)
+from contentctl.actions.detection_testing.DetectionTestingHistory import (
+    TEST_HISTORY_FILENAME,
+    DetectionTestingHistory,
+)
+from contentctl.actions.detection_testing.DetectionTestingResultCache import (
+    RESULT_CACHE_FILENAME,
+    DetectionTestingResultCache,
+)
+from contentctl.actions.detection_testing.DetectionTestingScheduler import (
+    DetectionTestingScheduler,
+)
+from contentctl.actions.detection_testing.DetectionTestingTracer import (
+    TRACE_FILENAME,
+    DetectionTestingTracer,
+)
 from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructure import (
+    ContainerStoppedException,
     DetectionTestingInfrastructure,
     DetectionTestingManagerOutputDto,
 )
@@ -18,17 +42,30 @@ from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfras
 from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructureServer import (
     DetectionTestingInfrastructureServer,
 )
+from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructureSimulated import (
+    DetectionTestingInfrastructureSimulated,
+)
 from contentctl.actions.detection_testing.views.DetectionTestingView import (
     DetectionTestingView,
 )
-from contentctl.objects.config import Container, Infrastructure, test, test_servers
+from contentctl.actions.detection_testing.views.DetectionTestingViewFile import (
+    OUTPUT_FILENAME,
+    OUTPUT_FOLDER,
+)
+from contentctl.objects.config import (
+    Container,
+    Infrastructure,
+    test,
+    test_servers,
+    test_simulated,
+)
 from contentctl.objects.detection import Detection
 from contentctl.objects.enums import PostTestBehavior
 
 
 @dataclass(frozen=False)
 class DetectionTestingManagerInputDto:
-    config: Union[test, test_servers]
+    config: Union[test, test_servers, test_simulated]
     detections: List[Detection]
     views: list[DetectionTestingView]
 
@@ -37,6 +74,8 @@ class DetectionTestingManager(BaseModel):
     input_dto: DetectionTestingManagerInputDto
     output_dto: DetectionTestingManagerOutputDto
     detectionTestingInfrastructureObjects: list[DetectionTestingInfrastructure] = []
+    autoscaler: Optional[DetectionTestingAutoscaler] = None
+    resultCache: Optional[DetectionTestingResultCache] = None
 
     def setup(self):
         # Some views, such as the Web View, will require some initial setup.
@@ -45,9 +84,98 @@ class DetectionTestingManager(BaseModel):
 
         # for content in self.input_dto.testContent.detections:
         #    self.pending_queue.put(content)
-        self.output_dto.inputQueue = self.input_dto.detections
         self.create_DetectionTestingInfrastructureObjects()
 
+        if (
+            isinstance(self.input_dto.config, test)
+            and self.input_dto.config.container_settings.autoscale
+        ):
+            container_settings = self.input_dto.config.container_settings
+            self.autoscaler = DetectionTestingAutoscaler(
+                max_instances=len(self.detectionTestingInfrastructureObjects),
+                detections_per_instance=container_settings.autoscale_detections_per_container,
+                memory_per_instance_bytes=container_settings.autoscale_memory_per_container_mb
+                * 1024
+                * 1024,
+                max_load_per_cpu=container_settings.autoscale_max_load_per_cpu,
+            )
+
+        # Test the detections expected to take the longest first, so that they are not
+        # left running on a single instance after every other instance has finished
+        # Detections which passed in a previous run, and have not changed since, are reported
+        # with their previous results rather than tested again
+        detections = self.input_dto.detections
+        results_folder = pathlib.Path(".") / OUTPUT_FOLDER
+        if not self.input_dto.config.no_cache:
+            self.resultCache = DetectionTestingResultCache(
+                database_path=results_folder / RESULT_CACHE_FILENAME,
+                environment=self.get_test_environment(),
+            )
+            self.resultCache.load_attack_data_versions(self.input_dto.detections)
+            detections = []
+            for detection in self.input_dto.detections:
+                if self.resultCache.apply_cached_result(detection):
+                    self.output_dto.cachedDetections.add(detection.name)
+                    self.output_dto.outputQueue.append(detection)
+                else:
+                    detections.append(detection)
+
+        if self.input_dto.config.trace:
+            self.output_dto.tracer = DetectionTestingTracer()
+
+        if not self.input_dto.config.disable_test_history:
+            self.output_dto.history = DetectionTestingHistory(
+                database_path=results_folder / TEST_HISTORY_FILENAME
+            )
+        scheduler = DetectionTestingScheduler.from_previous_runs(
+            results_folder / OUTPUT_FILENAME,
+            self.input_dto.config.enable_integration_testing,
+            self.output_dto.history,
+            detections,
+            self.detectionTestingInfrastructureObjects[0].get_history_key()
+            if len(self.detectionTestingInfrastructureObjects) > 0
+            else None,
+        )
+        self.output_dto.expectedDurations = {
+            detection.name: scheduler.estimate_duration(detection)
+            for detection in detections
+        }
+        self.output_dto.inputQueue = scheduler.order(detections)
+
+        if self.input_dto.config.attack_data_download_cache_size_mb > 0:
+            self.output_dto.attackDataCache = AttackDataCache(
+                cache_directory=self.input_dto.config.attack_data_download_cache_path,
+                max_size_bytes=self.input_dto.config.attack_data_download_cache_size_mb
+                * 1024
+                * 1024,
+            )
+
+        # Detections which share identical attack data are tested against a single replay of it
+        self.output_dto.attackDataBatchKeys = (
+            DetectionTestingScheduler.plan_attack_data_batches(detections)
+        )
+
+    def get_test_environment(self) -> str:
+        """
+        Identifies the environment detections are tested in, for the result cache: the apps
+        which are installed, the image or server they are tested on, and whether integration
+        tests are run
+        """
+        return json.dumps(
+            {
+                "apps": [
+                    app.model_dump(mode="json") for app in self.input_dto.config.apps
+                ],
+                "infrastructure": self.detectionTestingInfrastructureObjects[
+                    0
+                ].get_environment_key()
+                if len(self.detectionTestingInfrastructureObjects) > 0
+                else None,
+                "enable_integration_testing": self.input_dto.config.enable_integration_testing,
+            },
+            sort_keys=True,
+        )
+
     def execute(self) -> DetectionTestingManagerOutputDto:
         def sigint_handler(signum, frame):
             print("SIGINT (Ctrl-C Received.  Shutting down test...)")
@@ -92,10 +220,20 @@ class DetectionTestingManager(BaseModel):
                 view_runner.submit(view.setup): view for view in self.input_dto.views
             }
 
-            # Configure all the instances
+            # Configure all the instances, or only the warm pool if autoscaling. The rest are
+            # held in reserve and started while testing if they are needed.
+            if self.autoscaler is not None and isinstance(self.input_dto.config, test):
+                warm_pool_size = self.input_dto.config.container_settings.warm_pool_size
+            else:
+                warm_pool_size = len(self.detectionTestingInfrastructureObjects)
+            reserve_instances = self.detectionTestingInfrastructureObjects[
+                warm_pool_size:
+            ]
             future_instances_setup = {
                 instance_pool.submit(instance.setup): instance
-                for instance in self.detectionTestingInfrastructureObjects
+                for instance in self.detectionTestingInfrastructureObjects[
+                    :warm_pool_size
+                ]
             }
 
             # Wait for all instances to be set up
@@ -115,19 +253,90 @@ class DetectionTestingManager(BaseModel):
                 self.output_dto.start_time = datetime.datetime.now()
                 future_instances_execute = {
                     instance_pool.submit(instance.execute): instance
-                    for instance in self.detectionTestingInfrastructureObjects
+                    for instance in future_instances_setup.values()
                 }
-                # Wait for execution to finish
-                for future in concurrent.futures.as_completed(future_instances_execute):
-                    try:
-                        future.result()
-                    except Exception as e:
+                # Instances added by the autoscaler, which are still being set up
+                future_instances_scaled_setup: dict[
+                    concurrent.futures.Future[None], DetectionTestingInfrastructure
+                ] = {}
+
+                # Wait for execution to finish, checking on the host and scaling up the
+                # number of instances in the meantime
+                while (
+                    len(future_instances_execute) + len(future_instances_scaled_setup)
+                    > 0
+                ):
+                    if (
+                        len(future_instances_execute) == 0
+                        and len(self.output_dto.inputQueue) == 0
+                        and not self.output_dto.terminate
+                    ):
+                        # Nothing is left for the instances still being set up to test, so
+                        # abort their setup (which tears them down) instead of waiting for it
                         self.output_dto.terminate = True
-                        # Output the traceback if we encounter errors in verbose mode
-                        if self.input_dto.config.verbose:
-                            tb = traceback.format_exc()
-                            print(tb)
-                        errors["TESTING ERRORS"].append(e)
+                    done, _ = concurrent.futures.wait(
+                        [*future_instances_execute, *future_instances_scaled_setup],
+                        timeout=AUTOSCALE_INTERVAL_SECONDS,
+                        return_when=concurrent.futures.FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        if future in future_instances_scaled_setup:
+                            instance = future_instances_scaled_setup.pop(future)
+                            try:
+                                future.result()
+                            except Exception as e:
+                                if isinstance(e.__cause__, ContainerStoppedException):
+                                    # Setup was aborted because testing finished
+                                    continue
+                                # Testing continues on the instances which are already running
+                                if self.input_dto.config.verbose:
+                                    tb = traceback.format_exc()
+                                    print(tb)
+                                errors["INSTANCE SETUP ERRORS"].append(e)
+                                continue
+                            if (
+                                len(self.output_dto.inputQueue) == 0
+                                or self.output_dto.terminate
+                            ):
+                                # Nothing is left for it to test
+                                try:
+                                    instance.finish()
+                                except Exception as e:
+                                    errors["INSTANCE SETUP ERRORS"].append(e)
+                                continue
+                            future_instances_execute[
+                                instance_pool.submit(instance.execute)
+                            ] = instance
+                            continue
+
+                        future_instances_execute.pop(future)
+                        try:
+                            future.result()
+                        except Exception as e:
+                            self.output_dto.terminate = True
+                            # Output the traceback if we encounter errors in verbose mode
+                            if self.input_dto.config.verbose:
+                                tb = traceback.format_exc()
+                                print(tb)
+                            errors["TESTING ERRORS"].append(e)
+
+                    self.output_dto.hostResourceUsage = HostResourceUsage.sample()
+                    if (
+                        self.autoscaler is not None
+                        and len(reserve_instances) > 0
+                        and not self.output_dto.terminate
+                        and self.autoscaler.should_add_instance(
+                            len(self.output_dto.inputQueue),
+                            len(future_instances_execute)
+                            + len(future_instances_scaled_setup),
+                            len(future_instances_scaled_setup),
+                            self.output_dto.hostResourceUsage,
+                        )
+                    ):
+                        instance = reserve_instances.pop(0)
+                        future_instances_scaled_setup[
+                            instance_pool.submit(instance.setup)
+                        ] = instance
 
             self.output_dto.terminate = True
 
@@ -168,6 +377,29 @@ class DetectionTestingManager(BaseModel):
                                 print(f"\t\t❌ {suberror!s}")  # type: ignore
                     print()
 
+        if self.resultCache is not None:
+            for detection in self.output_dto.outputQueue:
+                if detection.name in self.output_dto.cachedDetections:
+                    continue
+                try:
+                    self.resultCache.record_result(detection)
+                except Exception as e:
+                    print(
+                        f"Warning - failed to cache the test result of [{detection.name}]: {e!s}"
+                    )
+            self.resultCache.close()
+        if self.output_dto.history is not None:
+            self.output_dto.history.close()
+        if self.output_dto.attackDataCache is not None:
+            self.output_dto.attackDataCache.close()
+        if self.output_dto.tracer is not None:
+            trace_path = pathlib.Path(".") / OUTPUT_FOLDER / TRACE_FILENAME
+            try:
+                self.output_dto.tracer.write(trace_path)
+                print(f"Wrote a trace of the test run to [{trace_path}]")
+            except Exception as e:
+                print(f"Warning - failed to write the trace of the test run: {e!s}")
+
         return self.output_dto
 
     def create_DetectionTestingInfrastructureObjects(self):
@@ -242,6 +474,15 @@ class DetectionTestingManager(BaseModel):
                     )
                 )
 
+            elif isinstance(self.input_dto.config, test_simulated):
+                self.detectionTestingInfrastructureObjects.append(
+                    DetectionTestingInfrastructureSimulated(
+                        global_config=self.input_dto.config,
+                        infrastructure=infrastructure,
+                        sync_obj=self.output_dto,
+                    )
+                )
+
             else:
                 raise Exception(
                     f"Unsupported target infrastructure '{infrastructure}' and config type {self.input_dto.config}"
@@ -0,0 +1,243 @@
+import concurrent.futures
+import hashlib
+import json
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+import requests  # type: ignore
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from contentctl.helper.utils import Utils
+from contentctl.objects.base_test_result import TestResultStatus
+from contentctl.objects.detection import Detection
+from contentctl.objects.lookup import FileBackedLookup
+
+RESULT_CACHE_FILENAME = "result_cache.sqlite"
+
+# Number of requests made at once for the versions of attack data files at URLs, and how long
+# to wait for each one
+ATTACK_DATA_VERSION_WORKERS = 16
+ATTACK_DATA_VERSION_TIMEOUT_SECONDS = 30
+
+RESULT_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS passed_results (
+    cache_key TEXT PRIMARY KEY,
+    detection_id TEXT NOT NULL,
+    detection_name TEXT NOT NULL,
+    test_results TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+
+class DetectionTestingResultCache(BaseModel):
+    """
+    A local SQLite database of the detections which passed testing. Each result is keyed by a
+    hash of everything that could change it: the detection's YML, the content it depends on
+    (macros, lookups and data sources), its attack data, and the environment it was tested in
+    (the apps installed and the Splunk image or server). If none of those have changed since a
+    detection passed, it does not need to be tested again. Attack data at a URL is identified by
+    the version (ETag) the server reports for it, which is checked once per test run; detections
+    whose attack data has no known version are always tested.
+
+    :param database_path: the path of the database, which is created if it does not exist
+    :param environment: identifies the environment the detections are tested in
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    database_path: pathlib.Path
+    environment: str
+    _connection: sqlite3.Connection = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _file_hashes: dict[pathlib.Path, str] = PrivateAttr(default_factory=dict)
+    _url_versions: dict[str, Optional[str]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: object) -> None:
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._connection = sqlite3.connect(
+                self.database_path, check_same_thread=False
+            )
+            self._connection.executescript(RESULT_CACHE_SCHEMA)
+            self._connection.commit()
+        except sqlite3.Error as e:
+            raise Exception(
+                f"Error opening test result cache '{self.database_path}': {e!s}"
+            )
+
+    def get_file_hash(self, file_path: pathlib.Path) -> str:
+        if file_path not in self._file_hashes:
+            self._file_hashes[file_path] = Utils.get_file_sha256(file_path)
+        return self._file_hashes[file_path]
+
+    def load_attack_data_versions(self, detections: list[Detection]) -> None:
+        """
+        Get the version of every attack data file at a URL used by the detections, making
+        several requests at once rather than one at a time as each cache key is computed
+        :param detections: the detections
+        """
+        urls = {
+            str(attack_data.data)
+            for detection in detections
+            for test_group in detection.test_groups
+            for attack_data in test_group.attack_data
+            if not isinstance(attack_data.data, pathlib.Path)
+        }.difference(self._url_versions)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=ATTACK_DATA_VERSION_WORKERS,
+            thread_name_prefix="attack_data_version",
+        ) as executor:
+            for url, version in zip(
+                urls, executor.map(self.fetch_attack_data_version, urls)
+            ):
+                self._url_versions[url] = version
+
+    def get_attack_data_version(self, url: str) -> Optional[str]:
+        if url not in self._url_versions:
+            self._url_versions[url] = self.fetch_attack_data_version(url)
+        return self._url_versions[url]
+
+    @staticmethod
+    def fetch_attack_data_version(url: str) -> Optional[str]:
+        """
+        Ask the server for the version of the file at a URL, without downloading it
+        :param url: the URL of the attack data
+        :returns: the ETag of the file, or its modification time and size if the server does not
+            send an ETag, or None if its version could not be determined
+        """
+        try:
+            response = requests.head(
+                url, allow_redirects=True, timeout=ATTACK_DATA_VERSION_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        if "ETag" in response.headers:
+            return response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            return (
+                f"{response.headers['Last-Modified']}:"
+                f"{response.headers.get('Content-Length')}"
+            )
+        return None
+
+    def get_cache_key(self, detection: Detection) -> Optional[str]:
+        """
+        Get the key of a detection's result: a SHA256 over its YML, its dependencies, its attack
+        data and the test environment
+        :param detection: the detection
+        :returns: the key, or None if the version of some of its attack data is not known, in
+            which case its result cannot be cached
+        """
+        parts: list[str] = [self.environment]
+        if detection.file_path is not None:
+            parts.append(self.get_file_hash(detection.file_path))
+
+        dependency_parts: list[str] = []
+        for dependency in detection.get_content_dependencies():
+            dependency_part = f"{type(dependency).__name__}:{dependency.name}"
+            if dependency.file_path is not None:
+                dependency_part += f":{self.get_file_hash(dependency.file_path)}"
+            if isinstance(dependency, FileBackedLookup):
+                try:
+                    dependency_part += f":{self.get_file_hash(dependency.filename)}"
+                except Exception:
+                    # Lookups generated at build time have no file of their own
+                    pass
+            dependency_parts.append(dependency_part)
+        parts.extend(sorted(dependency_parts))
+
+        # Attack data which is only available at a URL is identified by the URL and the version
+        # the server reports for it, since its contents are not known until it is downloaded
+        for test_group in detection.test_groups:
+            for attack_data in test_group.attack_data:
+                if isinstance(attack_data.data, pathlib.Path):
+                    data = self.get_file_hash(attack_data.data)
+                else:
+                    version = self.get_attack_data_version(str(attack_data.data))
+                    if version is None:
+                        return None
+                    data = f"{attack_data.data}@{version}"
+                parts.append(
+                    f"{data}:{attack_data.source}:{attack_data.sourcetype}:"
+                    f"{attack_data.custom_index}:{attack_data.host}"
+                )
+
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def apply_cached_result(self, detection: Detection) -> bool:
+        """
+        If the detection passed in a previous test run, and nothing it depends on has changed
+        since, set the results of its tests to those of that run
+        :param detection: the detection
+        :returns: whether a cached result was found
+        """
+        cache_key = self.get_cache_key(detection)
+        if cache_key is None:
+            return False
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT test_results FROM passed_results WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+        if row is None:
+            return False
+
+        # Test names are not unique (unit and integration tests usually share a name), so results
+        # are stored in the order of the detection's tests
+        cached_results: list[dict[str, Any]] = json.loads(row[0])
+        if [(test.name, str(test.test_type)) for test in detection.tests] != [
+            (result["name"], result["test_type"]) for result in cached_results
+        ]:
+            return False
+        for test, cached_result in zip(detection.tests, cached_results):
+            # Skipping a test creates a result of the correct type for the test, which is then
+            # given the status of the cached result
+            test.skip(
+                message=f"CACHED: {cached_result['message'] or 'Test passed in a previous run'}"
+            )
+            assert test.result is not None
+            test.result.status = TestResultStatus(cached_result["status"])
+            test.result.duration = cached_result["duration"]
+        return True
+
+    def record_result(self, detection: Detection) -> None:
+        """
+        Record the results of a detection's tests, if it passed
+        :param detection: the detection
+        """
+        if detection.test_status != TestResultStatus.PASS:
+            return
+        cache_key = self.get_cache_key(detection)
+        if cache_key is None:
+            return
+        test_results: list[dict[str, Any]] = []
+        for test in detection.tests:
+            assert test.result is not None
+            test_results.append(
+                {
+                    "name": test.name,
+                    "test_type": str(test.test_type),
+                    "status": str(test.result.status),
+                    "message": test.result.message,
+                    "duration": test.result.duration,
+                }
+            )
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO passed_results VALUES (?, ?, ?, ?, ?)",
+                (
+                    cache_key,
+                    str(detection.id),
+                    detection.name,
+                    json.dumps(test_results),
+                    time.time(),
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
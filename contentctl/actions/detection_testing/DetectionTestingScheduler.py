@@ -0,0 +1,284 @@
+import pathlib
+from typing import Any, Self
+
+import yaml
+from pydantic import BaseModel
+
+from contentctl.actions.detection_testing.DetectionTestingHistory import (
+    DetectionTestingHistory,
+)
+from contentctl.objects.detection import Detection
+from contentctl.objects.test_attack_data import TestAttackData
+from contentctl.objects.test_group import TestGroup
+
+# The following are used to estimate how long a detection will take to test when there is
+# no record of how long it took previously. They do not need to be accurate, only to rank
+# detections in roughly the right order relative to one another.
+
+# Time spent on each test group regardless of its attack data: dispatching and retrying the
+# search, deleting the attack data, etc.
+ESTIMATED_TEST_GROUP_OVERHEAD_SECONDS = 20.0
+
+# Rate at which a local attack data file is replayed and indexed
+ESTIMATED_REPLAY_BYTES_PER_SECOND = 4 * 1024 * 1024
+
+# Time to download and replay an attack data file whose size cannot be determined because
+# it has not been downloaded yet
+ESTIMATED_REMOTE_ATTACK_DATA_SECONDS = 15.0
+
+# Time to enable, dispatch, and validate the risk and notable events of a detection
+ESTIMATED_INTEGRATION_TEST_SECONDS = 60.0
+
+# Identifies a set of attack data by every field which affects how it is replayed
+AttackDataKey = tuple[tuple[str, str, str, str | None, str | None], ...]
+
+
+class DetectionTestingScheduler(BaseModel):
+    """
+    Orders detections so that those expected to take the longest are tested first
+    (Longest Processing Time first). When detections are handed out to instances in this
+    order, the long running detections overlap with one another at the beginning of the test
+    instead of a single one running alone at the end, which reduces total test time whenever
+    there is more than one test instance.
+
+    Expected durations come from a previous run when it recorded one for the detection, and
+    from a heuristic based on the detection's test groups and attack data otherwise.
+    """
+
+    enable_integration_testing: bool = False
+    historical_durations: dict[str, float] = {}
+
+    @classmethod
+    def from_summary_file(
+        cls, summary_path: pathlib.Path, enable_integration_testing: bool
+    ) -> Self:
+        """
+        Construct a scheduler using the durations recorded in the summary file of a previous
+        test run, if one exists. A missing or malformed summary is not an error; the
+        heuristic is used for every detection instead.
+        :param summary_path: path to a previous summary.yml
+        :param enable_integration_testing: whether integration tests will be run
+        :returns: the scheduler
+        """
+        return cls(
+            enable_integration_testing=enable_integration_testing,
+            historical_durations=cls.load_summary_durations(
+                summary_path, enable_integration_testing
+            ),
+        )
+
+    @classmethod
+    def from_previous_runs(
+        cls,
+        summary_path: pathlib.Path,
+        enable_integration_testing: bool,
+        history: DetectionTestingHistory | None,
+        detections: list[Detection],
+        infrastructure: str | None = None,
+    ) -> Self:
+        """
+        Construct a scheduler using the durations recorded by previous test runs: the summary
+        file of the last run and, if one is kept, the test duration history. Durations recorded
+        in the history are more precise than those in the summary, so they take precedence.
+        :param summary_path: path to a previous summary.yml
+        :param enable_integration_testing: whether integration tests will be run
+        :param history: the test duration history, if one is kept
+        :param detections: the detections which will be tested
+        :param infrastructure: the infrastructure they will be tested on, if known
+        :returns: the scheduler
+        """
+        scheduler = cls.from_summary_file(summary_path, enable_integration_testing)
+        if history is not None:
+            scheduler.historical_durations.update(
+                history.get_expected_durations(detections, infrastructure)
+            )
+        return scheduler
+
+    @staticmethod
+    def load_summary_durations(
+        summary_path: pathlib.Path, enable_integration_testing: bool
+    ) -> dict[str, float]:
+        """
+        Read the total test duration of each detection from a summary.yml
+        :param summary_path: path to a previous summary.yml
+        :param enable_integration_testing: whether integration test durations should be included
+        :returns: mapping of detection name to duration in seconds
+        """
+        if not summary_path.is_file():
+            return {}
+        try:
+            with open(summary_path, "r") as summary_file:
+                summary: dict[str, Any] = yaml.safe_load(summary_file)
+        except Exception:
+            return {}
+
+        durations: dict[str, float] = {}
+        for detection_summary in summary.get("tested_detections", []) or []:
+            total_duration = 0.0
+            for test_summary in detection_summary.get("tests", []) or []:
+                if (
+                    test_summary.get("test_type") == "integration"
+                    and not enable_integration_testing
+                ):
+                    continue
+                duration = test_summary.get("duration")
+                if isinstance(duration, (int, float)):
+                    total_duration += duration
+            if total_duration > 0 and "name" in detection_summary:
+                durations[detection_summary["name"]] = total_duration
+        return durations
+
+    def estimate_attack_data_duration(self, attack_data: TestAttackData) -> float:
+        """
+        Estimate how long it will take to replay a single attack data file
+        :param attack_data: the attack data
+        :returns: estimated duration in seconds
+        """
+        # Attack data which is available on disk (for example, from a test data cache) can
+        # be sized. Otherwise, it is a URL which has not been downloaded yet.
+        if isinstance(attack_data.data, pathlib.Path):
+            try:
+                return (
+                    attack_data.data.stat().st_size / ESTIMATED_REPLAY_BYTES_PER_SECOND
+                )
+            except OSError:
+                pass
+        return ESTIMATED_REMOTE_ATTACK_DATA_SECONDS
+
+    def estimate_test_group_duration(self, test_group: TestGroup) -> float:
+        """
+        Estimate how long it will take to test a single test group
+        :param test_group: the test group
+        :returns: estimated duration in seconds
+        """
+        if test_group.all_tests_skipped():
+            return 0.0
+
+        duration = ESTIMATED_TEST_GROUP_OVERHEAD_SECONDS + sum(
+            self.estimate_attack_data_duration(attack_data)
+            for attack_data in test_group.attack_data
+        )
+        if (
+            self.enable_integration_testing
+            and not test_group.integration_test_skipped()
+        ):
+            duration += ESTIMATED_INTEGRATION_TEST_SECONDS
+        return duration
+
+    def estimate_duration(self, detection: Detection) -> float:
+        """
+        Estimate how long it will take to test a detection
+        :param detection: the detection
+        :returns: estimated duration in seconds
+        """
+        if detection.name in self.historical_durations:
+            return self.historical_durations[detection.name]
+        return sum(
+            self.estimate_test_group_duration(test_group)
+            for test_group in detection.test_groups
+        )
+
+    def order(self, detections: list[Detection]) -> list[Detection]:
+        """
+        Order detections for the input queue. Instances take work from the END of the queue
+        (with pop()), so the detections expected to take the longest are placed last.
+        Ties are broken by name so that the order is deterministic.
+        :param detections: the detections to test
+        :returns: a new list of the same detections in scheduling order
+        """
+        return sorted(
+            detections,
+            key=lambda detection: (self.estimate_duration(detection), detection.name),
+        )
+
+    @staticmethod
+    def get_attack_data_key(test_group: TestGroup) -> AttackDataKey:
+        """
+        Get a key which is equal for two test groups if, and only if, they replay exactly the same
+        attack data, in the same way, into the same indexes
+        :param test_group: the test group
+        :returns: the key
+        """
+        return tuple(
+            sorted(
+                (
+                    str(attack_data.data),
+                    attack_data.source,
+                    attack_data.sourcetype,
+                    attack_data.custom_index,
+                    attack_data.host,
+                )
+                for attack_data in test_group.attack_data
+            )
+        )
+
+    @staticmethod
+    def plan_attack_data_batches(
+        detections: list[Detection],
+    ) -> dict[str, AttackDataKey]:
+        """
+        Find the detections which can be tested against the same replay of their attack data.
+        Only detections with exactly one test group (the vast majority) are batched, since a
+        detection with several test groups must have its attack data replayed and deleted
+        between them. A detection whose attack data is not shared with any other detection is
+        not part of a batch and will be tested alone.
+        :param detections: the detections to test
+        :returns: mapping of detection name to the key of the attack data it shares with at least
+            one other detection
+        """
+        keys: dict[str, AttackDataKey] = {}
+        batch_sizes: dict[AttackDataKey, int] = {}
+        for detection in detections:
+            if len(detection.test_groups) != 1:
+                continue
+            test_group = detection.test_groups[0]
+            if test_group.all_tests_skipped() or len(test_group.attack_data) == 0:
+                continue
+            key = DetectionTestingScheduler.get_attack_data_key(test_group)
+            keys[detection.name] = key
+            batch_sizes[key] = batch_sizes.get(key, 0) + 1
+
+        return {name: key for name, key in keys.items() if batch_sizes[key] > 1}
+
+    def shard(
+        self, detections: list[Detection], shard_index: int, shard_count: int
+    ) -> list[Detection]:
+        """
+        Partition detections into shards with roughly equal expected durations, so that they can
+        be tested in parallel (for example, on separate CI runners), and return one of them.
+        Detections are assigned greedily, longest first, to the shard with the least expected
+        duration so far. The partition only depends on the detections and their expected
+        durations, so every runner computes the same one as long as they see the same previous
+        test results. Detections which share their attack data are kept in the same shard, so
+        that it is still only replayed once.
+        :param detections: the detections to test
+        :param shard_index: the shard to return, from 0 to shard_count - 1
+        :param shard_count: the number of shards
+        :returns: the detections in the shard, in their original order
+        """
+        batch_keys = self.plan_attack_data_batches(detections)
+        units: dict[str | AttackDataKey, list[Detection]] = {}
+        for detection in detections:
+            units.setdefault(batch_keys.get(detection.name, detection.name), []).append(
+                detection
+            )
+
+        def unit_sort_key(unit: list[Detection]) -> tuple[float, str]:
+            duration = sum(self.estimate_duration(detection) for detection in unit)
+            return (-duration, min(detection.name for detection in unit))
+
+        shard_durations = [0.0] * shard_count
+        shard_names: list[set[str]] = [set() for _ in range(shard_count)]
+        for unit in sorted(units.values(), key=unit_sort_key):
+            # Ties go to the lowest numbered shard
+            target = min(range(shard_count), key=lambda i: (shard_durations[i], i))
+            shard_durations[target] += sum(
+                self.estimate_duration(detection) for detection in unit
+            )
+            shard_names[target].update(detection.name for detection in unit)
+
+        return [
+            detection
+            for detection in detections
+            if detection.name in shard_names[shard_index]
+        ]
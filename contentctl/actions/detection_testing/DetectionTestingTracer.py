@@ -0,0 +1,131 @@
+import json
+import pathlib
+import threading
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+TRACE_FILENAME = "trace.json"
+
+
+class TraceSpan(BaseModel):
+    """
+    A period of time an instance spent doing one thing
+
+    :param name: what was done (e.g. 'replay', or the name of a setup step)
+    :param category: the kind of span (e.g. 'phase', 'test_group' or 'setup')
+    :param instance: the name of the instance
+    :param slot: the slot of the instance which did it
+    :param start_time: when it started (as returned by time.time())
+    :param end_time: when it ended (as returned by time.time())
+    :param args: details shown with the span, such as the detection being tested
+    """
+
+    name: str
+    category: str
+    instance: str
+    slot: int
+    start_time: float
+    end_time: float
+    args: dict[str, str] = {}
+
+
+class DetectionTestingTracer(BaseModel):
+    """
+    Records what every instance spends its time on during a test run: instance setup, and each
+    phase of setting up, testing and cleaning up after each test group. The spans are written in
+    the Chrome trace event format, which can be opened in Perfetto (https://ui.perfetto.dev) or
+    chrome://tracing, with one track (process) per instance and one thread per slot.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    _spans: list[TraceSpan] = PrivateAttr(default_factory=list)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def add_span(self, span: TraceSpan) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def get_spans(self) -> list[TraceSpan]:
+        with self._lock:
+            return list(self._spans)
+
+    def get_trace(self) -> dict[str, Any]:
+        """
+        :returns: the spans as a Chrome trace, with times in microseconds since the first span
+            started
+        """
+        spans = sorted(self.get_spans(), key=lambda span: span.start_time)
+        if len(spans) == 0:
+            return {"traceEvents": [], "displayTimeUnit": "ms"}
+        trace_start_time = spans[0].start_time
+
+        events: list[dict[str, Any]] = []
+        process_ids: dict[str, int] = {}
+        thread_ids: set[tuple[int, int]] = set()
+        for span in spans:
+            if span.instance not in process_ids:
+                process_ids[span.instance] = len(process_ids) + 1
+                events.append(
+                    {
+                        "name": "process_name",
+                        "ph": "M",
+                        "pid": process_ids[span.instance],
+                        "args": {"name": span.instance},
+                    }
+                )
+            pid = process_ids[span.instance]
+            if (pid, span.slot) not in thread_ids:
+                thread_ids.add((pid, span.slot))
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "tid": span.slot,
+                        "args": {"name": f"slot {span.slot}"},
+                    }
+                )
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start_time - trace_start_time) * 1_000_000),
+                    "dur": round((span.end_time - span.start_time) * 1_000_000),
+                    "pid": pid,
+                    "tid": span.slot,
+                    "args": span.args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def get_breakdown(self) -> dict[str, dict[str, Any]]:
+        """
+        Totals the time spent on each kind of span, across every instance. Spans may be nested
+        (for example, the replay phase happens during setup of a test group), so the totals of
+        different kinds of spans overlap.
+        :returns: for each '<category>:<name>', the number of spans and the total, mean and max
+            of their durations in seconds, ordered by total duration
+        """
+        durations: dict[str, list[float]] = {}
+        for span in self.get_spans():
+            durations.setdefault(f"{span.category}:{span.name}", []).append(
+                span.end_time - span.start_time
+            )
+        breakdown: dict[str, dict[str, Any]] = {}
+        for key, values in sorted(
+            durations.items(), key=lambda item: sum(item[1]), reverse=True
+        ):
+            breakdown[key] = {
+                "count": len(values),
+                "total_seconds": round(sum(values), 2),
+                "mean_seconds": round(sum(values) / len(values), 2),
+                "max_seconds": round(max(values), 2),
+            }
+        return breakdown
+
+    def write(self, trace_path: pathlib.Path) -> None:
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, "w") as trace_file:
+            json.dump(self.get_trace(), trace_file)
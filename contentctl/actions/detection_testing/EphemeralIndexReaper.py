@@ -0,0 +1,59 @@
+import queue
+import threading
+from typing import Callable, Optional
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+
+class EphemeralIndexReaper(BaseModel):
+    """
+    Removes the short-lived indexes that test groups replay their attack data into. Removing an
+    index can take several seconds, so it happens on a background thread rather than on the
+    critical path of testing; the next test group replays into a new index in the meantime.
+
+    :param remove_index: removes an index from the server, given its name
+    :param report_error: called with a message if an index could not be removed
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    remove_index: Callable[[str], None]
+    report_error: Callable[[str], None]
+    _queue: queue.Queue[Optional[str]] = PrivateAttr(default_factory=queue.Queue)
+    _thread: Optional[threading.Thread] = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def remove(self, index_name: str) -> None:
+        """
+        Schedules an index for removal
+        :param index_name: the name of the index
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="ephemeral_index_reaper", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(index_name)
+
+    def run(self) -> None:
+        while True:
+            index_name = self._queue.get()
+            if index_name is None:
+                return
+            try:
+                self.remove_index(index_name)
+            except Exception as e:
+                self.report_error(
+                    f"Warning - failed to remove ephemeral index [{index_name}]: {e!s}"
+                )
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits for every scheduled index to be removed, then stops the background thread
+        :param timeout: the maximum time to wait, in seconds
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+        self._queue.put(None)
+        self._thread.join(timeout)
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+# The first poll for a newly registered ackId happens immediately. While nothing is acknowledged,
+# the delay between polls doubles from the minimum up to the maximum; it returns to the minimum
+# as soon as any ackId is acknowledged.
+HEC_ACK_MIN_POLL_SECONDS = 0.025
+HEC_ACK_MAX_POLL_SECONDS = 2.0
+
+
+class HecAckTracker(BaseModel):
+    """
+    Tracks the outstanding HEC ackIds of every replay in progress on an instance. A single
+    background thread polls the acknowledgement endpoint for all of them in one request, backing
+    off adaptively, and wakes each waiting replay as soon as all of its ackIds are acknowledged.
+
+    :param poll_acks: posts a list of ackIds to the ack endpoint and returns the "acks" mapping
+        of the response (ackId, as a string, to whether it has been indexed)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    poll_acks: Callable[[list[int]], dict[str, bool]]
+    _condition: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    # ackIds which have not been acknowledged yet, and the time each was registered
+    _pending: dict[int, float] = PrivateAttr(default_factory=dict)
+    # Time from registration to acknowledgement of each ackId that has been acknowledged
+    _acknowledged: dict[int, float] = PrivateAttr(default_factory=dict)
+    # Errors raised while polling, keyed by the ackIds that were being polled
+    _errors: dict[int, Exception] = PrivateAttr(default_factory=dict)
+    _thread: Optional[threading.Thread] = PrivateAttr(default=None)
+    _stopped: bool = PrivateAttr(default=False)
+
+    def wait(self, ack_ids: list[int], timeout: Optional[float] = None) -> list[float]:
+        """
+        Blocks until every ackId has been acknowledged
+        :param ack_ids: the ackIds returned by HEC for the data that was sent
+        :param timeout: the maximum time to wait, in seconds, or None to wait indefinitely
+        :returns: the time, in seconds, each ackId took to be acknowledged
+        :raises Exception: if polling failed for any of the ackIds, if they were not all
+            acknowledged within the timeout, or if the tracker was stopped while waiting
+        """
+        with self._condition:
+            now = time.time()
+            for ack_id in ack_ids:
+                self._pending[ack_id] = now
+                self._acknowledged.pop(ack_id, None)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="hec_ack_tracker", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+            finished = self._condition.wait_for(
+                lambda: (
+                    self._stopped
+                    or all(
+                        ack_id in self._acknowledged or ack_id in self._errors
+                        for ack_id in ack_ids
+                    )
+                ),
+                timeout=timeout,
+            )
+            unacknowledged = [a for a in ack_ids if a in self._pending]
+            for ack_id in unacknowledged:
+                self._pending.pop(ack_id)
+            errors = [self._errors.pop(a) for a in ack_ids if a in self._errors]
+            latencies = [
+                self._acknowledged.pop(a) for a in ack_ids if a in self._acknowledged
+            ]
+            if len(errors) > 0:
+                raise errors[0]
+            if len(unacknowledged) > 0:
+                if not finished:
+                    raise Exception(
+                        f"ackIDs {unacknowledged} were not acknowledged within {timeout} seconds"
+                    )
+                raise Exception(
+                    f"Stopped waiting for ackIDs {unacknowledged} before they were acknowledged"
+                )
+            return latencies
+
+    def run(self) -> None:
+        delay = HEC_ACK_MIN_POLL_SECONDS
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._pending) > 0 or self._stopped
+                )
+                if self._stopped:
+                    return
+                ack_ids = sorted(self._pending)
+
+            try:
+                acks = self.poll_acks(ack_ids)
+                missing = [a for a in ack_ids if str(a) not in acks]
+                if len(missing) > 0:
+                    raise Exception(
+                        f"Proper ackID structure not found for ackIDs {missing} in {acks}"
+                    )
+            except Exception as e:
+                with self._condition:
+                    for ack_id in ack_ids:
+                        self._pending.pop(ack_id, None)
+                        self._errors[ack_id] = Exception(
+                            f"There was an exception in the post: {e!s}"
+                        )
+                    self._condition.notify_all()
+                continue
+
+            now = time.time()
+            with self._condition:
+                newly_acknowledged = False
+                for ack_id in ack_ids:
+                    if acks[str(ack_id)] is True and ack_id in self._pending:
+                        self._acknowledged[ack_id] = now - self._pending.pop(ack_id)
+                        newly_acknowledged = True
+                if newly_acknowledged:
+                    delay = HEC_ACK_MIN_POLL_SECONDS
+                    self._condition.notify_all()
+                else:
+                    delay = min(delay * 2, HEC_ACK_MAX_POLL_SECONDS)
+
+                # Wait before polling again, unless more ackIds are registered in the meantime
+                pending_count = len(self._pending)
+                if self._condition.wait_for(
+                    lambda: len(self._pending) > pending_count or self._stopped,
+                    timeout=delay,
+                ):
+                    delay = HEC_ACK_MIN_POLL_SECONDS
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
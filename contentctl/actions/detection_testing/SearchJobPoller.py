@@ -0,0 +1,110 @@
+import threading
+from typing import Callable, Optional
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+# Delay between checks of the status of outstanding search jobs. It starts at the minimum when a
+# new job is dispatched or a job completes, and doubles up to the maximum while none complete.
+SEARCH_JOB_MIN_POLL_SECONDS = 0.1
+SEARCH_JOB_MAX_POLL_SECONDS = 2.0
+
+
+class SearchJobPoller(BaseModel):
+    """
+    Waits for search jobs that were dispatched asynchronously on an instance. Rather than each
+    test polling (or blocking on) its own job, a single background thread checks the status of
+    every outstanding job in one request and wakes each waiting test when its job is done.
+
+    :param poll_jobs: given a list of search job ids (sids), returns whether each job is done
+        (finished or failed). Jobs which are missing from the response no longer exist, so
+        waiting on them raises an error rather than reading a job that is gone.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    poll_jobs: Callable[[list[str]], dict[str, bool]]
+    _condition: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _pending: set[str] = PrivateAttr(default_factory=set)
+    _done: set[str] = PrivateAttr(default_factory=set)
+    _errors: dict[str, Exception] = PrivateAttr(default_factory=dict)
+    _thread: Optional[threading.Thread] = PrivateAttr(default=None)
+    _stopped: bool = PrivateAttr(default=False)
+
+    def wait(self, sid: str) -> None:
+        """
+        Blocks until a search job is done
+        :param sid: the id of the search job
+        :raises Exception: if the status of the job could not be checked, or the poller was
+            stopped before the job was done
+        """
+        with self._condition:
+            self._pending.add(sid)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="search_job_poller", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+            self._condition.wait_for(
+                lambda: sid in self._done or sid in self._errors or self._stopped
+            )
+            if sid in self._errors:
+                raise self._errors.pop(sid)
+            if sid not in self._done:
+                self._pending.discard(sid)
+                raise Exception(
+                    f"Stopped waiting for search job {sid} before it was done"
+                )
+            self._done.discard(sid)
+
+    def run(self) -> None:
+        delay = SEARCH_JOB_MIN_POLL_SECONDS
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._pending) > 0 or self._stopped
+                )
+                if self._stopped:
+                    return
+                sids = sorted(self._pending)
+
+            try:
+                statuses = self.poll_jobs(sids)
+            except Exception as e:
+                with self._condition:
+                    for sid in sids:
+                        self._pending.discard(sid)
+                        self._errors[sid] = Exception(
+                            f"Error checking the status of search job {sid}: {e!s}"
+                        )
+                    self._condition.notify_all()
+                continue
+
+            with self._condition:
+                missing = {sid for sid in sids if sid not in statuses}
+                for sid in missing:
+                    self._pending.discard(sid)
+                    self._errors[sid] = Exception(
+                        f"Search job {sid} no longer exists on the server"
+                    )
+                done = {sid for sid in sids if statuses.get(sid, False)}
+                if len(done) > 0 or len(missing) > 0:
+                    self._pending.difference_update(done)
+                    self._done.update(done)
+                    delay = SEARCH_JOB_MIN_POLL_SECONDS
+                    self._condition.notify_all()
+                else:
+                    delay = min(delay * 2, SEARCH_JOB_MAX_POLL_SECONDS)
+
+                # Wait before polling again, unless another job is dispatched in the meantime
+                pending_count = len(self._pending)
+                if self._condition.wait_for(
+                    lambda: len(self._pending) > pending_count or self._stopped,
+                    timeout=delay,
+                ):
+                    delay = SEARCH_JOB_MIN_POLL_SECONDS
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
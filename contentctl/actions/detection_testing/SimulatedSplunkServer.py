@@ -0,0 +1,802 @@
+import fnmatch
+import gzip
+import itertools
+import json
+import pathlib
+import re
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, Self
+from xml.sax.saxutils import escape, quoteattr
+
+import yaml
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+# Indexes which exist on a new simulated server, before any are created through the REST API
+DEFAULT_SIMULATED_INDEXES = ["main", "_internal", "_audit", "risk", "notable"]
+
+# Matches each index named in a search, such as index=main or index="contentctl_*"
+INDEX_TERM_PATTERN = re.compile(r'\bindex\s*=\s*"?([^"\s)]+)"?')
+
+ATOM_NAMESPACES = (
+    'xmlns="http://www.w3.org/2005/Atom" '
+    'xmlns:s="http://dev.splunk.com/ns/rest" '
+    'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"'
+)
+
+
+class SimulatedSearch(BaseModel):
+    """
+    Scripted behaviour of the search jobs whose search matches a pattern. Searches which match no
+    pattern finish after the default search latency, with a single result counting the events
+    which have been indexed into the indexes they name (or no results, if there are none).
+
+    :param pattern: regular expression searched for in the search string
+    :param latency_seconds: how long a matching job takes to finish; the default search latency
+        of the server if not set
+    :param results: the results of a matching job; the default results if not set
+    :param fail: whether a matching job fails, rather than finishing with results
+    """
+
+    model_config = ConfigDict(extra="forbid")
+    pattern: str
+    latency_seconds: Optional[float] = Field(default=None, ge=0)
+    results: Optional[list[dict[str, Any]]] = None
+    fail: bool = False
+
+
+class SimulatedFault(BaseModel):
+    """
+    A scripted delay and/or failure of the requests to matching endpoints of the REST API or HEC.
+    Only the first fault matching a request is applied.
+
+    :param pattern: regular expression searched for in '<method> <path>' of each request, such as
+        'POST /services/collector/raw' or 'search/v2/jobs$'
+    :param delay_seconds: how long to delay each matching request before handling it
+    :param status: if set, the HTTP status returned for each matching request instead of handling
+        it
+    :param count: the number of matching requests affected; every matching request if not set
+    """
+
+    model_config = ConfigDict(extra="forbid")
+    pattern: str
+    delay_seconds: float = Field(default=0.0, ge=0)
+    status: Optional[int] = Field(default=None, ge=400, lt=600)
+    count: Optional[int] = Field(default=None, ge=1)
+
+
+class SimulatedSplunkScript(BaseModel):
+    """
+    Describes how a SimulatedSplunkServer behaves, so that runs against it are deterministic
+
+    :param splunk_version: the version of Splunk reported by the server
+    :param apps: the apps installed on the server, mapped to their versions (e.g.
+        'SplunkEnterpriseSecuritySuite: 8.0.2' to simulate ES)
+    :param indexes: the indexes which exist before any are created
+    :param search_latency_seconds: how long search jobs take to finish, unless a SimulatedSearch
+        says otherwise
+    :param hec_ack_latency_seconds: how long data sent to HEC takes to be indexed, after which it
+        is acknowledged and can be searched
+    :param searches: scripted search jobs; the first whose pattern matches a search is used
+    :param faults: scripted delays and failures of requests
+    :param saved_searches: the saved searches on the server, mapped to their settings
+    """
+
+    model_config = ConfigDict(extra="forbid")
+    splunk_version: str = "9.4.0"
+    apps: dict[str, str] = {}
+    indexes: list[str] = Field(default_factory=lambda: list(DEFAULT_SIMULATED_INDEXES))
+    search_latency_seconds: float = Field(default=0.0, ge=0)
+    hec_ack_latency_seconds: float = Field(default=0.0, ge=0)
+    searches: list[SimulatedSearch] = []
+    faults: list[SimulatedFault] = []
+    saved_searches: dict[str, dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, script_path: pathlib.Path) -> Self:
+        try:
+            with open(script_path, "r") as script_file:
+                script: Any = yaml.safe_load(script_file)
+            return cls.model_validate(script or {})
+        except Exception as e:
+            raise Exception(
+                f"Error reading simulated Splunk server script '{script_path}': {e!s}"
+            )
+
+
+class SimulatedResponse(BaseModel):
+    status: int = 200
+    content_type: str = "text/xml; charset=utf-8"
+    body: bytes = b""
+
+
+# Handles a request, given its method, path, query parameters, body and headers
+SimulatedRequestHandlerFunc = Callable[
+    [str, str, dict[str, list[str]], bytes, Any], SimulatedResponse
+]
+
+
+class SimulatedSearchJob(BaseModel):
+    sid: str
+    search: str
+    start_time: float
+    end_time: float
+    results: list[dict[str, Any]]
+    failed: bool = False
+
+    def is_done(self) -> bool:
+        return time.time() >= self.end_time
+
+    def get_content(self) -> dict[str, Any]:
+        done = self.is_done()
+        results = self.results if done and not self.failed else []
+        if not done:
+            dispatch_state = "RUNNING"
+        elif self.failed:
+            dispatch_state = "FAILED"
+        else:
+            dispatch_state = "DONE"
+        return {
+            "sid": self.sid,
+            "search": self.search,
+            "dispatchState": dispatch_state,
+            "isDone": done,
+            "isFailed": done and self.failed,
+            "doneProgress": 1.0 if done else 0.0,
+            "resultCount": len(results),
+            "eventCount": len(results),
+            "scanCount": len(results),
+            "runDuration": round(min(time.time(), self.end_time) - self.start_time, 3),
+        }
+
+
+class SimulatedHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        handle_request: SimulatedRequestHandlerFunc,
+    ):
+        super().__init__(address, SimulatedRequestHandler)
+        self.handle_simulated_request = handle_request
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients close pooled keep-alive connections whenever they like
+        if not isinstance(sys.exception(), ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class SimulatedRequestHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, so that connection pooling by the client behaves as it would
+    # against a real server
+    protocol_version = "HTTP/1.1"
+    server: SimulatedHTTPServer
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks: list[bytes] = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Skip any trailers
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b"".join(chunks)
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        return body
+
+    def handle_any(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        params = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+        try:
+            body = self.read_body()
+        except Exception as e:
+            response = SimulatedResponse(
+                status=400, body=f"Could not read request body: {e!s}".encode("utf-8")
+            )
+        else:
+            response = self.server.handle_simulated_request(
+                self.command, url.path, params, body, self.headers
+            )
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    do_GET = handle_any
+    do_POST = handle_any
+    do_DELETE = handle_any
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class SimulatedSplunkServer(BaseModel):
+    """
+    An in-process stand-in for the REST API and HTTP Event Collector (HEC) of a Splunk server. It
+    implements the endpoints used when testing detections (login, server info, apps, indexes,
+    roles, HEC inputs, search jobs, saved searches, and HEC raw and ack), well enough for
+    splunklib and the detection testing infrastructure to use it as if it were a real server.
+
+    No data is actually indexed or searched: HEC counts the events sent to each index, and search
+    jobs return the results scripted by a SimulatedSplunkScript. Along with scripted latencies and
+    failures, this makes the overhead and the scheduling, retry and replay behaviour of the test
+    harness measurable without a Splunk server. Both servers use plain HTTP.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    script: SimulatedSplunkScript = SimulatedSplunkScript()
+    username: str = "admin"
+    password: str = "password"
+    host: str = "127.0.0.1"
+    _session_key: str = PrivateAttr(default_factory=lambda: uuid.uuid4().hex)
+    _hec_token: str = PrivateAttr(default_factory=lambda: str(uuid.uuid4()))
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # Events sent to each index, as (time they are indexed, number of events)
+    _events: dict[str, list[tuple[float, int]]] = PrivateAttr(default_factory=dict)
+    _hec_inputs: set[str] = PrivateAttr(default_factory=set)
+    _roles: dict[str, dict[str, str]] = PrivateAttr(default_factory=dict)
+    _saved_searches: dict[str, dict[str, str]] = PrivateAttr(default_factory=dict)
+    _jobs: dict[str, SimulatedSearchJob] = PrivateAttr(default_factory=dict)
+    # Time at which the data sent with each ackId is indexed
+    _acks: dict[int, float] = PrivateAttr(default_factory=dict)
+    _ack_ids: itertools.count = PrivateAttr(default_factory=itertools.count)
+    _fault_counts: dict[int, int] = PrivateAttr(default_factory=dict)
+    _api_server: Optional[SimulatedHTTPServer] = PrivateAttr(default=None)
+    _hec_server: Optional[SimulatedHTTPServer] = PrivateAttr(default=None)
+    _threads: list[threading.Thread] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._events = {index: [] for index in self.script.indexes}
+        self._saved_searches = {
+            name: dict(settings)
+            for name, settings in self.script.saved_searches.items()
+        }
+
+    @property
+    def api_port(self) -> int:
+        assert self._api_server is not None
+        return self._api_server.server_address[1]
+
+    @property
+    def hec_port(self) -> int:
+        assert self._hec_server is not None
+        return self._hec_server.server_address[1]
+
+    def start(self) -> None:
+        """
+        Starts serving the REST API and HEC, each on a free port
+        """
+        self._api_server = SimulatedHTTPServer(
+            (self.host, 0), self.get_request_handler(self.handle_api_request)
+        )
+        self._hec_server = SimulatedHTTPServer(
+            (self.host, 0), self.get_request_handler(self.handle_hec_request)
+        )
+        for name, server in [("api", self._api_server), ("hec", self._hec_server)]:
+            thread = threading.Thread(
+                target=server.serve_forever,
+                name=f"simulated_splunk_{name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self) -> None:
+        for server in [self._api_server, self._hec_server]:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def get_request_handler(
+        self,
+        handle_request: SimulatedRequestHandlerFunc,
+    ) -> SimulatedRequestHandlerFunc:
+        """
+        Wraps the handler of a server so that scripted faults are applied to its requests, and
+        any unexpected error is returned as a server error
+        """
+
+        def handle(
+            method: str,
+            path: str,
+            params: dict[str, list[str]],
+            body: bytes,
+            headers: Any,
+        ) -> SimulatedResponse:
+            fault = self.get_fault(f"{method} {path}")
+            if fault is not None:
+                time.sleep(fault.delay_seconds)
+                if fault.status is not None:
+                    return self.error_response(
+                        fault.status, f"Simulated failure of {method} {path}"
+                    )
+            try:
+                return handle_request(method, path, params, body, headers)
+            except Exception as e:
+                return self.error_response(500, f"{type(e).__name__}: {e!s}")
+
+        return handle
+
+    def get_fault(self, request: str) -> Optional[SimulatedFault]:
+        """
+        :param request: '<method> <path>' of a request
+        :returns: the first scripted fault which matches the request and has not been applied
+            as many times as it should be, if any
+        """
+        for index, fault in enumerate(self.script.faults):
+            if re.search(fault.pattern, request) is None:
+                continue
+            with self._lock:
+                applied = self._fault_counts.get(index, 0)
+                if fault.count is not None and applied >= fault.count:
+                    return None
+                self._fault_counts[index] = applied + 1
+            return fault
+        return None
+
+    @staticmethod
+    def error_response(status: int, message: str) -> SimulatedResponse:
+        return SimulatedResponse(
+            status=status,
+            body=(
+                '<?xml version="1.0" encoding="UTF-8"?>\n<response><messages>'
+                f'<msg type="ERROR">{escape(message)}</msg></messages></response>'
+            ).encode("utf-8"),
+        )
+
+    @staticmethod
+    def json_response(value: Any, status: int = 200) -> SimulatedResponse:
+        return SimulatedResponse(
+            status=status,
+            content_type="application/json; charset=utf-8",
+            body=json.dumps(value).encode("utf-8"),
+        )
+
+    @staticmethod
+    def render_value(value: Any) -> str:
+        if isinstance(value, dict):
+            keys = "".join(
+                f"<s:key name={quoteattr(str(key))}>{SimulatedSplunkServer.render_value(item)}</s:key>"
+                for key, item in value.items()
+            )
+            return f"<s:dict>{keys}</s:dict>"
+        if isinstance(value, list):
+            items = "".join(
+                f"<s:item>{SimulatedSplunkServer.render_value(item)}</s:item>"
+                for item in value
+            )
+            return f"<s:list>{items}</s:list>"
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        return escape(str(value))
+
+    def render_entry(
+        self, path: str, name: str, content: dict[str, Any], root: bool = False
+    ) -> str:
+        """
+        Renders an entity in the Atom format returned by the REST API
+        :param path: the path of the collection containing the entity (e.g. 'data/indexes')
+        :param name: the name of the entity
+        :param content: the settings of the entity
+        :param root: whether the entry is the root element of the response, rather than part of a
+            feed
+        """
+        href = f"/servicesNS/nobody/search/{path}/{urllib.parse.quote(name, safe='')}"
+        namespaces = f" {ATOM_NAMESPACES}" if root else ""
+        content = {
+            **content,
+            "eai:acl": {"app": "search", "owner": "nobody", "sharing": "global"},
+        }
+        return (
+            f"<entry{namespaces}><title>{escape(name)}</title>"
+            f"<id>{escape(href)}</id>"
+            f'<link href={quoteattr(href)} rel="alternate"/>'
+            f'<content type="text/xml">{self.render_value(content)}</content></entry>'
+        )
+
+    def feed_response(
+        self, path: str, entries: dict[str, dict[str, Any]], status: int = 200
+    ) -> SimulatedResponse:
+        """
+        :param path: the path of the collection (e.g. 'data/indexes')
+        :param entries: the content of each entity in the response, keyed by name
+        """
+        rendered = "".join(
+            self.render_entry(path, name, content) for name, content in entries.items()
+        )
+        return SimulatedResponse(
+            status=status,
+            body=(
+                f'<?xml version="1.0" encoding="UTF-8"?>\n<feed {ATOM_NAMESPACES}>'
+                f"<title>{escape(path)}</title>"
+                f"<opensearch:totalResults>{len(entries)}</opensearch:totalResults>"
+                f"{rendered}</feed>"
+            ).encode("utf-8"),
+        )
+
+    @staticmethod
+    def get_param(params: dict[str, list[str]], name: str, default: str = "") -> str:
+        values = params.get(name)
+        return values[-1] if values else default
+
+    def handle_api_request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, list[str]],
+        body: bytes,
+        headers: Any,
+    ) -> SimulatedResponse:
+        # Each segment is unquoted after splitting, since names may contain encoded slashes
+        segments = [
+            urllib.parse.unquote(segment) for segment in path.strip("/").split("/")
+        ]
+        if segments[0] == "services":
+            segments = segments[1:]
+        elif segments[0] == "servicesNS" and len(segments) >= 3:
+            segments = segments[3:]
+        else:
+            return self.error_response(404, f"Unknown endpoint {path}")
+
+        if body and "json" not in headers.get("Content-Type", ""):
+            for name, values in urllib.parse.parse_qs(
+                body.decode("utf-8"), keep_blank_values=True
+            ).items():
+                params.setdefault(name, []).extend(values)
+
+        if segments == ["auth", "login"] and method == "POST":
+            if (
+                self.get_param(params, "username") != self.username
+                or self.get_param(params, "password") != self.password
+            ):
+                return self.error_response(401, "Login failed")
+            return SimulatedResponse(
+                body=(
+                    f"<response><sessionKey>{self._session_key}</sessionKey></response>"
+                ).encode("utf-8")
+            )
+        if headers.get("Authorization") != f"Splunk {self._session_key}":
+            return self.error_response(401, "call not properly authenticated")
+
+        match segments:
+            case ["messages"]:
+                return self.feed_response("messages", {})
+            case ["server", "info"]:
+                return self.feed_response(
+                    "server/info",
+                    {"server-info": {"version": self.script.splunk_version}},
+                )
+            case ["apps", "local"]:
+                return self.feed_response(
+                    "apps/local",
+                    {
+                        name: {"version": version}
+                        for name, version in self.script.apps.items()
+                    },
+                )
+            case ["apps", "local", name]:
+                if name not in self.script.apps:
+                    return self.error_response(404, f"Could not find app {name}")
+                return self.feed_response(
+                    "apps/local", {name: {"version": self.script.apps[name]}}
+                )
+            case ["configs", conf_file, *_]:
+                return self.feed_response(f"configs/{conf_file}", {})
+            case ["properties", *_]:
+                return SimulatedResponse()
+            case ["data", "indexes", *rest]:
+                return self.handle_indexes_request(method, rest, params)
+            case ["authorization", "roles", name]:
+                with self._lock:
+                    role = self._roles.setdefault(name, {})
+                    if method == "POST":
+                        role.update(
+                            {key: self.get_param(params, key) for key in params}
+                        )
+                    return self.feed_response("authorization/roles", {name: dict(role)})
+            case ["data", "inputs", "http", *rest]:
+                return self.handle_hec_inputs_request(method, rest, params)
+            case ["search", "v2", "jobs", *rest] | ["search", "jobs", *rest]:
+                return self.handle_jobs_request(method, rest, params)
+            case ["saved", "searches", name, *rest]:
+                return self.handle_saved_search_request(method, name, rest, params)
+        return self.error_response(404, f"Unknown endpoint {path}")
+
+    def handle_indexes_request(
+        self, method: str, rest: list[str], params: dict[str, list[str]]
+    ) -> SimulatedResponse:
+        with self._lock:
+            if len(rest) == 0 and method == "POST":
+                name = self.get_param(params, "name")
+                if name in self._events:
+                    return self.error_response(409, f"Index name={name} already exists")
+                self._events[name] = []
+                return self.feed_response("data/indexes", {name: {}}, status=201)
+            if len(rest) == 0:
+                return self.feed_response(
+                    "data/indexes",
+                    {name: {"totalEventCount": 0} for name in self._events},
+                )
+            name = rest[0]
+            if name not in self._events:
+                return self.error_response(404, f"Could not find index {name}")
+            if method == "DELETE":
+                del self._events[name]
+                return SimulatedResponse()
+            return self.feed_response("data/indexes", {name: {}})
+
+    def handle_hec_inputs_request(
+        self, method: str, rest: list[str], params: dict[str, list[str]]
+    ) -> SimulatedResponse:
+        with self._lock:
+            if len(rest) == 0 and method == "POST":
+                name = self.get_param(params, "name")
+                self._hec_inputs.add(name)
+            elif len(rest) == 0:
+                return self.feed_response(
+                    "data/inputs/http",
+                    {name: {"token": self._hec_token} for name in self._hec_inputs},
+                )
+            else:
+                # Inputs are addressed as both 'http://<name>' and '<name>', and the former may
+                # have been encoded twice
+                name = urllib.parse.unquote(rest[0]).removeprefix("http://")
+                if name not in self._hec_inputs:
+                    return self.error_response(404, f"Could not find input {name}")
+            return self.feed_response(
+                "data/inputs/http", {f"http://{name}": {"token": self._hec_token}}
+            )
+
+    def handle_jobs_request(
+        self, method: str, rest: list[str], params: dict[str, list[str]]
+    ) -> SimulatedResponse:
+        if len(rest) == 0 and method == "POST":
+            job = self.create_job(self.get_param(params, "search"))
+            if self.get_param(params, "exec_mode") in ("blocking", "oneshot"):
+                time.sleep(max(0.0, job.end_time - time.time()))
+            return self.sid_response(job.sid, self.get_param(params, "output_mode"))
+        if len(rest) == 0:
+            with self._lock:
+                jobs = list(self._jobs.values())
+            # Only the filter on job ids used by the test harness is supported
+            sids = set(re.findall(r'sid="([^"]+)"', self.get_param(params, "search")))
+            if len(sids) > 0:
+                jobs = [job for job in jobs if job.sid in sids]
+            if self.get_param(params, "output_mode") == "json":
+                return self.json_response(
+                    {
+                        "entry": [
+                            {"name": job.sid, "content": job.get_content()}
+                            for job in jobs
+                        ]
+                    }
+                )
+            return self.feed_response(
+                "search/jobs", {job.sid: job.get_content() for job in jobs}
+            )
+
+        with self._lock:
+            job = self._jobs.get(rest[0])
+        if job is None:
+            return self.error_response(404, f"Unknown sid {rest[0]}")
+        if len(rest) == 1 and method == "DELETE":
+            with self._lock:
+                self._jobs.pop(job.sid, None)
+            return SimulatedResponse()
+        if len(rest) == 1 and self.get_param(params, "output_mode") == "json":
+            return self.json_response(
+                {"entry": [{"name": job.sid, "content": job.get_content()}]}
+            )
+        if len(rest) == 1:
+            return SimulatedResponse(
+                body=self.render_entry(
+                    "search/jobs", job.sid, job.get_content(), root=True
+                ).encode("utf-8")
+            )
+        if rest[1] == "results":
+            # Results are only available in JSON, which is all the test harness requests
+            results = job.results if job.is_done() and not job.failed else []
+            return self.json_response(
+                {
+                    "preview": False,
+                    "init_offset": 0,
+                    "messages": [],
+                    "fields": sorted({key for result in results for key in result}),
+                    "results": results,
+                }
+            )
+        if rest[1] == "control":
+            return SimulatedResponse()
+        return self.error_response(404, f"Unknown endpoint for job {job.sid}")
+
+    def handle_saved_search_request(
+        self, method: str, name: str, rest: list[str], params: dict[str, list[str]]
+    ) -> SimulatedResponse:
+        with self._lock:
+            saved_search = self._saved_searches.get(name)
+            if saved_search is None:
+                return self.error_response(404, f"Could not find saved search {name}")
+            if len(rest) == 0 and method == "POST":
+                saved_search.update(
+                    {
+                        key: self.get_param(params, key)
+                        for key in params
+                        if key != "output_mode"
+                    }
+                )
+            elif rest in (["enable"], ["disable"]):
+                saved_search["disabled"] = "1" if rest[0] == "disable" else "0"
+            elif rest == ["dispatch"]:
+                search = saved_search.get("search", "")
+            elif len(rest) > 0:
+                return self.error_response(404, f"Unknown endpoint for {name}")
+            content = dict(saved_search)
+
+        if rest == ["dispatch"]:
+            job = self.create_job(search)
+            return self.sid_response(job.sid, self.get_param(params, "output_mode"))
+        return self.feed_response("saved/searches", {name: content})
+
+    @staticmethod
+    def sid_response(sid: str, output_mode: str) -> SimulatedResponse:
+        if output_mode == "json":
+            return SimulatedSplunkServer.json_response({"sid": sid}, status=201)
+        return SimulatedResponse(
+            status=201,
+            body=f"<response><sid>{escape(sid)}</sid></response>".encode("utf-8"),
+        )
+
+    def get_searched_indexes(self, search: str) -> list[str]:
+        """
+        :returns: the existing indexes named in a search, or every index if it names none
+        """
+        with self._lock:
+            indexes = list(self._events)
+        patterns = INDEX_TERM_PATTERN.findall(search)
+        if len(patterns) == 0:
+            return indexes
+        return [
+            index
+            for index in indexes
+            if any(fnmatch.fnmatchcase(index, pattern) for pattern in patterns)
+        ]
+
+    def create_job(self, search: str) -> SimulatedSearchJob:
+        """
+        Starts a search job for a search, using the first scripted search which matches it. Events
+        are deleted, and the default results are counted, when the job is created.
+        """
+        simulated_search = next(
+            (
+                simulated_search
+                for simulated_search in self.script.searches
+                if re.search(simulated_search.pattern, search) is not None
+            ),
+            None,
+        )
+        latency = self.script.search_latency_seconds
+        if (
+            simulated_search is not None
+            and simulated_search.latency_seconds is not None
+        ):
+            latency = simulated_search.latency_seconds
+
+        indexes = self.get_searched_indexes(search)
+        now = time.time()
+        with self._lock:
+            counts = {
+                index: sum(
+                    count
+                    for indexed_time, count in self._events.get(index, [])
+                    if indexed_time <= now
+                )
+                for index in indexes
+            }
+            if re.search(r"\|\s*delete\b", search) is not None:
+                for index in indexes:
+                    self._events[index] = [
+                        (indexed_time, count)
+                        for indexed_time, count in self._events.get(index, [])
+                        if indexed_time > now
+                    ]
+                results: list[dict[str, Any]] = [
+                    {
+                        "index": "__ALL__",
+                        "deleted": str(sum(counts.values())),
+                        "errors": "0",
+                    }
+                ] + [
+                    {"index": index, "deleted": str(count), "errors": "0"}
+                    for index, count in counts.items()
+                ]
+            elif sum(counts.values()) > 0:
+                results = [{"count": str(sum(counts.values()))}]
+            else:
+                results = []
+
+            if simulated_search is not None and simulated_search.results is not None:
+                results = simulated_search.results
+            job = SimulatedSearchJob(
+                sid=f"simulated_{uuid.uuid4().hex}",
+                search=search,
+                start_time=now,
+                end_time=now + latency,
+                results=results,
+                failed=simulated_search is not None and simulated_search.fail,
+            )
+            self._jobs[job.sid] = job
+        return job
+
+    def handle_hec_request(
+        self,
+        method: str,
+        path: str,
+        params: dict[str, list[str]],
+        body: bytes,
+        headers: Any,
+    ) -> SimulatedResponse:
+        if headers.get("Authorization") != f"Splunk {self._hec_token}":
+            return self.json_response({"text": "Invalid token", "code": 4}, status=403)
+        channel = headers.get("X-Splunk-Request-Channel") or self.get_param(
+            params, "channel"
+        )
+        if not channel:
+            return self.json_response(
+                {"text": "Data channel is missing", "code": 10}, status=400
+            )
+
+        if path.rstrip("/") == "/services/collector/raw" and method == "POST":
+            index = self.get_param(params, "index", "main")
+            events = sum(1 for line in body.splitlines() if line.strip())
+            indexed_time = time.time() + self.script.hec_ack_latency_seconds
+            with self._lock:
+                if index not in self._events:
+                    return self.json_response(
+                        {
+                            "text": "Incorrect index",
+                            "code": 7,
+                            "invalid-event-number": 1,
+                        },
+                        status=400,
+                    )
+                self._events[index].append((indexed_time, events))
+                ack_id = next(self._ack_ids)
+                self._acks[ack_id] = indexed_time
+            return self.json_response({"text": "Success", "code": 0, "ackId": ack_id})
+
+        if path.rstrip("/") == "/services/collector/ack" and method == "POST":
+            try:
+                ack_ids = [int(ack_id) for ack_id in json.loads(body)["acks"]]
+            except Exception:
+                return self.json_response(
+                    {"text": "Invalid data format", "code": 6}, 400
+                )
+            now = time.time()
+            with self._lock:
+                acks = {
+                    str(ack_id): ack_id in self._acks and self._acks[ack_id] <= now
+                    for ack_id in ack_ids
+                }
+            return self.json_response({"acks": acks})
+
+        return self.json_response(
+            {"text": "The requested URL was not found on this server.", "code": 404},
+            404,
+        )
@@ -0,0 +1,120 @@
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Optional
+
+import requests  # type: ignore
+import splunklib.client as client  # type: ignore
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+from splunklib.binding import ResponseReader  # type: ignore
+
+
+class SplunkConnectionPool(BaseModel):
+    """
+    Shares authenticated REST API connections to a single Splunk server between the threads of a
+    test instance. Each thread gets its own splunklib Service, since a Service is not safe to use
+    from several threads at once, but every Service sends its requests through one requests
+    Session, so TCP and TLS connections are kept alive and reused rather than opened for each
+    request. Services log in again by themselves when their session expires.
+
+    :param max_connections: the number of connections kept open to the server, which should be at
+        least the number of threads using the pool
+    :param record_latency: called with the endpoint (method and normalized path) and duration, in
+        seconds, of every request
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    max_connections: int
+    record_latency: Callable[[str, float], None]
+    _session: requests.Session = PrivateAttr()
+    _local: threading.local = PrivateAttr(default_factory=threading.local)
+    # Incremented to discard the Services of every thread, such as after the server restarts
+    _generation: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: object) -> None:
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_connections
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def get_service(self) -> Optional[client.Service]:
+        """
+        :returns: the Service of the current thread, or None if it does not have one yet
+        """
+        if getattr(self._local, "generation", None) != self._generation:
+            return None
+        return self._local.service
+
+    def set_service(self, service: client.Service) -> None:
+        """
+        :param service: the Service of the current thread, which should have been connected with
+            this pool's handler
+        """
+        self._local.service = service
+        self._local.generation = self._generation
+
+    def reset(self) -> None:
+        """
+        Discard the Service of every thread, so that each one connects again the next time it
+        needs a Service
+        """
+        self._generation += 1
+
+    @staticmethod
+    def get_endpoint(method: str, url: str) -> str:
+        """
+        Get the endpoint a request was made to, for reporting. The namespace and query are removed
+        from the URL, and any path segment after the second which names an object (such as the sid
+        of a search job or the name of an index) is replaced by '*'.
+        :param method: the HTTP method
+        :param url: the URL
+        :returns: the endpoint, such as 'GET search/jobs/*/results'
+        """
+        # Paths begin with /services/ or /servicesNS/<user>/<app>/
+        segments = [s for s in urllib.parse.urlsplit(url).path.split("/") if s]
+        if len(segments) > 0 and segments[0] == "servicesNS":
+            segments = segments[3:]
+        elif len(segments) > 0 and segments[0] == "services":
+            segments = segments[1:]
+        if len(segments) > 2:
+            segments[2] = "*"
+        return f"{method} {'/'.join(segments)}"
+
+    def handler(self, url: str, message: dict[str, Any], **kwargs: Any) -> dict:
+        """
+        The HTTP request handler given to splunklib. It has the same interface as
+        splunklib.binding.handler, but sends requests through the pool's Session.
+        :param url: the URL
+        :param message: the method, headers and body of the request
+        :returns: the status, reason, headers and body of the response
+        """
+        method = message.get("method", "GET")
+        start_time = time.time()
+        try:
+            # The response is streamed, since search results can be large; its connection is
+            # returned to the pool once the body has been read
+            response = self._session.request(
+                method,
+                url,
+                headers=dict(message.get("headers", [])),
+                data=message.get("body") or None,
+                verify=False,
+                stream=True,
+            )
+        finally:
+            self.record_latency(
+                self.get_endpoint(method, url), time.time() - start_time
+            )
+        response.raw.decode_content = True
+        return {
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": list(response.headers.items()),
+            "body": ResponseReader(response.raw),
+        }
+
+    def close(self) -> None:
+        self.reset()
+        self._session.close()
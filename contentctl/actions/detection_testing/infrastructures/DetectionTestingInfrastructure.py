@@ -1,16 +1,20 @@
 import abc
+import concurrent.futures
 import configparser
 import datetime
 import json
 import os.path
 import pathlib
+import threading
 import time
 import urllib.parse
 import uuid
+import zlib
+from contextlib import contextmanager
 from ssl import SSLEOFError, SSLZeroReturnError
 from sys import stdout
 from tempfile import TemporaryDirectory, mktemp
-from typing import Callable, Optional, Union
+from typing import Annotated, Callable, Iterator, Optional, Union
 
 import requests  # type: ignore
 import splunklib.client as client  # type: ignore
@@ -19,27 +23,58 @@ from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    GetPydanticSchema,
     PrivateAttr,
     computed_field,
     dataclasses,
 )
+from pydantic_core import core_schema
 from semantic_version import Version
 from splunklib.binding import HTTPError  # type: ignore
+from splunklib.data import Record  # type: ignore
 from splunklib.results import JSONResultsReader, Message  # type: ignore
 from urllib3 import disable_warnings
 
+from contentctl.actions.detection_testing.AttackDataCache import AttackDataCache
+from contentctl.actions.detection_testing.DetectionTestingAutoscaler import (
+    HostResourceUsage,
+)
+from contentctl.actions.detection_testing.DetectionTestingHistory import (
+    DetectionTestingHistory,
+    DetectionTestingPhase,
+)
+from contentctl.actions.detection_testing.DetectionTestingScheduler import (
+    AttackDataKey,
+)
+from contentctl.actions.detection_testing.DetectionTestingTracer import (
+    DetectionTestingTracer,
+    TraceSpan,
+)
+from contentctl.actions.detection_testing.EphemeralIndexReaper import (
+    EphemeralIndexReaper,
+)
+from contentctl.actions.detection_testing.HecAckTracker import HecAckTracker
 from contentctl.actions.detection_testing.progress_bar import (
     FinalTestingStates,
     TestingStates,
     TestReportingType,
     format_pbar_string,
 )
+from contentctl.actions.detection_testing.SearchJobPoller import SearchJobPoller
+from contentctl.actions.detection_testing.SplunkConnectionPool import (
+    SplunkConnectionPool,
+)
 from contentctl.helper.utils import Utils
 from contentctl.objects.base_test import BaseTest
 from contentctl.objects.base_test_result import TestResultStatus
 from contentctl.objects.config import All, Infrastructure, test_common
 from contentctl.objects.content_versioning_service import ContentVersioningService
-from contentctl.objects.correlation_search import CorrelationSearch, PbarData
+from contentctl.objects.correlation_search import (
+    CorrelationSearch,
+    CorrelationSearchBatch,
+    CorrelationSearchJanitor,
+    PbarData,
+)
 from contentctl.objects.detection import Detection
 from contentctl.objects.enums import AnalyticsType, PostTestBehavior
 from contentctl.objects.integration_test import IntegrationTest
@@ -52,10 +87,28 @@ from contentctl.objects.unit_test_result import UnitTestResult
 # The app name of ES; needed to check ES version
 ES_APP_NAME = "SplunkEnterpriseSecuritySuite"
 
+# Size of each block of attack data read from disk and sent to HEC
+HEC_REPLAY_BLOCK_SIZE = 1024 * 1024
+
+# Bounds on the delay between checks of whether replayed attack data is searchable. The delay
+# starts at the minimum and grows each time the data is found not to be ready.
+INDEX_READINESS_MIN_POLL_SECONDS = 0.25
+INDEX_READINESS_MAX_POLL_SECONDS = 4.0
+# How long to wait for replayed attack data to become searchable before giving up and leaving it
+# to the retries of the search itself. Data which is rerouted or dropped while being indexed is
+# never counted, so this is kept short compared to the search timeout.
+INDEX_READINESS_MAX_WAIT_SECONDS = 20
+
+# Prefix of the fields produced by the stats command appended to a detection's search when its
+# results are validated inside Splunk
+AGGREGATE_VALIDATION_FIELD_PREFIX = "contentctl_"
+
 
 class SetupTestGroupResults(BaseModel):
     exception: Union[Exception, None] = None
     success: bool = True
+    # True if the replayed attack data was confirmed to be searchable
+    attack_data_searchable: bool = False
     duration: float = 0
     start_time: float
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -91,9 +144,16 @@ class ReplayIndexDoesNotExistOnServer(Exception):
     pass
 
 
-@dataclasses.dataclass(frozen=False)
+@dataclasses.dataclass(frozen=False, config=ConfigDict(arbitrary_types_allowed=True))
 class DetectionTestingManagerOutputDto:
     inputQueue: list[Detection] = Field(default_factory=list)
+    # Every instance takes work from the inputQueue, so it must be locked when doing so.
+    # threading.Lock is a factory function rather than a type, so pydantic cannot build a
+    # schema for it and must accept any value instead
+    inputQueueLock: Annotated[
+        threading.Lock,
+        GetPydanticSchema(lambda _source, _handler: core_schema.any_schema()),
+    ] = Field(default_factory=threading.Lock)
     outputQueue: list[Detection] = Field(default_factory=list)
     currentTestingQueue: dict[str, Union[Detection, None]] = Field(default_factory=dict)
     start_time: Union[datetime.datetime, None] = None
@@ -101,6 +161,33 @@ class DetectionTestingManagerOutputDto:
     replay_host: str = "CONTENTCTL_HOST"
     timeout_seconds: int = 120
     terminate: bool = False
+    # Durations of previous test runs, if a history is being kept
+    history: Optional[DetectionTestingHistory] = None
+    # The expected and actual time, in seconds, to test each detection, keyed by name
+    expectedDurations: dict[str, float] = Field(default_factory=dict)
+    actualDurations: dict[str, float] = Field(default_factory=dict)
+    # Persistent cache of attack data downloaded over HTTP, if enabled
+    attackDataCache: Optional[AttackDataCache] = None
+    # Records what each instance spends its time on, if tracing is enabled
+    tracer: Optional[DetectionTestingTracer] = None
+    # Detections which share their attack data with other detections, keyed by name. All of
+    # the detections in a batch are tested against a single replay of that attack data.
+    attackDataBatchKeys: dict[str, AttackDataKey] = Field(default_factory=dict)
+    # Time, in seconds, from sending attack data to HEC until it was acknowledged as indexed
+    hecAckLatencies: list[float] = Field(default_factory=list)
+    # Time, in seconds, taken by each request to the REST API of any instance, keyed by endpoint
+    restRequestLatencies: dict[str, list[float]] = Field(default_factory=dict)
+    # When each instance started and finished testing, and when it finished testing each of its
+    # detections (as returned by time.time()), keyed by instance name
+    instanceStartTimes: dict[str, float] = Field(default_factory=dict)
+    instanceEndTimes: dict[str, float] = Field(default_factory=dict)
+    instanceCompletionTimes: dict[str, list[float]] = Field(default_factory=dict)
+    # Names of the detections whose results were reused from a previous test run
+    cachedDetections: set[str] = Field(default_factory=set)
+    # The most recent sample of the resource usage of the host running the tests
+    hostResourceUsage: Optional[HostResourceUsage] = None
+    # How many detections were selected by mode, across every shard, if the test run is sharded
+    unshardedDetectionCount: Optional[int] = None
 
 
 class DetectionTestingInfrastructure(BaseModel, abc.ABC):
@@ -111,13 +198,41 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
     hec_token: str = ""
     hec_channel: str = ""
     all_indexes_on_server: list[str] = []
-    _conn: client.Service = PrivateAttr()
+    _connection_pool: SplunkConnectionPool = PrivateAttr()
     pbar: tqdm.tqdm = None
     start_time: Optional[float] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
+    # State of the test group slot running on the current thread: its number, the ephemeral index
+    # its current test group replays into (if any), and the time spent in each phase of testing
+    # its current detection
+    _slot_state: threading.local = PrivateAttr(default_factory=threading.local)
+    _search_job_poller: Optional[SearchJobPoller] = PrivateAttr(default=None)
+    _hec_session: Optional[requests.Session] = PrivateAttr(default=None)
+    # Guards the lazy creation of the HEC session, HEC ack tracker, search job poller, and
+    # correlation search batch and janitor, all of which are shared by every slot on the instance
+    _client_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    # Every slot on the instance shares the progress bar, so resetting and updating it is locked
+    _pbar_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _hec_ack_tracker: Optional[HecAckTracker] = PrivateAttr(default=None)
+    _index_reaper: Optional[EphemeralIndexReaper] = PrivateAttr(default=None)
+    _correlation_search_batch: Optional[CorrelationSearchBatch] = PrivateAttr(
+        default=None
+    )
+    _correlation_search_janitor: Optional[CorrelationSearchJanitor] = PrivateAttr(
+        default=None
+    )
+    # Cleared if the server rejects gzip compressed data
+    _hec_gzip_supported: bool = PrivateAttr(default=True)
 
     def __init__(self, **data):
         super().__init__(**data)
+        self._hec_gzip_supported = self.global_config.hec_replay_compression
+        # Every slot, plus the threads of the search job poller, correlation search batch and
+        # janitor, and ephemeral index reaper, may use a connection at the same time
+        self._connection_pool = SplunkConnectionPool(
+            max_connections=self.global_config.concurrent_test_groups_per_instance + 4,
+            record_latency=self.record_rest_request_latency,
+        )
 
     # TODO: why not use @abstractmethod
     def start(self):
@@ -135,6 +250,172 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             )
         )
 
+    def get_scheme(self) -> str:
+        """
+        :returns: the scheme used to connect to the REST API and HEC of the instance
+        """
+        return "https"
+
+    @property
+    def phase_durations(self) -> dict[DetectionTestingPhase, float]:
+        """
+        Time spent in each phase of testing the detection currently being tested by this thread
+        """
+        if not hasattr(self._slot_state, "phase_durations"):
+            self._slot_state.phase_durations = {}
+        return self._slot_state.phase_durations
+
+    @phase_durations.setter
+    def phase_durations(self, value: dict[DetectionTestingPhase, float]) -> None:
+        self._slot_state.phase_durations = value
+
+    def get_slot(self) -> int:
+        """
+        Each instance may test several test groups at the same time, each in its own thread (or
+        slot). Slot 0 always exists.
+        :returns: the slot that the current thread is running
+        """
+        return getattr(self._slot_state, "slot", 0)
+
+    def get_slot_name(self) -> str:
+        if self.get_slot() == 0:
+            return self.get_name()
+        return f"{self.get_name()}_{self.get_slot()}"
+
+    def get_replay_host(self) -> str:
+        """
+        Each slot replays attack data under its own host, so that when one slot deletes the data
+        it replayed, data replayed by the other slots is left in place
+        :returns: the default host for attack data replayed by the current thread
+        """
+        if self.get_slot() == 0:
+            return self.sync_obj.replay_host
+        return f"{self.sync_obj.replay_host}_{self.get_slot()}"
+
+    def get_replay_index(self) -> str:
+        """
+        :returns: the index that attack data without a custom_index is replayed into by the
+            current thread; either the ephemeral index of its test group or the replay_index
+        """
+        return (
+            getattr(self._slot_state, "replay_index", None)
+            or self.sync_obj.replay_index
+        )
+
+    def get_ephemeral_index_pattern(self) -> str:
+        return f"{self.sync_obj.replay_index}_*"
+
+    def create_ephemeral_index(self) -> None:
+        """
+        Creates a new index for the test group about to be set up by the current thread. Attack
+        data without a custom_index is replayed into it, and it is removed during cleanup.
+        """
+        index_name = f"{self.sync_obj.replay_index}_{uuid.uuid4().hex[:12]}"
+        try:
+            self.get_conn().indexes.create(name=index_name)
+        except Exception as e:
+            raise Exception(f"Error creating ephemeral index {index_name} - {e!s}")
+        self._slot_state.replay_index = index_name
+
+    def remove_ephemeral_index(self) -> None:
+        """
+        Schedules the ephemeral index of the current thread's test group for removal in the
+        background
+        """
+        index_name = getattr(self._slot_state, "replay_index", None)
+        if index_name is None:
+            return
+        self._slot_state.replay_index = None
+        with self._client_lock:
+            if self._index_reaper is None:
+                self._index_reaper = EphemeralIndexReaper(
+                    remove_index=lambda name: self.get_conn().indexes.delete(name),
+                    report_error=self.pbar.write,
+                )
+        self._index_reaper.remove(index_name)
+
+    def get_history_key(self) -> str:
+        """
+        Identifies the infrastructure in the test duration history, so that durations measured
+        on one server are preferred when estimating durations on the same server
+        :returns: the key
+        """
+        return f"{type(self.infrastructure).__name__}:{self.infrastructure.instance_address}:{self.infrastructure.api_port}"
+
+    def get_environment_key(self) -> str:
+        """
+        Identifies the infrastructure in the test result cache, so that results are only reused
+        on the same server
+        :returns: the key
+        """
+        return self.get_history_key()
+
+    @contextmanager
+    def time_phase(self, phase: DetectionTestingPhase) -> Iterator[None]:
+        """
+        Adds the time spent inside the context to the total for the given phase of testing the
+        current detection, even if an exception is raised
+        :param phase: the phase of testing
+        """
+        phase_start_time = time.time()
+        try:
+            with self.trace_span(str(phase), "phase"):
+                yield
+        finally:
+            self.phase_durations[phase] = self.phase_durations.get(phase, 0.0) + (
+                time.time() - phase_start_time
+            )
+
+    @contextmanager
+    def trace_span(self, name: str, category: str, **args: str) -> Iterator[None]:
+        """
+        Records the time spent inside the context as a span of the current thread's slot, if
+        tracing is enabled, even if an exception is raised
+        :param name: what is being done
+        :param category: the kind of span
+        :param args: details shown with the span
+        """
+        if self.sync_obj.tracer is None:
+            yield
+            return
+        span_start_time = time.time()
+        try:
+            yield
+        finally:
+            self.sync_obj.tracer.add_span(
+                TraceSpan(
+                    name=name,
+                    category=category,
+                    instance=self.get_name(),
+                    slot=self.get_slot(),
+                    start_time=span_start_time,
+                    end_time=time.time(),
+                    args=args,
+                )
+            )
+
+    def record_detection_duration(self, detection: Detection, duration: float) -> None:
+        """
+        Records how long a detection took to test, both for the ETA and in the test duration
+        history (if one is being kept). Failing to write to the history is not a test failure.
+        :param detection: the detection which was tested
+        :param duration: the time, in seconds, it took to test the detection
+        """
+        self.sync_obj.actualDurations[detection.name] = duration
+        self.sync_obj.instanceCompletionTimes.setdefault(self.get_name(), []).append(
+            time.time()
+        )
+        if self.sync_obj.history is None:
+            return
+        try:
+            self.sync_obj.history.record_detection(
+                detection, self.get_history_key(), duration, self.phase_durations
+            )
+        except Exception as e:
+            self.pbar.write(
+                f"Warning - failed to record test duration of [{detection.name}]: {e!s}"
+            )
+
     def setup(self):
         self.pbar = tqdm.tqdm(
             total=100,
@@ -148,20 +429,7 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         self.start_time = time.time()
 
         # Init the list of setup functions we always need
-        primary_setup_functions: list[
-            tuple[Callable[[], None | client.Service], str]
-        ] = [
-            (self.start, "Starting"),
-            (self.get_conn, "Waiting for App Installation"),
-            (self.configure_conf_file_datamodels, "Configuring Datamodels"),
-            (self.create_replay_index, f"Create index '{self.sync_obj.replay_index}'"),
-            (self.get_all_indexes, "Getting all indexes from server"),
-            (self.check_for_es_install, "Checking for ES Install"),
-            (self.configure_imported_roles, "Configuring Roles"),
-            (self.configure_delete_indexes, "Configuring Indexes"),
-            (self.configure_hec, "Configuring HEC"),
-            (self.wait_for_ui_ready, "Finishing Primary Setup"),
-        ]
+        primary_setup_functions = self.get_primary_setup_functions()
 
         # Execute and report on each setup function
         try:
@@ -173,7 +441,8 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     msg,
                     update_sync_status=True,
                 )
-                func()
+                with self.trace_span(msg, "setup"):
+                    func()
                 self.check_for_teardown()
 
             # Run any setup functions only applicable to content versioning validation
@@ -193,7 +462,8 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                         msg,
                         update_sync_status=True,
                     )
-                    func()
+                    with self.trace_span(msg, "setup"):
+                        func()
                     self.check_for_teardown()
 
         except Exception as e:
@@ -212,6 +482,26 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             )
         )
 
+    def get_primary_setup_functions(
+        self,
+    ) -> list[tuple[Callable[[], None | client.Service], str]]:
+        """
+        The setup functions run, in order, to prepare an instance for testing, along with the
+        message displayed while each one runs
+        """
+        return [
+            (self.start, "Starting"),
+            (self.get_conn, "Waiting for App Installation"),
+            (self.configure_conf_file_datamodels, "Configuring Datamodels"),
+            (self.create_replay_index, f"Create index '{self.sync_obj.replay_index}'"),
+            (self.get_all_indexes, "Getting all indexes from server"),
+            (self.check_for_es_install, "Checking for ES Install"),
+            (self.configure_imported_roles, "Configuring Roles"),
+            (self.configure_delete_indexes, "Configuring Indexes"),
+            (self.configure_hec, "Configuring HEC"),
+            (self.wait_for_ui_ready, "Finishing Primary Setup"),
+        ]
+
     def wait_for_ui_ready(self):
         self.get_conn()
 
@@ -297,14 +587,19 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             pass
 
         try:
+            hec_kwargs = {}
+            # Ephemeral indexes are created after HEC is configured, so when they are used the
+            # token is not restricted to the indexes which exist now
+            if not self.global_config.ephemeral_replay_indexes:
+                hec_kwargs["indexes"] = ",".join(
+                    self.all_indexes_on_server
+                )  # This allows the HEC to write to all indexes
             res = self.get_conn().inputs.create(
                 name="DETECTION_TESTING_HEC",
                 kind="http",
                 index=self.sync_obj.replay_index,
-                indexes=",".join(
-                    self.all_indexes_on_server
-                ),  # This allows the HEC to write to all indexes
                 useACK=True,
+                **hec_kwargs,
             )
             self.hec_token = str(res.token)
             return
@@ -330,17 +625,28 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             raise (Exception(f"Failure getting indexes: {e!s}"))
 
     def get_conn(self) -> client.Service:
+        """
+        Get the connection to the REST API of the current thread. Each thread has its own
+        connection, but they share a pool of HTTP connections to the server.
+        """
         try:
-            if not self._conn:
+            conn = self._connection_pool.get_service()
+            if conn is None:
                 self.connect_to_api()
-            elif self._conn.restart_required:
+            elif conn.restart_required:
                 # continue trying to re-establish a connection until after
                 # the server has restarted
+                self._connection_pool.reset()
                 self.connect_to_api()
         except Exception:
             # there was some issue getting the connection. Try again just once
             self.connect_to_api()
-        return self._conn
+        conn = self._connection_pool.get_service()
+        assert conn is not None
+        return conn
+
+    def record_rest_request_latency(self, endpoint: str, latency: float) -> None:
+        self.sync_obj.restRequestLatencies.setdefault(endpoint, []).append(latency)
 
     def check_for_teardown(self):
         # Make sure we can easily quit during setup if we need to.
@@ -358,6 +664,9 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     port=self.infrastructure.api_port,
                     username=self.infrastructure.splunk_app_username,
                     password=self.infrastructure.splunk_app_password,
+                    scheme=self.get_scheme(),
+                    handler=self._connection_pool.handler,
+                    autologin=True,
                 )
 
                 if conn.restart_required:
@@ -369,7 +678,7 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     )
                 else:
                     # Finished setup
-                    self._conn = conn
+                    self._connection_pool.set_service(conn)
                     return
 
             except ConnectionRefusedError as e:
@@ -417,12 +726,19 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         else:
             roles = imported_roles
 
+        search_indexes_allowed = list(self.all_indexes_on_server)
+        search_indexes_default = [self.sync_obj.replay_index]
+        if self.global_config.ephemeral_replay_indexes:
+            # Detections which do not specify an index must still find data in ephemeral indexes
+            search_indexes_allowed.append(self.get_ephemeral_index_pattern())
+            search_indexes_default.append(self.get_ephemeral_index_pattern())
+
         try:
             self.get_conn().roles.post(
                 self.infrastructure.splunk_app_username,
                 imported_roles=roles,
-                srchIndexesAllowed=";".join(self.all_indexes_on_server),
-                srchIndexesDefault=self.sync_obj.replay_index,
+                srchIndexesAllowed=";".join(search_indexes_allowed),
+                srchIndexesDefault=";".join(search_indexes_default),
             )
             return
         except Exception as e:
@@ -503,36 +819,134 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     )
 
     def execute(self):
+        self.sync_obj.instanceStartTimes[self.get_name()] = time.time()
+        slots = self.global_config.concurrent_test_groups_per_instance
+        if slots == 1:
+            self.execute_slot(0)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=slots, thread_name_prefix=self.get_name()
+            ) as slot_pool:
+                futures = [
+                    slot_pool.submit(self.execute_slot, slot) for slot in range(slots)
+                ]
+            for future in futures:
+                future.result()
+        self.sync_obj.instanceEndTimes[self.get_name()] = time.time()
+        self.finish()
+
+    def execute_slot(self, slot: int) -> None:
+        """
+        Takes detections from the inputQueue and tests them until there are none left
+        :param slot: the slot which the current thread runs
+        """
+        self._slot_state.slot = slot
         while True:
             try:
                 self.check_for_teardown()
             except ContainerStoppedException:
-                self.finish()
                 return
 
-            try:
-                detection = self.sync_obj.inputQueue.pop()
-                self.sync_obj.currentTestingQueue[self.get_name()] = detection
-            except IndexError:
+            detections = self.pop_detections()
+            self.prefetch_attack_data()
+            if len(detections) == 0:
                 # self.pbar.write(
                 #    f"No more detections to test, shutting down {self.get_name()}"
                 # )
-                self.finish()
                 return
             try:
-                self.test_detection(detection)
+                if len(detections) == 1:
+                    detection = detections[0]
+                    self.sync_obj.currentTestingQueue[self.get_slot_name()] = detection
+                    self.phase_durations = {}
+                    detection_start_time = time.time()
+                    with self.trace_span(
+                        "test_detection", "detection", detection=detection.name
+                    ):
+                        self.test_detection(detection)
+                    self.record_detection_duration(
+                        detection, time.time() - detection_start_time
+                    )
+                else:
+                    with self.trace_span(
+                        "test_detection_batch",
+                        "detection",
+                        detections=", ".join(d.name for d in detections),
+                    ):
+                        self.test_detection_batch(detections)
             except ContainerStoppedException:
                 self.pbar.write(
                     f"Warning - container was stopped when trying to execute detection [{self.get_name()}]"
                 )
-                self.finish()
                 return
             except Exception as e:
                 self.pbar.write(f"Error testing detection: {type(e).__name__}: {e!s}")
                 raise e
             finally:
-                self.sync_obj.outputQueue.append(detection)
-                self.sync_obj.currentTestingQueue[self.get_name()] = None
+                self.sync_obj.outputQueue.extend(detections)
+                self.sync_obj.currentTestingQueue[self.get_slot_name()] = None
+
+    def prefetch_attack_data(self) -> None:
+        """
+        Starts downloading the attack data of the next detections in the inputQueue, so that it is
+        already in the cache by the time an instance tests them
+        """
+        if (
+            self.sync_obj.attackDataCache is None
+            or self.global_config.attack_data_prefetch_count == 0
+        ):
+            return
+        with self.sync_obj.inputQueueLock:
+            # Detections are taken from the end of the inputQueue
+            upcoming = self.sync_obj.inputQueue[
+                -self.global_config.attack_data_prefetch_count :
+            ]
+        self.sync_obj.attackDataCache.prefetch(upcoming)
+
+    def pop_detections(self) -> list[Detection]:
+        """
+        Takes the next detection from the inputQueue, along with other detections in the
+        inputQueue which share its attack data (if any). A batch is limited to this instance's
+        fair share of the expected duration of the queued work, so that a popular dataset does not
+        leave one instance testing dozens of detections in series while the others sit idle; the
+        detections left in the queue are batched by another instance, with another replay.
+        :returns: the detections to test together, or an empty list if there are none left
+        """
+        with self.sync_obj.inputQueueLock:
+            if len(self.sync_obj.inputQueue) == 0:
+                return []
+            detection = self.sync_obj.inputQueue.pop()
+            batch_key = self.sync_obj.attackDataBatchKeys.get(detection.name)
+            if batch_key is None:
+                return [detection]
+
+            expected = self.sync_obj.expectedDurations
+            fair_share = (
+                expected.get(detection.name, 0)
+                + sum(
+                    expected.get(queued_detection.name, 0)
+                    for queued_detection in self.sync_obj.inputQueue
+                )
+            ) / max(len(self.global_config.test_instances), 1)
+            batch_duration = expected.get(detection.name, 0)
+
+            detections = [detection]
+            remaining: list[Detection] = []
+            # The end of the queue is tested first, so batch from the end as well
+            for queued_detection in reversed(self.sync_obj.inputQueue):
+                duration = expected.get(queued_detection.name, 0)
+                if (
+                    self.sync_obj.attackDataBatchKeys.get(queued_detection.name)
+                    == batch_key
+                    and batch_duration + duration <= fair_share
+                ):
+                    detections.append(queued_detection)
+                    batch_duration += duration
+                else:
+                    remaining.append(queued_detection)
+            remaining.reverse()
+            self.sync_obj.inputQueue = remaining
+            return detections
 
     def test_detection(self, detection: Detection) -> None:
         """
@@ -560,43 +974,101 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                 continue
 
             # replay attack_data
-            setup_results = self.setup_test_group(test_group)
+            with self.trace_span(
+                "setup_test_group", "test_group", test_group=test_group.name
+            ):
+                setup_results = self.setup_test_group(test_group)
 
-            # run unit test
-            self.execute_unit_test(detection, test_group.unit_test, setup_results)
+            # run unit and integration tests
+            self.execute_test_group(detection, test_group, setup_results)
 
-            # run integration test
-            self.execute_integration_test(
-                detection,
-                test_group.integration_test,
-                setup_results,
-                test_group.unit_test.result,
+            # cleanup
+            with self.trace_span(
+                "cleanup_test_group", "test_group", test_group=test_group.name
+            ):
+                cleanup_results = self.cleanup_test_group(
+                    test_group, setup_results.start_time
+                )
+
+            # update the results duration w/ the setup/cleanup time (for those not skipped)
+            self.add_setup_and_cleanup_duration(
+                test_group, setup_results.duration + cleanup_results.duration
             )
 
-            # cleanup
+            # Write test group status
+            self.pbar.write(
+                self.format_pbar_string(
+                    TestReportingType.GROUP,
+                    test_group.name,
+                    TestingStates.DONE_GROUP,
+                    start_time=setup_results.start_time,
+                    set_pbar=False,
+                )
+            )
+
+    def test_detection_batch(self, detections: list[Detection]) -> None:
+        """
+        Tests detections which each have a single TestGroup, all of which rely on identical attack
+        data. The attack data is replayed once, the tests of every detection are run against it,
+        and then it is deleted once. The time spent on replay and cleanup is split evenly between
+        the detections in the batch.
+        :param detections: the Detections to test
+        """
+        # The attack data of every detection in the batch is the same, so the first test group
+        # stands in for all of them during setup and cleanup
+        first_test_group = detections[0].test_groups[0]
+        self.sync_obj.currentTestingQueue[self.get_slot_name()] = detections[0]
+
+        # replay attack_data
+        self.phase_durations = {}
+        with self.trace_span(
+            "setup_test_group", "test_group", test_group=first_test_group.name
+        ):
+            setup_results = self.setup_test_group(first_test_group)
+        setup_phase_durations = self.phase_durations
+
+        # run unit and integration tests for each detection in turn
+        test_durations: dict[str, float] = {}
+        phase_durations: dict[str, dict[DetectionTestingPhase, float]] = {}
+        for detection in detections:
+            self.check_for_teardown()
+            self.sync_obj.currentTestingQueue[self.get_slot_name()] = detection
+            self.phase_durations = {
+                phase: duration / len(detections)
+                for phase, duration in setup_phase_durations.items()
+            }
+            test_start_time = time.time()
+            self.execute_test_group(detection, detection.test_groups[0], setup_results)
+            test_durations[detection.name] = time.time() - test_start_time
+            phase_durations[detection.name] = self.phase_durations
+
+        # cleanup
+        self.phase_durations = {}
+        with self.trace_span(
+            "cleanup_test_group", "test_group", test_group=first_test_group.name
+        ):
             cleanup_results = self.cleanup_test_group(
-                test_group, setup_results.start_time
+                first_test_group, setup_results.start_time
             )
+        cleanup_phase_durations = self.phase_durations
 
-            # update the results duration w/ the setup/cleanup time (for those not skipped)
-            if (test_group.unit_test.result is not None) and (
-                not test_group.unit_test_skipped()
-            ):
-                test_group.unit_test.result.duration = round(
-                    test_group.unit_test.result.duration
-                    + setup_results.duration
-                    + cleanup_results.duration,
-                    2,
-                )
-            if (test_group.integration_test.result is not None) and (
-                not test_group.integration_test_skipped()
-            ):
-                test_group.integration_test.result.duration = round(
-                    test_group.integration_test.result.duration
-                    + setup_results.duration
-                    + cleanup_results.duration,
-                    2,
+        shared_duration = (setup_results.duration + cleanup_results.duration) / len(
+            detections
+        )
+        for detection in detections:
+            test_group = detection.test_groups[0]
+
+            # update the results duration w/ this detection's share of the setup/cleanup time
+            self.add_setup_and_cleanup_duration(test_group, shared_duration)
+
+            self.phase_durations = phase_durations[detection.name]
+            for phase, duration in cleanup_phase_durations.items():
+                self.phase_durations[phase] = self.phase_durations.get(phase, 0.0) + (
+                    duration / len(detections)
                 )
+            self.record_detection_duration(
+                detection, test_durations[detection.name] + shared_duration
+            )
 
             # Write test group status
             self.pbar.write(
@@ -609,6 +1081,60 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                 )
             )
 
+    def execute_test_group(
+        self,
+        detection: Detection,
+        test_group: TestGroup,
+        setup_results: SetupTestGroupResults,
+    ) -> None:
+        """
+        Runs the unit test, and then the integration test, of a TestGroup whose attack data has
+        already been replayed
+        :param detection: the Detection being tested
+        :param test_group: the TestGroup to run
+        :param setup_results: the results of replaying the attack data
+        """
+        # run unit test
+        with self.trace_span(
+            "execute_unit_test", "test", test=f"{detection.name}:{test_group.name}"
+        ):
+            self.execute_unit_test(detection, test_group.unit_test, setup_results)
+
+        # run integration test
+        with self.trace_span(
+            "execute_integration_test",
+            "test",
+            test=f"{detection.name}:{test_group.name}",
+        ):
+            self.execute_integration_test(
+                detection,
+                test_group.integration_test,
+                setup_results,
+                test_group.unit_test.result,
+            )
+
+    def add_setup_and_cleanup_duration(
+        self, test_group: TestGroup, duration: float
+    ) -> None:
+        """
+        Adds the time spent replaying and deleting attack data to the duration of each test in a
+        TestGroup which was not skipped
+        :param test_group: the TestGroup
+        :param duration: the time, in seconds, spent on setup and cleanup of the TestGroup
+        """
+        if (test_group.unit_test.result is not None) and (
+            not test_group.unit_test_skipped()
+        ):
+            test_group.unit_test.result.duration = round(
+                test_group.unit_test.result.duration + duration, 2
+            )
+        if (test_group.integration_test.result is not None) and (
+            not test_group.integration_test_skipped()
+        ):
+            test_group.integration_test.result.duration = round(
+                test_group.integration_test.result.duration + duration, 2
+            )
+
     def setup_test_group(self, test_group: TestGroup) -> SetupTestGroupResults:
         """
         Executes attack_data replay, captures test group start time, does some reporting to the CLI
@@ -620,7 +1146,7 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         setup_start_time = time.time()
 
         # Log the start of the test group
-        self.pbar.reset()
+        self.reset_pbar()
         self.format_pbar_string(
             TestReportingType.GROUP,
             test_group.name,
@@ -635,13 +1161,32 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         results = SetupTestGroupResults(start_time=setup_start_time)
 
         # Replay attack data
+        replayed_events: dict[tuple[str, str], int] = {}
         try:
-            self.replay_attack_data_files(test_group, setup_start_time)
+            if self.global_config.ephemeral_replay_indexes:
+                self.create_ephemeral_index()
+            replayed_events = self.replay_attack_data_files(
+                test_group, setup_start_time
+            )
         except Exception as e:
             print("\n\nexception replaying attack data files\n\n")
             results.exception = e
             results.success = False
 
+        # Wait until the attack data can be searched, so that the first search of it will not
+        # come up empty
+        if results.success:
+            self.format_pbar_string(
+                TestReportingType.GROUP,
+                test_group.name,
+                TestingStates.PROCESSING,
+                start_time=setup_start_time,
+            )
+            with self.time_phase(DetectionTestingPhase.index_wait):
+                results.attack_data_searchable = self.wait_for_attack_data_searchable(
+                    test_group, replayed_events
+                )
+
         # Set setup duration
         results.duration = time.time() - setup_start_time
 
@@ -670,13 +1215,30 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
 
         # TODO: do we want to clean up even if replay failed? Could have been partial failure?
         # Delete attack data
-        self.delete_attack_data(test_group.attack_data)
+        with self.time_phase(DetectionTestingPhase.cleanup):
+            if getattr(self._slot_state, "replay_index", None) is not None:
+                # Only data replayed into a custom_index must be deleted; the rest is removed
+                # along with the ephemeral index
+                self.delete_attack_data(
+                    [
+                        attack_data
+                        for attack_data in test_group.attack_data
+                        if attack_data.custom_index is not None
+                    ]
+                )
+                self.remove_ephemeral_index()
+            else:
+                self.delete_attack_data(test_group.attack_data)
 
         # Return the cleanup metadata, adding start time and duration
         return CleanupTestGroupResults(
             duration=time.time() - cleanup_start_time, start_time=cleanup_start_time
         )
 
+    def reset_pbar(self) -> None:
+        with self._pbar_lock:
+            self.pbar.reset()
+
     def format_pbar_string(
         self,
         test_reporting_type: TestReportingType,
@@ -707,9 +1269,10 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             start_time = self.start_time
 
         # invoke the helper method
-        new_string = format_pbar_string(
-            self.pbar, test_reporting_type, test_name, state, start_time, set_pbar
-        )
+        with self._pbar_lock:
+            new_string = format_pbar_string(
+                self.pbar, test_reporting_type, test_name, state, start_time, set_pbar
+            )
 
         # update sync status if needed
         if update_sync_status:
@@ -754,7 +1317,7 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             return
 
         # Reset the pbar and print that we are beginning a unit test
-        self.pbar.reset()
+        self.reset_pbar()
         self.format_pbar_string(
             TestReportingType.UNIT,
             f"{detection.name}:{test.name}",
@@ -786,8 +1349,9 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
 
             return
 
-        # Set the mode and timeframe, if required
-        kwargs = {"exec_mode": "blocking"}
+        # Set the mode and timeframe, if required. The search is dispatched asynchronously and
+        # waited on by the SearchJobPoller, so that other slots can search at the same time.
+        kwargs = {"exec_mode": "normal"}
 
         # Set earliest_time and latest_time appropriately if FORCE_ALL_TIME is False
         if not FORCE_ALL_TIME:
@@ -806,7 +1370,14 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     "currently supported in contentctl. Mark "
                     "this as manual_test."
                 )
-            self.retry_search_until_timeout(detection, test, kwargs, test_start_time)
+            with self.time_phase(DetectionTestingPhase.search):
+                self.retry_search_until_timeout(
+                    detection,
+                    test,
+                    kwargs,
+                    test_start_time,
+                    wait_before_first_search=not setup_results.attack_data_searchable,
+                )
         except CannotRunBaselineException as e:
             # Init the test result and record a failure if there was an issue during the search
             test.result = UnitTestResult()
@@ -982,7 +1553,7 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             return
 
         # Reset the pbar and print that we are beginning an integration test
-        self.pbar.reset()
+        self.reset_pbar()
         self.format_pbar_string(
             TestReportingType.INTEGRATION,
             f"{detection.name}:{test.name}",
@@ -1030,10 +1601,13 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                 detection=detection,
                 service=self.get_conn(),
                 pbar_data=pbar_data,
+                batch=self.get_correlation_search_batch(),
+                janitor=self.get_correlation_search_janitor(),
             )
 
             # Run the test
-            test.result = correlation_search.test()
+            with self.time_phase(DetectionTestingPhase.integration):
+                test.result = correlation_search.test()
         except Exception as e:
             # Catch and report and unhandled exceptions in integration testing
             test.result = IntegrationTestResult(
@@ -1156,12 +1730,160 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         # Otherwise, don't pause
         return False
 
+    def wait_for_attack_data_searchable(
+        self,
+        test_group: TestGroup,
+        replayed_events: Optional[dict[tuple[str, str], int]] = None,
+    ) -> bool:
+        """
+        Polls a cheap tstats count of the data that a TestGroup's attack data was replayed as
+        (its index and host) until it counts every event which HEC acknowledged, which means that
+        the replayed data can be searched. If the number of events sent is not known, polling
+        instead stops once the count is non-zero and has stopped changing. The polling interval
+        starts short and grows while the data is not ready. Polling stops after a short budget,
+        since data which is never counted would otherwise hold up the test group for as long as
+        the search itself is retried.
+        :param test_group: the TestGroup whose attack data was replayed
+        :param replayed_events: the number of events acknowledged by HEC for each index and host
+            the attack data was replayed as, if known
+        :returns: True if the data became searchable in time, False otherwise
+        """
+        replayed = sorted(
+            {self.get_replay_key(attack_data) for attack_data in test_group.attack_data}
+        )
+        if len(replayed) == 0:
+            return False
+        expected_count = (
+            sum(replayed_events.get(key, 0) for key in replayed)
+            if replayed_events
+            else None
+        )
+        # Other slots may replay into the same index, so only this group's host is counted
+        query = "| tstats count where " + " OR ".join(
+            f'(index="{index}" host="{host}")' for index, host in replayed
+        )
+
+        stop_time = time.time() + min(
+            INDEX_READINESS_MAX_WAIT_SECONDS, self.sync_obj.timeout_seconds
+        )
+        delay = INDEX_READINESS_MIN_POLL_SECONDS
+        previous_count = 0
+        while time.time() < stop_time:
+            self.check_for_teardown()
+            try:
+                job = self.get_conn().search(query=query, exec_mode="blocking")
+                count = sum(
+                    int(result.get("count", 0))
+                    for result in JSONResultsReader(job.results(output_mode="json"))
+                    if not isinstance(result, Message)
+                )
+            except Exception:
+                # The probe is only an optimization; the search itself will still be retried
+                return False
+            if expected_count is not None:
+                if count >= expected_count:
+                    return True
+            elif count > 0 and count == previous_count:
+                return True
+            previous_count = count
+            time.sleep(delay)
+            delay = min(delay * 2, INDEX_READINESS_MAX_POLL_SECONDS)
+        return False
+
+    def poll_search_jobs(self, sids: list[str]) -> dict[str, bool]:
+        """
+        Checks the status of several search jobs with one request. The listing is filtered to the
+        given jobs, so its cost does not grow with the number of other jobs on the server. A job
+        missing from the listing is looked up on its own, in case the listing lagged behind it.
+        :param sids: the ids of the search jobs
+        :returns: mapping of each sid to whether the job is done (finished or failed). Jobs which
+            no longer exist are left out.
+        """
+        response = self.get_conn().get(
+            "search/jobs",
+            count=len(sids),
+            search=" OR ".join(f'sid="{sid}"' for sid in sids),
+            output_mode="json",
+            f=["sid", "isDone", "isFailed"],
+        )
+        statuses: dict[str, bool] = {}
+        for entry in json.loads(response.body.read()).get("entry", []):
+            content = entry.get("content", {})
+            if content.get("sid") in sids:
+                statuses[content["sid"]] = bool(content.get("isDone")) or bool(
+                    content.get("isFailed")
+                )
+
+        for sid in sids:
+            if sid in statuses:
+                continue
+            try:
+                response = self.get_conn().get(
+                    f"search/jobs/{sid}",
+                    output_mode="json",
+                    f=["isDone", "isFailed"],
+                )
+            except HTTPError as e:
+                if e.status == 404:
+                    continue
+                raise
+            for entry in json.loads(response.body.read()).get("entry", []):
+                content = entry.get("content", {})
+                statuses[sid] = bool(content.get("isDone")) or bool(
+                    content.get("isFailed")
+                )
+        return statuses
+
+    def get_correlation_search_batch(self) -> Optional[CorrelationSearchBatch]:
+        """
+        :returns: the batch shared by every slot on this instance to poll for the risk and notable
+            events of the correlation searches being tested, or None if integration tests are not
+            batched
+        """
+        if not self.global_config.batched_integration_testing:
+            return None
+        with self._client_lock:
+            if self._correlation_search_batch is None:
+                self._correlation_search_batch = CorrelationSearchBatch(
+                    get_service=self.get_conn
+                )
+        return self._correlation_search_batch
+
+    def get_correlation_search_janitor(self) -> Optional[CorrelationSearchJanitor]:
+        """
+        :returns: the janitor shared by every slot on this instance to delete the risk and notable
+            events created by integration tests, or None if they are deleted by each test
+        """
+        if not self.global_config.deferred_integration_test_cleanup:
+            return None
+        with self._client_lock:
+            if self._correlation_search_janitor is None:
+                self._correlation_search_janitor = CorrelationSearchJanitor(
+                    get_service=self.get_conn, report_error=self.pbar.write
+                )
+        return self._correlation_search_janitor
+
+    def wait_for_search_job(self, job: client.Job) -> None:
+        """
+        Waits for an asynchronously dispatched search job to finish, then refreshes it so that its
+        content (such as resultCount) is current
+        :param job: the job
+        """
+        with self._client_lock:
+            if self._search_job_poller is None:
+                self._search_job_poller = SearchJobPoller(
+                    poll_jobs=self.poll_search_jobs
+                )
+        self._search_job_poller.wait(job.sid)
+        job.refresh()
+
     def retry_search_until_timeout(
         self,
         detection: Detection,
         test: UnitTest,
         kwargs: dict,
         start_time: float,
+        wait_before_first_search: bool = True,
     ):
         """
         Retries a search until the timeout is reached, setting test results appropriately
@@ -1169,6 +1891,8 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         :param test: the UnitTest case being tested
         :param kwargs: any additional keyword args to be passed with the search
         :param start_time: the start time of the caller
+        :param wait_before_first_search: if False, the attack data is known to be searchable, so
+            the search is run immediately rather than after a delay
         """
         # Get the start time and compute the timeout
         search_start_time = time.time()
@@ -1183,6 +1907,31 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
             if not search.strip().startswith("search "):
                 search = f"search {search}"
 
+        if detection.rba is not None:
+            risk_object_fields_set = set(
+                [o.field for o in detection.rba.risk_objects]
+            )  # just the "Risk Objects"
+            threat_object_fields_set = set(
+                [o.field for o in detection.rba.threat_objects]
+            )  # just the "threat objects"
+        else:
+            # For some searches, like Hunting Searches, there should
+            # not be any risk or threat objects.
+            risk_object_fields_set: set[str] = (
+                set()
+            )  # just the "Risk Objects" (of which there are none)
+            threat_object_fields_set: set[str] = (
+                set()
+            )  # just the "threat objects" (of which there are none)
+        full_rba_field_set: set[str] = risk_object_fields_set.union(
+            threat_object_fields_set
+        )
+
+        if self.global_config.aggregate_unit_test_validation:
+            search += self.get_aggregate_validation_search(
+                sorted(risk_object_fields_set), sorted(threat_object_fields_set)
+            )
+
         # exponential backoff for wait time
         tick = 2
 
@@ -1190,16 +1939,19 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         while time.time() < search_stop_time:
             # This loop allows us to capture shutdown events without being
             # stuck in an extended sleep. Remember that this raises an exception
-            for _ in range(pow(2, tick - 1)):
-                self.check_for_teardown()
-                self.format_pbar_string(
-                    TestReportingType.UNIT,
-                    f"{detection.name}:{test.name}",
-                    TestingStates.PROCESSING,
-                    start_time=start_time,
-                )
+            wait_seconds = pow(2, tick - 1) if wait_before_first_search else 0
+            wait_before_first_search = True
+            with self.trace_span("search_retry_wait", "wait"):
+                for _ in range(wait_seconds):
+                    self.check_for_teardown()
+                    self.format_pbar_string(
+                        TestReportingType.UNIT,
+                        f"{detection.name}:{test.name}",
+                        TestingStates.PROCESSING,
+                        start_time=start_time,
+                    )
 
-                time.sleep(1)
+                    time.sleep(1)
 
             self.format_pbar_string(
                 TestReportingType.UNIT,
@@ -1210,27 +1962,24 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
 
             # Execute the search and read the results
             job = self.get_conn().search(query=search, **kwargs)
+            if kwargs.get("exec_mode") == "normal":
+                self.wait_for_search_job(job)
             results = JSONResultsReader(job.results(output_mode="json"))
 
-            if detection.rba is not None:
-                risk_object_fields_set = set(
-                    [o.field for o in detection.rba.risk_objects]
-                )  # just the "Risk Objects"
-                threat_object_fields_set = set(
-                    [o.field for o in detection.rba.threat_objects]
-                )  # just the "threat objects"
-            else:
-                # For some searches, like Hunting Searches, there should
-                # not be any risk or threat objects.
-                risk_object_fields_set: set[str] = (
-                    set()
-                )  # just the "Risk Objects" (of which there are none)
-                threat_object_fields_set: set[str] = (
-                    set()
-                )  # just the "threat objects" (of which there are none)
-            full_rba_field_set: set[str] = risk_object_fields_set.union(
-                threat_object_fields_set
-            )
+            # When the results were validated inside Splunk, the only result is a summary of
+            # the detection's results. As below, the search is retried only if it had no results.
+            if self.global_config.aggregate_unit_test_validation:
+                if self.validate_aggregate_results(
+                    test,
+                    job,
+                    results,
+                    sorted(risk_object_fields_set),
+                    sorted(threat_object_fields_set),
+                    duration=time.time() - search_start_time,
+                ):
+                    return
+                tick += 1
+                continue
 
             # Ensure the search had at least one result
             if int(job.content.get("resultCount", "0")) > 0:
@@ -1348,10 +2097,166 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
 
         return
 
+    def get_aggregate_validation_search(
+        self, risk_object_fields: list[str], threat_object_fields: list[str]
+    ) -> str:
+        """
+        Get the SPL appended to a detection's search so that its risk and threat object fields are
+        validated inside Splunk. The detection's results are numbered, in the order they would have
+        been returned, and summarized in a single row containing:
+          - the number of results
+          - the first result in which every risk and threat object field is populated
+          - for each risk object field, the first result in which it is missing, and the first in
+            which it is the string 'null'
+          - for each threat object field, whether it is populated in any result
+        :param risk_object_fields: the risk object fields of the detection
+        :param threat_object_fields: the threat object fields of the detection
+        :returns: the SPL, beginning with a pipe
+        """
+
+        def quote(field: str) -> str:
+            escaped = field.replace("\\", "\\\\").replace("'", "\\'")
+            return f"'{escaped}'"
+
+        def populated(field: str) -> str:
+            return f'(isnotnull({quote(field)}) AND {quote(field)}!="null")'
+
+        row = f"{AGGREGATE_VALIDATION_FIELD_PREFIX}row"
+        complete_condition = " AND ".join(
+            populated(field) for field in risk_object_fields + threat_object_fields
+        )
+        aggregations = [
+            f"count AS {AGGREGATE_VALIDATION_FIELD_PREFIX}result_count",
+            f"min(eval(if({complete_condition or 'true()'}, {row}, null()))) "
+            f"AS {AGGREGATE_VALIDATION_FIELD_PREFIX}first_complete_row",
+        ]
+        for i, field in enumerate(risk_object_fields):
+            aggregations.append(
+                f"min(eval(if(isnull({quote(field)}), {row}, null()))) "
+                f"AS {AGGREGATE_VALIDATION_FIELD_PREFIX}risk_missing_{i}"
+            )
+            aggregations.append(
+                f'min(eval(if({quote(field)}=="null", {row}, null()))) '
+                f"AS {AGGREGATE_VALIDATION_FIELD_PREFIX}risk_null_{i}"
+            )
+        for i, field in enumerate(threat_object_fields):
+            aggregations.append(
+                f"max(eval(if({populated(field)}, 1, 0))) "
+                f"AS {AGGREGATE_VALIDATION_FIELD_PREFIX}threat_present_{i}"
+            )
+        return f" | streamstats count AS {row} | stats {' '.join(aggregations)}"
+
+    def validate_aggregate_results(
+        self,
+        test: UnitTest,
+        job: client.Job,
+        results: JSONResultsReader,
+        risk_object_fields: list[str],
+        threat_object_fields: list[str],
+        duration: float,
+    ) -> bool:
+        """
+        Set the result of a test from the summary row produced by the SPL from
+        get_aggregate_validation_search. The checks are the same as those retry_search_until_timeout
+        applies to each result in turn: the test fails at the first result missing a risk object
+        field, and passes at the first result in which every field is populated. If there is no such
+        result, it passes if each threat object field is populated in at least one result.
+        :param test: the UnitTest case being tested
+        :param job: the search job
+        :param results: the results of the search job
+        :param risk_object_fields: the risk object fields of the detection, in the order they were
+            given to get_aggregate_validation_search
+        :param threat_object_fields: the threat object fields of the detection, in the order they
+            were given to get_aggregate_validation_search
+        :param duration: the duration of the test so far
+        :returns: whether the detection's search had any results
+        """
+        summary: dict = {}
+        for result in results:
+            if not isinstance(result, Message):
+                summary = result
+                break
+
+        def get_row(name: str) -> Optional[int]:
+            value = summary.get(f"{AGGREGATE_VALIDATION_FIELD_PREFIX}{name}")
+            return int(value) if value is not None else None
+
+        # Report the number of results of the detection's search, rather than the single summary
+        job_content = Record(job.content)
+        result_count = get_row("result_count") or 0
+        job_content["resultCount"] = str(result_count)
+
+        test.result = UnitTestResult()
+        if result_count == 0:
+            # Report a failure if there were no results at all
+            test.result.set_job_content(
+                job_content,
+                self.infrastructure,
+                TestResultStatus.FAIL,
+                duration=duration,
+            )
+            return False
+
+        missing_rows = {
+            field: get_row(f"risk_missing_{i}")
+            for i, field in enumerate(risk_object_fields)
+        }
+        null_rows = {
+            field: get_row(f"risk_null_{i}")
+            for i, field in enumerate(risk_object_fields)
+        }
+        failure_rows = [
+            row for row in [*missing_rows.values(), *null_rows.values()] if row
+        ]
+        first_failure_row = min(failure_rows) if len(failure_rows) > 0 else None
+        first_complete_row = get_row("first_complete_row")
+
+        e: Optional[Exception] = None
+        if first_failure_row is not None and (
+            first_complete_row is None or first_failure_row < first_complete_row
+        ):
+            missing_risk_objects = {
+                field for field, row in missing_rows.items() if row == first_failure_row
+            }
+            if len(missing_risk_objects) > 0:
+                e = Exception(
+                    f"The risk object field(s) {missing_risk_objects} are missing in the "
+                    "detection results"
+                )
+            else:
+                field = next(
+                    field
+                    for field, row in null_rows.items()
+                    if row == first_failure_row
+                )
+                e = Exception(
+                    f"The risk object field {field} is missing in at least one result."
+                )
+        elif first_complete_row is None:
+            missing_threat_objects = {
+                field
+                for i, field in enumerate(threat_object_fields)
+                if get_row(f"threat_present_{i}") != 1
+            }
+            if len(missing_threat_objects) > 0:
+                e = Exception(
+                    f"One or more required threat object fields {missing_threat_objects} contained 'null' values in all events. "
+                    "Is the data being parsed correctly or is there an error in the naming of a field?"
+                )
+
+        test.result.set_job_content(
+            job_content,
+            self.infrastructure,
+            TestResultStatus.PASS if e is None else TestResultStatus.FAIL,
+            exception=e,
+            duration=duration,
+        )
+        return True
+
     def delete_attack_data(self, attack_data_files: list[TestAttackData]):
         for attack_data_file in attack_data_files:
-            index = attack_data_file.custom_index or self.sync_obj.replay_index
-            host = attack_data_file.host or self.sync_obj.replay_host
+            index = attack_data_file.custom_index or self.get_replay_index()
+            host = attack_data_file.host or self.get_replay_host()
             splunk_search = f'search index="{index}" host="{host}" | delete'
             kwargs = {"exec_mode": "blocking"}
             try:
@@ -1371,20 +2276,145 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
         self,
         test_group: TestGroup,
         test_group_start_time: float,
-    ):
+    ) -> dict[tuple[str, str], int]:
+        """
+        Replays every attack data file of a TestGroup, and waits for HEC to acknowledge the data
+        :param test_group: the TestGroup to replay for
+        :param test_group_start_time: the start time of the TestGroup (for logging)
+        :returns: the number of events replayed as each index and host
+        """
+        replayed_events: dict[tuple[str, str], int] = {}
+        max_parallel_files = min(
+            self.global_config.attack_data_max_parallel_files,
+            len(test_group.attack_data),
+        )
         with TemporaryDirectory(prefix="contentctl_attack_data") as attack_data_dir:
-            for attack_data_file in test_group.attack_data:
-                self.replay_attack_data_file(
-                    attack_data_file, attack_data_dir, test_group, test_group_start_time
+            if max_parallel_files <= 1:
+                for attack_data_file in test_group.attack_data:
+                    events = self.replay_attack_data_file(
+                        attack_data_file,
+                        attack_data_dir,
+                        test_group,
+                        test_group_start_time,
+                    )
+                    key = self.get_replay_key(attack_data_file)
+                    replayed_events[key] = replayed_events.get(key, 0) + events
+                return replayed_events
+
+            # Slot state is local to each thread, so the threads sending the files take on the
+            # slot (and replay index) of this one, and time their own phases
+            slot = self.get_slot()
+            replay_index = getattr(self._slot_state, "replay_index", None)
+
+            def send_file(
+                attack_data_file: TestAttackData,
+            ) -> tuple[list[int], int, dict[DetectionTestingPhase, float]]:
+                self._slot_state.slot = slot
+                self._slot_state.replay_index = replay_index
+                self.phase_durations = {}
+                try:
+                    tempfile = self.get_attack_data_file(
+                        attack_data_file,
+                        attack_data_dir,
+                        test_group,
+                        test_group_start_time,
+                    )
+                    self.format_pbar_string(
+                        TestReportingType.GROUP,
+                        test_group.name,
+                        TestingStates.REPLAYING,
+                        start_time=test_group_start_time,
+                    )
+                    return (
+                        self.send_attack_data(tempfile, attack_data_file),
+                        self.count_replay_events(tempfile),
+                        self.phase_durations,
+                    )
+                except ReplayIndexDoesNotExistOnServer:
+                    raise
+                except Exception as e:
+                    raise Exception(
+                        f"Error replaying attack data file [{attack_data_file.data}]: {e!s}"
+                    )
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_parallel_files
+            ) as file_pool:
+                futures = [
+                    file_pool.submit(send_file, attack_data_file)
+                    for attack_data_file in test_group.attack_data
+                ]
+
+            # Report the error of the first file which failed. The files were sent at the same
+            # time, so the longest time any of them spent in a phase is added to that phase.
+            ack_ids: list[int] = []
+            file_phase_durations: dict[DetectionTestingPhase, float] = {}
+            for attack_data_file, future in zip(test_group.attack_data, futures):
+                file_ack_ids, events, durations = future.result()
+                ack_ids.extend(file_ack_ids)
+                key = self.get_replay_key(attack_data_file)
+                replayed_events[key] = replayed_events.get(key, 0) + events
+                for phase, duration in durations.items():
+                    file_phase_durations[phase] = max(
+                        file_phase_durations.get(phase, 0.0), duration
+                    )
+            for phase, duration in file_phase_durations.items():
+                self.phase_durations[phase] = (
+                    self.phase_durations.get(phase, 0.0) + duration
                 )
 
+            with self.time_phase(DetectionTestingPhase.hec_ack_wait):
+                self.wait_for_hec_acks(ack_ids)
+        return replayed_events
+
+    def get_replay_key(self, attack_data_file: TestAttackData) -> tuple[str, str]:
+        """
+        :param attack_data_file: the attack data file being replayed
+        :returns: the index and host that the attack data file is replayed as
+        """
+        return (
+            attack_data_file.custom_index or self.get_replay_index(),
+            attack_data_file.host or self.get_replay_host(),
+        )
+
     def replay_attack_data_file(
         self,
         attack_data_file: TestAttackData,
         tmp_dir: str,
         test_group: TestGroup,
         test_group_start_time: float,
-    ):
+    ) -> int:
+        """
+        Replays an attack data file, and waits for HEC to acknowledge the data
+        :returns: the number of events replayed
+        """
+        tempfile = self.get_attack_data_file(
+            attack_data_file, tmp_dir, test_group, test_group_start_time
+        )
+
+        # Upload the data
+        self.format_pbar_string(
+            TestReportingType.GROUP,
+            test_group.name,
+            TestingStates.REPLAYING,
+            start_time=test_group_start_time,
+        )
+
+        self.hec_raw_replay(tempfile, attack_data_file)
+
+        return self.count_replay_events(tempfile)
+
+    def get_attack_data_file(
+        self,
+        attack_data_file: TestAttackData,
+        tmp_dir: str,
+        test_group: TestGroup,
+        test_group_start_time: float,
+    ) -> str:
+        """
+        Gets a local copy of an attack data file, downloading it if necessary
+        :returns: the path of the local copy
+        """
         # Before attempting to replay the file, ensure that the index we want
         # to replay into actuall exists. If not, we should throw a detailed
         # exception that can easily be interpreted by the user.
@@ -1432,9 +2462,21 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     start_time=test_group_start_time,
                 )
 
-                Utils.download_file_from_http(
-                    str(attack_data_file.data), tempfile, self.pbar, overwrite_file=True
-                )
+                with self.time_phase(DetectionTestingPhase.download):
+                    if self.sync_obj.attackDataCache is not None:
+                        # The cached file is replayed in place; it is never modified
+                        tempfile = str(
+                            self.sync_obj.attackDataCache.get(
+                                str(attack_data_file.data)
+                            )
+                        )
+                    else:
+                        Utils.download_file_from_http(
+                            str(attack_data_file.data),
+                            tempfile,
+                            self.pbar,
+                            overwrite_file=True,
+                        )
             except Exception as e:
                 raise (
                     Exception(
@@ -1442,126 +2484,302 @@ class DetectionTestingInfrastructure(BaseModel, abc.ABC):
                     )
                 )
 
-        # Upload the data
-        self.format_pbar_string(
-            TestReportingType.GROUP,
-            test_group.name,
-            TestingStates.REPLAYING,
-            start_time=test_group_start_time,
-        )
+        return tempfile
 
-        self.hec_raw_replay(tempfile, attack_data_file)
-
-        return attack_data_file.custom_index or self.sync_obj.replay_index
-
-    def hec_raw_replay(
-        self,
-        tempfile: str,
-        attack_data_file: TestAttackData,
-        verify_ssl: bool = False,
-    ):
-        if verify_ssl is False:
-            # need this, otherwise every request made with the requests module
-            # and verify=False will print an error to the command line
-            disable_warnings()
-
-        # build the headers
-
-        headers = {
-            "Authorization": f"Splunk {self.hec_token}",  # token must begin with 'Splunk '
-            "X-Splunk-Request-Channel": self.hec_channel,
-        }
-
-        url_params = {
-            "index": attack_data_file.custom_index or self.sync_obj.replay_index,
-            "source": attack_data_file.source,
-            "sourcetype": attack_data_file.sourcetype,
-            "host": attack_data_file.host or self.sync_obj.replay_host,
-        }
+    def get_hec_session(self) -> requests.Session:
+        """
+        Gets the HTTP session used to replay data into HEC. The session keeps connections to the
+        server alive and pools them, so that each replay and ack poll does not pay for a new TLS
+        handshake.
+        :returns: the session
+        """
+        with self._client_lock:
+            if self._hec_session is None:
+                session = requests.Session()
+                # Every slot may post several chunks of several files at the same time
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_maxsize=self.global_config.hec_replay_max_parallel_posts
+                    * self.global_config.attack_data_max_parallel_files
+                    * self.global_config.concurrent_test_groups_per_instance
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(
+                    {
+                        "Authorization": f"Splunk {self.hec_token}",  # token must begin with 'Splunk '
+                        "X-Splunk-Request-Channel": self.hec_channel,
+                    }
+                )
+                self._hec_session = session
+            return self._hec_session
 
-        if self.infrastructure.instance_address.strip().lower().startswith("https://"):
-            address_with_scheme = self.infrastructure.instance_address.strip().lower()
-        elif self.infrastructure.instance_address.strip().lower().startswith("http://"):
-            address_with_scheme = (
-                self.infrastructure.instance_address.strip()
-                .lower()
-                .replace("http://", "https://")
-            )
-        else:
-            address_with_scheme = f"https://{self.infrastructure.instance_address}"
+    def get_hec_url(self, path: str) -> str:
+        # Any scheme in the address is replaced with the scheme of the instance
+        address = self.infrastructure.instance_address.strip().lower()
+        for scheme in ("https://", "http://"):
+            address = address.removeprefix(scheme)
+        address_with_scheme = f"{self.get_scheme()}://{address}"
 
         # Generate the full URL, including the host, the path, and the params.
         # We can be a lot smarter about this (and pulling the port from the url, checking
         # for trailing /, etc, but we leave that for the future)
         url_with_port = f"{address_with_scheme}:{self.infrastructure.hec_port}"
-        url_with_hec_path = urllib.parse.urljoin(
-            url_with_port, "services/collector/raw"
+        return urllib.parse.urljoin(url_with_port, path)
+
+    @staticmethod
+    def get_replay_ranges(tempfile: str, chunk_size: int) -> list[tuple[int, int]]:
+        """
+        Splits a file into byte ranges of roughly chunk_size which each end on a newline, so
+        that no line is split between two ranges
+        :param tempfile: path to the file
+        :param chunk_size: the approximate size of each range, or 0 for a single range
+        :returns: list of (start, end) offsets
+        """
+        file_size = os.path.getsize(tempfile)
+        if chunk_size == 0 or file_size <= chunk_size:
+            return [(0, file_size)]
+
+        ranges: list[tuple[int, int]] = []
+        with open(tempfile, "rb") as datafile:
+            start = 0
+            while start < file_size:
+                datafile.seek(min(start + chunk_size, file_size))
+                datafile.readline()
+                end = min(datafile.tell(), file_size)
+                ranges.append((start, end))
+                start = end
+        return ranges
+
+    @staticmethod
+    def count_replay_events(tempfile: str) -> int:
+        """
+        Counts the events in an attack data file. Attack data files hold one event per line, so
+        this is the number of lines which are not blank.
+        :param tempfile: path to the file
+        :returns: the number of events
+        """
+        with open(tempfile, "rb") as datafile:
+            return sum(1 for line in datafile if line.strip())
+
+    @staticmethod
+    def iter_replay_payload(
+        tempfile: str, start: int, end: int, compress: bool
+    ) -> Iterator[bytes]:
+        """
+        Reads a range of a file in bounded blocks, optionally gzip compressing it, so that the
+        whole file is never held in memory
+        :param tempfile: path to the file
+        :param start: offset of the first byte to read
+        :param end: offset after the last byte to read
+        :param compress: whether to gzip the data
+        """
+        compressor = (
+            zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            if compress
+            else None
         )
         with open(tempfile, "rb") as datafile:
+            datafile.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = datafile.read(min(HEC_REPLAY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                if compressor is None:
+                    yield block
+                else:
+                    compressed = compressor.compress(block)
+                    if compressed:
+                        yield compressed
+        if compressor is not None:
+            yield compressor.flush()
+
+    def hec_post_range(
+        self,
+        tempfile: str,
+        start: int,
+        end: int,
+        url_params: dict[str, str | None],
+        verify_ssl: bool,
+    ) -> int:
+        """
+        Posts one range of an attack data file to the HEC raw endpoint. If the data is sent
+        compressed and the server rejects its encoding, it is sent again uncompressed and
+        compression is not attempted again on this instance. Any other error is reported as is.
+        :returns: the ackId of the post
+        """
+        compress = self._hec_gzip_supported
+        while True:
+            headers = {"Content-Encoding": "gzip"} if compress else {}
             try:
-                res = requests.post(
-                    url_with_hec_path,
+                res = self.get_hec_session().post(
+                    self.get_hec_url("services/collector/raw"),
                     params=url_params,
-                    data=datafile.read(),
+                    data=self.iter_replay_payload(tempfile, start, end, compress),
                     allow_redirects=True,
                     headers=headers,
                     verify=verify_ssl,
                 )
-                jsonResponse = json.loads(res.text)
+            except Exception as e:
+                raise (
+                    Exception(
+                        f"There was an exception sending attack_data to HEC: {e!s}"
+                    )
+                )
+
+            if compress and self.is_hec_encoding_rejected(res):
+                # Fall back to sending the data uncompressed
+                self._hec_gzip_supported = False
+                compress = False
+                continue
 
+            try:
+                jsonResponse = json.loads(res.text)
             except Exception as e:
                 raise (
                     Exception(
                         f"There was an exception sending attack_data to HEC: {e!s}"
                     )
                 )
+            if "ackId" not in jsonResponse:
+                raise (
+                    Exception(
+                        f"key 'ackID' not present in response from HEC server: {jsonResponse}"
+                    )
+                )
+            return jsonResponse["ackId"]
 
-        if "ackId" not in jsonResponse:
+    @staticmethod
+    def is_hec_encoding_rejected(res: requests.Response) -> bool:
+        """
+        :param res: the response of HEC to data sent gzip compressed
+        :returns: True if the server rejected the data because of its content encoding, rather
+            than for another reason such as a bad token or being busy
+        """
+        if res.status_code == 415:
+            return True
+        body = res.text.lower()
+        return res.status_code == 400 and ("encoding" in body or "gzip" in body)
+
+    def poll_hec_acks(self, ack_ids: list[int]) -> dict[str, bool]:
+        """
+        Asks HEC whether the data sent with each ackId has been indexed
+        :param ack_ids: the ackIds to check
+        :returns: mapping of each ackId (as a string) to whether it has been indexed
+        """
+        res = self.get_hec_session().post(
+            self.get_hec_url("services/collector/ack"),
+            json={"acks": ack_ids},
+            allow_redirects=True,
+            # As with replay, test servers use self-signed certificates
+            verify=False,
+        )
+        jsonResponse = json.loads(res.text)
+        if "acks" not in jsonResponse:
             raise (
                 Exception(
-                    f"key 'ackID' not present in response from HEC server: {jsonResponse}"
+                    f"Proper ackID structure not found for ackIDs {ack_ids} in {jsonResponse}"
                 )
             )
+        return jsonResponse["acks"]
 
-        ackId = jsonResponse["ackId"]
-        url_with_hec_ack_path = urllib.parse.urljoin(
-            url_with_port, "services/collector/ack"
+    def wait_for_hec_acks(self, ack_ids: list[int]) -> None:
+        """
+        Waits until HEC acknowledges that the data sent with each ackId has been indexed. The
+        ackIds of every replay on this instance are polled together by a single HecAckTracker.
+        :param ack_ids: the ackIds to wait for
+        """
+        with self._client_lock:
+            if self._hec_ack_tracker is None:
+                self._hec_ack_tracker = HecAckTracker(poll_acks=self.poll_hec_acks)
+        self.sync_obj.hecAckLatencies.extend(
+            self._hec_ack_tracker.wait(ack_ids, timeout=self.sync_obj.timeout_seconds)
         )
 
-        requested_acks = {"acks": [jsonResponse["ackId"]]}
-        while True:
-            try:
-                res = requests.post(
-                    url_with_hec_ack_path,
-                    json=requested_acks,
-                    allow_redirects=True,
-                    headers=headers,
-                    verify=verify_ssl,
-                )
+    def hec_raw_replay(
+        self,
+        tempfile: str,
+        attack_data_file: TestAttackData,
+        verify_ssl: bool = False,
+    ):
+        ack_ids = self.send_attack_data(tempfile, attack_data_file, verify_ssl)
+        with self.time_phase(DetectionTestingPhase.hec_ack_wait):
+            self.wait_for_hec_acks(ack_ids)
 
-                jsonResponse = json.loads(res.text)
+    def send_attack_data(
+        self,
+        tempfile: str,
+        attack_data_file: TestAttackData,
+        verify_ssl: bool = False,
+    ) -> list[int]:
+        """
+        Sends an attack data file to HEC, without waiting for it to be acknowledged
+        :returns: the ackIds of the data sent
+        """
+        if verify_ssl is False:
+            # need this, otherwise every request made with the requests module
+            # and verify=False will print an error to the command line
+            disable_warnings()
 
-                if "acks" in jsonResponse and str(ackId) in jsonResponse["acks"]:
-                    if jsonResponse["acks"][str(ackId)] is True:
-                        # ackID has been found for our request, we can return as the data has been replayed
-                        return
-                    else:
-                        # ackID is not yet true, we will wait some more
-                        time.sleep(2)
+        url_params = {
+            "index": attack_data_file.custom_index or self.get_replay_index(),
+            "source": attack_data_file.source,
+            "sourcetype": attack_data_file.sourcetype,
+            "host": attack_data_file.host or self.get_replay_host(),
+        }
 
-                else:
-                    raise (
-                        Exception(
-                            f"Proper ackID structure not found for ackID {ackId} in {jsonResponse}"
+        # Large files may be split on line boundaries and posted in parallel. Each post receives
+        # its own ackId.
+        ranges = self.get_replay_ranges(
+            tempfile, self.global_config.hec_replay_parallel_chunk_mb * 1024 * 1024
+        )
+        with self.time_phase(DetectionTestingPhase.replay):
+            if len(ranges) == 1:
+                ack_ids = [
+                    self.hec_post_range(
+                        tempfile, ranges[0][0], ranges[0][1], url_params, verify_ssl
+                    )
+                ]
+            else:
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.global_config.hec_replay_max_parallel_posts
+                ) as replay_pool:
+                    ack_ids = list(
+                        replay_pool.map(
+                            lambda r: self.hec_post_range(
+                                tempfile, r[0], r[1], url_params, verify_ssl
+                            ),
+                            ranges,
                         )
                     )
-            except Exception as e:
-                raise (Exception(f"There was an exception in the post: {e!s}"))
+        return ack_ids
 
     def status(self):
         pass
 
+    def stop_background_workers(self) -> None:
+        """
+        Stops the threads shared by every slot on this instance, waiting (for a bounded time) for
+        any ephemeral indexes and integration test events which are still scheduled for removal to
+        be removed
+        """
+        if self._hec_ack_tracker is not None:
+            self._hec_ack_tracker.stop()
+        if self._search_job_poller is not None:
+            self._search_job_poller.stop()
+        if self._correlation_search_batch is not None:
+            self._correlation_search_batch.stop()
+        if self._correlation_search_janitor is not None:
+            self._correlation_search_janitor.close(
+                timeout=self.sync_obj.timeout_seconds
+            )
+        if self._index_reaper is not None:
+            self._index_reaper.close(timeout=self.sync_obj.timeout_seconds)
+
     def finish(self):
+        self.stop_background_workers()
+        self._connection_pool.close()
         self.pbar.bar_format = (
             f"Finished running tests on instance: [{self.get_name()}]"
         )
@@ -1,17 +1,44 @@
+import pathlib
+import threading
+from typing import Optional
+
 import docker
+import docker.errors
 import docker.models.containers
+import docker.models.images
 import docker.models.resource
 import docker.types
+from pydantic import PrivateAttr
 
 from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructure import (
     DetectionTestingInfrastructure,
 )
 from contentctl.objects.config import test
 
+# /opt/splunk/etc is a volume in the Splunk image, so its contents are not saved when a container
+# is committed. A copy is saved outside of the volume instead, and restored into the volume the
+# first time a container created from the snapshot starts.
+SPLUNK_ETC_PATH = "/opt/splunk/etc"
+SNAPSHOT_ETC_PATH = "/opt/contentctl_snapshot/etc"
+SNAPSHOT_RESTORED_MARKER = f"{SPLUNK_ETC_PATH}/.contentctl_snapshot_restored"
+SNAPSHOT_RESTORE_SCRIPT = (
+    f"if [ ! -f {SNAPSHOT_RESTORED_MARKER} ]; then "
+    'SUDO=""; [ "$(id -u)" = "0" ] || SUDO="sudo -n"; '
+    f"$SUDO cp -a {SNAPSHOT_ETC_PATH}/. {SPLUNK_ETC_PATH}/ && "
+    f"$SUDO touch {SNAPSHOT_RESTORED_MARKER} || exit 1; "
+    'fi; exec "$@"'
+)
+
+# Only one container saves the snapshot, even when several finish setup at the same time
+SNAPSHOT_LOCK = threading.Lock()
+
 
 class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
     global_config: test
     container: docker.models.resource.Model = None
+    # Whether the container was created from a snapshot, so is already configured
+    _from_snapshot: bool = PrivateAttr(default=False)
+    _base_image_id: Optional[str] = PrivateAttr(default=None)
 
     def start(self):
         if self.global_config.container_settings.leave_running:
@@ -21,6 +48,10 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
                 self.container = self.get_docker_client().containers.get(
                     self.get_name()
                 )
+                self._from_snapshot = (
+                    self.global_config.snapshot
+                    and self.get_snapshot_image_tag() in self.container.image.tags
+                )
                 return
             except Exception:
                 # We did not find the container running, we will set it up
@@ -29,7 +60,134 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
         self.container = self.make_container()
         self.container.start()
 
+    def get_primary_setup_functions(self):
+        setup_functions = super().get_primary_setup_functions()
+        if not self.global_config.snapshot:
+            return setup_functions
+
+        if self._from_snapshot:
+            # This configuration was saved in the snapshot, so does not need to be repeated
+            persisted = [
+                self.configure_conf_file_datamodels,
+                self.create_replay_index,
+                self.configure_imported_roles,
+                self.configure_delete_indexes,
+            ]
+            setup_functions = [
+                (func, msg) for func, msg in setup_functions if func not in persisted
+            ]
+            snapshot_functions = []
+        else:
+            snapshot_functions = [(self.create_snapshot, "Creating Snapshot")]
+
+        # The snapshot never includes the app being tested, so it is installed once the rest of
+        # the setup is complete
+        return [
+            *setup_functions[:-1],
+            *snapshot_functions,
+            (self.install_app, "Installing App"),
+            setup_functions[-1],
+        ]
+
+    def get_base_image_id(self) -> str:
+        """
+        :returns: the ID of the local full_image_path image, which the manager pulls before the
+            containers are created. Unlike its tag, the ID changes when a new image is pulled.
+        """
+        if self._base_image_id is None:
+            image_path = self.global_config.container_settings.full_image_path
+            try:
+                self._base_image_id = self.get_docker_client().images.get(image_path).id
+            except Exception as e:
+                raise Exception(f"Error getting the ID of image [{image_path}]: {e!s}")
+        return self._base_image_id
+
+    def get_snapshot_image_tag(self) -> str:
+        return self.global_config.getSnapshotImageTag(self.get_base_image_id())
+
+    def get_snapshot_image(self) -> Optional[docker.models.images.Image]:
+        try:
+            return self.get_docker_client().images.get(self.get_snapshot_image_tag())
+        except docker.errors.ImageNotFound:
+            return None
+
+    def create_snapshot(self) -> None:
+        """
+        Saves the configured container as a local image, unless a snapshot for the current
+        configuration already exists. Testing can continue without a snapshot, so failures are
+        reported rather than raised.
+        """
+        with SNAPSHOT_LOCK:
+            try:
+                if self.get_snapshot_image() is not None:
+                    return
+
+                exit_code, output = self.container.exec_run(
+                    [
+                        "sh",
+                        "-c",
+                        f"rm -rf {SNAPSHOT_ETC_PATH} && "
+                        f"mkdir -p {pathlib.PurePosixPath(SNAPSHOT_ETC_PATH).parent} && "
+                        f"cp -a {SPLUNK_ETC_PATH} {SNAPSHOT_ETC_PATH}",
+                    ],
+                    user="root",
+                )
+                if exit_code != 0:
+                    raise Exception(
+                        f"copying {SPLUNK_ETC_PATH} failed: {output.decode(errors='replace')}"
+                    )
+
+                self.container.reload()
+                container_config = self.container.attrs["Config"]
+                repository, tag = self.get_snapshot_image_tag().rsplit(":", 1)
+                self.container.commit(
+                    repository=repository,
+                    tag=tag,
+                    message="Configured by contentctl test --snapshot",
+                    conf={
+                        "Entrypoint": [
+                            "/bin/sh",
+                            "-c",
+                            SNAPSHOT_RESTORE_SCRIPT,
+                            "contentctl_snapshot_restore",
+                            *(container_config.get("Entrypoint") or []),
+                        ],
+                        "Cmd": container_config.get("Cmd"),
+                    },
+                )
+                self.pbar.write(
+                    f"Saved snapshot [{repository}:{tag}] of container [{self.get_name()}]"
+                )
+            except Exception as e:
+                self.pbar.write(
+                    f"Warning - failed to save a snapshot of container [{self.get_name()}], "
+                    f"the next test run will set up its containers from scratch: {e!s}"
+                )
+
+    def install_app(self) -> None:
+        """
+        Installs the app being tested from the directory of staged apps mounted in the container
+        """
+        app_path = (
+            self.global_config.getContainerAppDir()
+            / pathlib.Path(
+                self.global_config.app.getApp(self.global_config, stage_file=False)
+            ).name
+        )
+        try:
+            conn = self.get_conn()
+            conn.post(
+                "apps/local", name=app_path.as_posix(), filename=True, update=True
+            )
+            if conn.restart_required:
+                conn.restart(timeout=self.sync_obj.timeout_seconds)
+                self._connection_pool.reset()
+        except Exception as e:
+            raise Exception(f"Error installing app [{app_path}]: {e!s}")
+
     def finish(self):
+        # Background workers may still be using the container, so stop them before removing it
+        self.stop_background_workers()
         if self.container is not None:
             try:
                 self.removeContainer()
@@ -41,6 +199,15 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
     def get_name(self) -> str:
         return self.infrastructure.instance_name
 
+    def get_history_key(self) -> str:
+        # Containers are recreated for every test run, so they are identified by their image
+        return f"container:{self.global_config.container_settings.full_image_path}"
+
+    def get_environment_key(self) -> str:
+        # The tag moves when a new image is published, so results are only reused on the image
+        # they were tested on
+        return f"{self.get_history_key()}@{self.get_base_image_id()}"
+
     def get_docker_client(self):
         try:
             c = docker.client.from_env()
@@ -74,6 +241,11 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
         # First, make sure that the container has been removed if it already existed
         self.removeContainer()
 
+        image = self.global_config.container_settings.full_image_path
+        if self.global_config.snapshot and self.get_snapshot_image() is not None:
+            image = self.get_snapshot_image_tag()
+            self._from_snapshot = True
+
         ports_dict = {
             "8000/tcp": self.infrastructure.web_ui_port,
             "8088/tcp": self.infrastructure.hec_port,
@@ -93,12 +265,18 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
         environment["SPLUNK_START_ARGS"] = "--accept-license"
         environment["SPLUNK_PASSWORD"] = self.infrastructure.splunk_app_password
         # Files have already been staged by the time that we call this. Files must only be staged
-        # once, not staged by every container
-        environment["SPLUNK_APPS_URL"] = (
-            self.global_config.getContainerEnvironmentString(stage_file=False)
-        )
+        # once, not staged by every container. Apps are already installed in a snapshot, and the
+        # app being tested is installed after setup when snapshots are enabled.
+        if not self._from_snapshot:
+            environment["SPLUNK_APPS_URL"] = (
+                self.global_config.getContainerEnvironmentString(
+                    stage_file=False,
+                    include_custom_app=not self.global_config.snapshot,
+                )
+            )
         if (
-            self.global_config.splunk_api_username is not None
+            not self._from_snapshot
+            and self.global_config.splunk_api_username is not None
             and self.global_config.splunk_api_password is not None
         ):
             environment["SPLUNKBASE_USERNAME"] = self.global_config.splunk_api_username
@@ -116,13 +294,13 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
                 f"{environment_string} "
                 f" --name {self.get_name()} "
                 f"--platform linux/amd64 "
-                f"{self.global_config.container_settings.full_image_path}\n\n"
+                f"{image}\n\n"
             )
 
         # emit_docker_run_equivalent()
 
         container = self.get_docker_client().containers.create(
-            self.global_config.container_settings.full_image_path,
+            image,
             ports=ports_dict,
             environment=environment,
             name=self.get_name(),
@@ -139,6 +317,7 @@ class DetectionTestingInfrastructureContainer(DetectionTestingInfrastructure):
         print(
             f"\nStarted container with the following information:\n"
             f"\tname    : [{self.get_name()}]\n"
+            f"\timage   : [{image}]\n"
             f"\taddress : [{address}]\n"
             f"\tusername: [{self.infrastructure.splunk_app_username}]\n"
             f"\tpassword: [{self.infrastructure.splunk_app_password}]\n"
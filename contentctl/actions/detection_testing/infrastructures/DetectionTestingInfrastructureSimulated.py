@@ -0,0 +1,83 @@
+import configparser
+from typing import Optional
+
+from pydantic import PrivateAttr
+
+from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructure import (
+    DetectionTestingInfrastructure,
+)
+from contentctl.actions.detection_testing.SimulatedSplunkServer import (
+    SimulatedSplunkScript,
+    SimulatedSplunkServer,
+)
+from contentctl.objects.config import test_simulated
+
+
+class DetectionTestingInfrastructureSimulated(DetectionTestingInfrastructure):
+    """
+    Tests against a SimulatedSplunkServer running in this process, rather than a real Splunk
+    server, to measure the overhead of the test harness itself
+    """
+
+    global_config: test_simulated
+    _server: Optional[SimulatedSplunkServer] = PrivateAttr(default=None)
+
+    def start(self):
+        if self.global_config.simulation_script is not None:
+            script = SimulatedSplunkScript.load(self.global_config.simulation_script)
+        else:
+            script = SimulatedSplunkScript()
+        if len(script.saved_searches) == 0:
+            # Serve the correlation searches of the app being tested, as if it were installed
+            script.saved_searches = self.get_app_saved_searches()
+
+        self._server = SimulatedSplunkServer(
+            script=script,
+            username=self.infrastructure.splunk_app_username,
+            password=self.infrastructure.splunk_app_password,
+            host=self.infrastructure.instance_address,
+        )
+        self._server.start()
+        self.infrastructure.api_port = self._server.api_port
+        self.infrastructure.hec_port = self._server.hec_port
+
+    def get_app_saved_searches(self) -> dict[str, dict[str, str]]:
+        """
+        :returns: the settings of each saved search in the built app, including those inherited
+            from its default stanza, keyed by name
+        """
+        conf_path = (
+            self.global_config.getPackageDirectoryPath()
+            / "default"
+            / "savedsearches.conf"
+        )
+        if not conf_path.is_file():
+            return {}
+        parser = configparser.ConfigParser(interpolation=None, strict=False)
+        # Setting names are case sensitive
+        parser.optionxform = str  # type: ignore
+        try:
+            parser.read(conf_path)
+        except Exception as e:
+            raise Exception(f"Error reading saved searches from '{conf_path}': {e!s}")
+        defaults = dict(parser["default"]) if parser.has_section("default") else {}
+        return {
+            name: {**defaults, **parser[name]}
+            for name in parser.sections()
+            if name != "default"
+        }
+
+    def get_scheme(self) -> str:
+        return "http"
+
+    def finish(self):
+        super().finish()
+        if self._server is not None:
+            self._server.close()
+
+    def get_name(self) -> str:
+        return self.infrastructure.instance_name
+
+    def get_history_key(self) -> str:
+        # Durations measured against a simulated server say nothing about real servers
+        return "simulated"
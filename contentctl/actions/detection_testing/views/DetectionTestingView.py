@@ -1,5 +1,6 @@
 import abc
 import datetime
+import time
 from typing import Any
 
 from pydantic import BaseModel
@@ -10,8 +11,13 @@ from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfras
 from contentctl.helper.utils import Utils
 from contentctl.objects.base_test_result import TestResultStatus
 from contentctl.objects.config import test_common
+from contentctl.objects.detection import Detection
 from contentctl.objects.enums import ContentStatus
 
+# Upper bounds, in seconds, of the buckets of the histogram of the latency of each REST API
+# endpoint in the summary
+REST_LATENCY_HISTOGRAM_BUCKETS_SECONDS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10]
+
 
 class DetectionTestingView(BaseModel, abc.ABC):
     config: test_common
@@ -49,6 +55,68 @@ class DetectionTestingView(BaseModel, abc.ABC):
         runtime -= datetime.timedelta(microseconds=runtime.microseconds)
         return runtime
 
+    def getExpectedRemainingTime(self) -> datetime.timedelta | None:
+        """
+        Estimates the remaining test time from the expected duration of each detection which
+        has not finished testing. Expected durations come from the test history (or a heuristic)
+        and are scaled by how long the detections tested so far actually took compared to
+        their expectation, since the speed of the test infrastructure varies between runs.
+        :returns: the remaining time, or None if no detection has finished testing yet
+        """
+        expected = self.sync_obj.expectedDurations
+        actual = self.sync_obj.actualDurations.copy()
+        completed = [name for name in actual if expected.get(name, 0) > 0]
+        if len(completed) == 0:
+            return None
+        speed_ratio = sum(actual[name] for name in completed) / sum(
+            expected[name] for name in completed
+        )
+
+        # Detections being tested are, on average, half done. Instances which are still being set
+        # up report their setup status here rather than a detection, so those are skipped.
+        remaining_seconds = sum(
+            expected.get(detection.name, 0) for detection in self.sync_obj.inputQueue
+        ) + 0.5 * sum(
+            expected.get(detection.name, 0)
+            for detection in list(self.sync_obj.currentTestingQueue.values())
+            if isinstance(detection, Detection)
+        )
+        num_slots = (
+            self.getRunningInstanceCount()
+            * self.config.concurrent_test_groups_per_instance
+        )
+        remaining_time = datetime.timedelta(
+            seconds=round(remaining_seconds * speed_ratio / num_slots)
+        )
+        return remaining_time
+
+    def getRunningInstanceCount(self) -> int:
+        """
+        :returns: the number of instances currently testing, or the number of configured
+            instances if none have started testing yet
+        """
+        running = [
+            name
+            for name in list(self.sync_obj.instanceStartTimes)
+            if name not in self.sync_obj.instanceEndTimes
+        ]
+        if len(running) == 0:
+            return max(len(self.config.test_instances), 1)
+        return len(running)
+
+    def getInstanceThroughput(self) -> dict[str, float]:
+        """
+        :returns: the number of detections tested per minute by each instance which has started
+            testing, keyed by instance name
+        """
+        now = time.time()
+        throughput: dict[str, float] = {}
+        for name, start_time in list(self.sync_obj.instanceStartTimes.items()):
+            end_time = self.sync_obj.instanceEndTimes.get(name, now)
+            completed = len(self.sync_obj.instanceCompletionTimes.get(name, []))
+            throughput[name] = round(completed * 60 / max(end_time - start_time, 1), 2)
+        return throughput
+
     def getETA(self) -> datetime.timedelta:
         summary = self.getSummaryObject()
 
@@ -60,6 +128,10 @@ class DetectionTestingView(BaseModel, abc.ABC):
         elif num_untested == 0:
             raise Exception("Finishing test")
 
+        remaining_time = self.getExpectedRemainingTime()
+        if remaining_time is not None:
+            return remaining_time
+
         try:
             runtime = self.getRuntime()
             time_per_detection = runtime / num_tested
@@ -71,6 +143,30 @@ class DetectionTestingView(BaseModel, abc.ABC):
             raise Exception("Unknown ETA")
         return remaining_time
 
+    def getRestRequestMetrics(self) -> dict[str, dict[str, Any]]:
+        """
+        Summarizes the requests made to the REST API of every instance
+        :returns: the number of requests to each endpoint, and the mean, max and a histogram of
+            their latency in seconds
+        """
+        metrics: dict[str, dict[str, Any]] = {}
+        for endpoint, latencies in sorted(
+            list(self.sync_obj.restRequestLatencies.items())
+        ):
+            if len(latencies) == 0:
+                continue
+            histogram: dict[str, int] = {}
+            for bound in REST_LATENCY_HISTOGRAM_BUCKETS_SECONDS:
+                histogram[f"le_{bound}"] = len([x for x in latencies if x <= bound])
+            histogram["le_inf"] = len(latencies)
+            metrics[endpoint] = {
+                "count": len(latencies),
+                "mean": round(sum(latencies) / len(latencies), 3),
+                "max": round(max(latencies), 3),
+                "histogram": histogram,
+            }
+        return metrics
+
     def getSummaryObject(
         self,
         test_result_fields: list[str] = [
@@ -99,6 +195,7 @@ class DetectionTestingView(BaseModel, abc.ABC):
         total_experimental = 0
         total_deprecated = 0
         total_manual = 0
+        total_cached = 0
 
         # Iterate the detections tested (anything in the output queue was tested)
         for detection in self.sync_obj.outputQueue:
@@ -127,6 +224,11 @@ class DetectionTestingView(BaseModel, abc.ABC):
             if detection.tags.manual_test is not None:
                 total_manual += 1
 
+            # Mark the detections whose results were reused from a previous test run
+            if detection.name in self.sync_obj.cachedDetections:
+                summary["cached"] = True
+                total_cached += 1
+
             # Append to our list (skipped or tested)
             if detection.test_status == TestResultStatus.SKIP:
                 skipped_detections.append(summary)
@@ -166,13 +268,15 @@ class DetectionTestingView(BaseModel, abc.ABC):
 
         # Compute the percentage of completion for testing, as well as the success rate
         percent_complete = Utils.getPercent(
-            len(tested_detections), len(untested_detections), 1
+            len(tested_detections),
+            len(tested_detections) + len(untested_detections),
+            1,
         )
         success_rate = Utils.getPercent(total_pass, total_tested_detections, 1)
 
         # TODO (#230): expand testing metrics reported (and make nested)
         # Construct and return the larger results dict
-        result_dict = {
+        result_dict: dict[str, Any] = {
             "summary": {
                 "mode": self.config.mode.mode_name,
                 "enable_integration_testing": self.config.enable_integration_testing,
@@ -187,6 +291,7 @@ class DetectionTestingView(BaseModel, abc.ABC):
                 "total_experimental": total_experimental,
                 "total_deprecated": total_deprecated,
                 "total_manual": total_manual,
+                "total_cached": total_cached,
                 "success_rate": success_rate,
             },
             "tested_detections": tested_detections,
@@ -194,4 +299,40 @@ class DetectionTestingView(BaseModel, abc.ABC):
             "untested_detections": untested_detections,
             "percent_complete": percent_complete,
         }
+
+        # Record which shard of a sharded test run this is, and how many detections were divided
+        # between the shards, so that shards can be merged and checked for missing detections
+        if self.config.shard is not None:
+            result_dict["summary"]["shard"] = self.config.shard
+            if self.sync_obj.unshardedDetectionCount is not None:
+                result_dict["summary"]["unsharded_detection_count"] = (
+                    self.sync_obj.unshardedDetectionCount
+                )
+
+        # Report how long HEC took to acknowledge replayed attack data, if any was replayed
+        ack_latencies = sorted(self.sync_obj.hecAckLatencies)
+        if len(ack_latencies) > 0:
+            result_dict["summary"]["hec_ack_latency_seconds"] = {
+                "count": len(ack_latencies),
+                "mean": round(sum(ack_latencies) / len(ack_latencies), 3),
+                "p50": round(ack_latencies[len(ack_latencies) // 2], 3),
+                "p95": round(ack_latencies[int(len(ack_latencies) * 0.95)], 3),
+                "max": round(ack_latencies[-1], 3),
+            }
+
+        # Report the time spent on each kind of traced span, if the test run was traced
+        if self.sync_obj.tracer is not None:
+            result_dict["summary"]["trace_breakdown"] = (
+                self.sync_obj.tracer.get_breakdown()
+            )
+
+        rest_requests = self.getRestRequestMetrics()
+        if len(rest_requests) > 0:
+            result_dict["summary"]["rest_api_requests"] = rest_requests
+
+        instance_throughput = self.getInstanceThroughput()
+        if len(instance_throughput) > 0:
+            result_dict["summary"]["instance_throughput_per_minute"] = (
+                instance_throughput
+            )
         return result_dict
@@ -27,6 +27,15 @@ class DetectionTestingViewCLI(DetectionTestingView, arbitrary_types_allowed=True
         self.pbar.bar_format = (
             f"Completed {ratio} {bar} | Elapsed: {et} | Remaining: {etr}"
         )
+
+        instance_throughput = self.getInstanceThroughput()
+        if len(instance_throughput) > 0:
+            self.pbar.bar_format += (
+                f" | {sum(instance_throughput.values()):.1f}/min on "
+                f"{self.getRunningInstanceCount()} instance(s)"
+            )
+        if self.sync_obj.hostResourceUsage is not None:
+            self.pbar.bar_format += f" | Host: {self.sync_obj.hostResourceUsage!s}"
         self.pbar.reset(total=total_detections)
         self.pbar.update(completed_detections)
 
@@ -27,6 +27,26 @@ $(document).ready(function () {
 </script>
 </head>
 <body>
+<p>Host: {{ hostResourceUsage }}</p>
+<table id="instances" class="display" style="width:100%">
+    <thead>
+        <tr>
+            <th>Instance Name</th>
+            <th>Detections Tested</th>
+            <th>Detections per Minute</th>
+        </tr>
+    </thead>
+    <tbody>
+        {% for instanceName, throughput in instanceThroughput.items() %}
+        <tr>
+            <td>{{ instanceName }}</td>
+            <td>{{ instanceCompletionTimes.get(instanceName, [])|length }}</td>
+            <td>{{ throughput }}</td>
+        </tr>
+        {% endfor %}
+    </tbody>
+</table>
+
 <table id="runningTests" class="display" style="width:100%">
     <thead>
         <tr>
@@ -140,6 +160,9 @@ class DetectionTestingViewWeb(DetectionTestingView):
 
         res = jinja2_template.render(
             currentTestingQueue=self.sync_obj.currentTestingQueue,
+            hostResourceUsage=self.sync_obj.hostResourceUsage or "unknown",
+            instanceThroughput=self.getInstanceThroughput(),
+            instanceCompletionTimes=self.sync_obj.instanceCompletionTimes,
             percent_complete=summary_dict.get("percent_complete", 0),
             detections=summary_dict["tested_detections"],
         )
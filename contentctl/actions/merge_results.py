@@ -0,0 +1,274 @@
+import pathlib
+from collections import Counter
+from typing import Any
+
+import yaml
+
+from contentctl.helper.utils import Utils
+from contentctl.objects.config import merge_results
+
+# Counts in the summary of each shard which are summed to produce the merged summary
+SUMMED_SUMMARY_FIELDS = [
+    "total_detections",
+    "total_tested_detections",
+    "total_pass",
+    "total_fail",
+    "total_skipped",
+    "total_untested",
+    "total_production",
+    "total_experimental",
+    "total_deprecated",
+    "total_manual",
+    "total_cached",
+]
+
+
+class MergeResults:
+    def load_summary(self, summary_path: pathlib.Path) -> dict[str, Any]:
+        try:
+            with open(summary_path, "r") as summary_file:
+                summary: Any = yaml.safe_load(summary_file)
+        except Exception as e:
+            raise Exception(f"Error reading test summary '{summary_path}': {e!s}")
+        if not isinstance(summary, dict) or not isinstance(
+            summary.get("summary"), dict
+        ):
+            raise Exception(
+                f"'{summary_path}' does not appear to be a summary.yml written by contentctl test"
+            )
+        return summary
+
+    def merge(self, summaries: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Combine the summaries of the shards of a test run into a single summary, in the same
+        format as the summary of an unsharded test run
+        :param summaries: the summary of each shard
+        :returns: the merged summary
+        """
+        tested_detections: list[dict[str, Any]] = []
+        skipped_detections: list[dict[str, Any]] = []
+        untested_detections: list[dict[str, Any]] = []
+        for summary in summaries:
+            tested_detections.extend(summary.get("tested_detections") or [])
+            skipped_detections.extend(summary.get("skipped_detections") or [])
+            untested_detections.extend(summary.get("untested_detections") or [])
+
+        # Sort in the same order as the summary of a single test run
+        tested_detections.sort(key=lambda x: (x["success"], x["name"]))
+        skipped_detections.sort(
+            key=lambda x: (0 if len(x["tests"]) > 0 else 1, x["name"])
+        )
+        untested_detections.sort(key=lambda x: x["name"])
+
+        # Every shard must exist, and have succeeded, for the whole test run to succeed
+        shards = [summary["summary"].get("shard") for summary in summaries]
+        missing_shards = self.find_missing_shards(shards)
+
+        # Each runner assigns detections to shards based on its own previous results, so runners
+        # which saw different results may have tested a detection twice, or not at all
+        name_counts = Counter(
+            detection["name"]
+            for detection in tested_detections
+            + skipped_detections
+            + untested_detections
+        )
+        duplicate_detections = sorted(
+            name for name, count in name_counts.items() if count > 1
+        )
+        missing_detection_count = self.count_missing_detections(
+            summaries, len(name_counts)
+        )
+        merged_summary: dict[str, Any] = {
+            "mode": summaries[0]["summary"].get("mode"),
+            "enable_integration_testing": summaries[0]["summary"].get(
+                "enable_integration_testing"
+            ),
+            "success": all(
+                summary["summary"].get("success", False) for summary in summaries
+            )
+            and len(missing_shards) == 0
+            and len(duplicate_detections) == 0
+            and missing_detection_count == 0,
+        }
+        for field in SUMMED_SUMMARY_FIELDS:
+            merged_summary[field] = sum(
+                summary["summary"].get(field, 0) for summary in summaries
+            )
+        merged_summary["success_rate"] = Utils.getPercent(
+            merged_summary["total_pass"], merged_summary["total_tested_detections"], 1
+        )
+        merged_summary["shards"] = shards
+        if len(missing_shards) > 0:
+            merged_summary["missing_shards"] = missing_shards
+        if len(duplicate_detections) > 0:
+            merged_summary["duplicate_detections"] = duplicate_detections
+        if missing_detection_count > 0:
+            merged_summary["missing_detection_count"] = missing_detection_count
+
+        # Percentiles cannot be combined, so only the count, mean and max are reported
+        ack_latencies = [
+            summary["summary"]["hec_ack_latency_seconds"]
+            for summary in summaries
+            if "hec_ack_latency_seconds" in summary["summary"]
+        ]
+        if len(ack_latencies) > 0:
+            count = sum(latency["count"] for latency in ack_latencies)
+            merged_summary["hec_ack_latency_seconds"] = {
+                "count": count,
+                "mean": round(
+                    sum(latency["mean"] * latency["count"] for latency in ack_latencies)
+                    / count,
+                    3,
+                ),
+                "max": max(latency["max"] for latency in ack_latencies),
+            }
+
+        rest_requests: dict[str, dict[str, Any]] = {}
+        for summary in summaries:
+            for endpoint, metrics in (
+                summary["summary"].get("rest_api_requests") or {}
+            ).items():
+                if endpoint not in rest_requests:
+                    rest_requests[endpoint] = {
+                        "count": 0,
+                        "mean": 0.0,
+                        "max": 0.0,
+                        "histogram": {},
+                    }
+                merged = rest_requests[endpoint]
+                count = merged["count"] + metrics["count"]
+                merged["mean"] = round(
+                    (
+                        merged["mean"] * merged["count"]
+                        + metrics["mean"] * metrics["count"]
+                    )
+                    / count,
+                    3,
+                )
+                merged["count"] = count
+                merged["max"] = max(merged["max"], metrics["max"])
+                for bucket, bucket_count in metrics["histogram"].items():
+                    merged["histogram"][bucket] = (
+                        merged["histogram"].get(bucket, 0) + bucket_count
+                    )
+        if len(rest_requests) > 0:
+            merged_summary["rest_api_requests"] = dict(sorted(rest_requests.items()))
+
+        trace_breakdown: dict[str, dict[str, Any]] = {}
+        for summary in summaries:
+            for key, span_totals in (
+                summary["summary"].get("trace_breakdown") or {}
+            ).items():
+                merged = trace_breakdown.setdefault(
+                    key, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                )
+                merged["count"] += span_totals["count"]
+                merged["total_seconds"] = round(
+                    merged["total_seconds"] + span_totals["total_seconds"], 2
+                )
+                merged["max_seconds"] = max(
+                    merged["max_seconds"], span_totals["max_seconds"]
+                )
+        if len(trace_breakdown) > 0:
+            merged_summary["trace_breakdown"] = {
+                key: {
+                    "count": span_totals["count"],
+                    "total_seconds": span_totals["total_seconds"],
+                    "mean_seconds": round(
+                        span_totals["total_seconds"] / span_totals["count"], 2
+                    ),
+                    "max_seconds": span_totals["max_seconds"],
+                }
+                for key, span_totals in sorted(
+                    trace_breakdown.items(),
+                    key=lambda item: item[1]["total_seconds"],
+                    reverse=True,
+                )
+            }
+
+        # Instance names are only unique within a shard
+        instance_throughput: dict[str, float] = {}
+        for index, summary in enumerate(summaries):
+            shard = summary["summary"].get("shard") or str(index + 1)
+            for name, throughput in (
+                summary["summary"].get("instance_throughput_per_minute") or {}
+            ).items():
+                instance_throughput[f"{shard}:{name}"] = throughput
+        if len(instance_throughput) > 0:
+            merged_summary["instance_throughput_per_minute"] = instance_throughput
+
+        return {
+            "summary": merged_summary,
+            "tested_detections": tested_detections,
+            "skipped_detections": skipped_detections,
+            "untested_detections": untested_detections,
+            "percent_complete": Utils.getPercent(
+                len(tested_detections),
+                len(tested_detections) + len(untested_detections),
+                1,
+            ),
+        }
+
+    def find_missing_shards(self, shards: list[str | None]) -> list[str]:
+        """
+        :param shards: the shard ('i/N') which produced each summary, or None if the test run
+            was not sharded
+        :returns: the shards of the same test run which do not have a summary
+        """
+        shard_counts = {int(shard.split("/")[1]) for shard in shards if shard}
+        if len(shard_counts) != 1:
+            # Summaries which were not sharded, or were sharded differently, cannot be checked
+            return []
+        shard_count = shard_counts.pop()
+        return [
+            f"{i}/{shard_count}"
+            for i in range(1, shard_count + 1)
+            if f"{i}/{shard_count}" not in shards
+        ]
+
+    def count_missing_detections(
+        self, summaries: list[dict[str, Any]], merged_detection_count: int
+    ) -> int:
+        """
+        :param summaries: the summary of each shard
+        :param merged_detection_count: how many distinct detections the summaries report
+        :returns: how many of the detections divided between the shards are not reported by any
+            of them, or 0 if the summaries do not record how many detections were divided
+        """
+        unsharded_counts = [
+            summary["summary"].get("unsharded_detection_count") for summary in summaries
+        ]
+        if any(count is None for count in unsharded_counts):
+            return 0
+        return max(0, max(unsharded_counts) - merged_detection_count)
+
+    def execute(self, config: merge_results) -> bool:
+        if len(config.summaries) == 0:
+            raise Exception("At least one summary file must be provided to merge")
+
+        summaries = [self.load_summary(path) for path in config.summaries]
+        merged = self.merge(summaries)
+
+        config.output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(config.output_file, "w") as output:
+            output.write(yaml.safe_dump(merged, sort_keys=False))
+
+        summary = merged["summary"]
+        print(
+            f"Merged [{len(summaries)}] test summaries into [{config.output_file}]\n"
+            f"\tSuccess                      : {summary['success']}\n"
+            f"\tSuccess Rate                 : {summary['success_rate']}\n"
+            f"\tTotal Detections             : {summary['total_detections']}\n"
+            f"\t  Passed Detections          : {summary['total_pass']}\n"
+            f"\t  Failed Detections          : {summary['total_fail']}\n"
+            f"\tUntested Detections          : {summary['total_untested']}"
+        )
+        if "missing_shards" in summary:
+            print(f"\tMissing Shards               : {summary['missing_shards']}")
+        if "duplicate_detections" in summary:
+            print(f"\tDuplicate Detections         : {summary['duplicate_detections']}")
+        if "missing_detection_count" in summary:
+            print(
+                f"\tMissing Detections           : {summary['missing_detection_count']}"
+            )
+        return summary["success"]
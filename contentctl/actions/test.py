@@ -1,11 +1,18 @@
 import pathlib
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
+from contentctl.actions.detection_testing.DetectionTestingHistory import (
+    TEST_HISTORY_FILENAME,
+    DetectionTestingHistory,
+)
 from contentctl.actions.detection_testing.DetectionTestingManager import (
     DetectionTestingManager,
     DetectionTestingManagerInputDto,
 )
+from contentctl.actions.detection_testing.DetectionTestingScheduler import (
+    DetectionTestingScheduler,
+)
 from contentctl.actions.detection_testing.infrastructures.DetectionTestingInfrastructure import (
     DetectionTestingManagerOutputDto,
 )
@@ -13,12 +20,14 @@ from contentctl.actions.detection_testing.views.DetectionTestingViewCLI import (
     DetectionTestingViewCLI,
 )
 from contentctl.actions.detection_testing.views.DetectionTestingViewFile import (
+    OUTPUT_FILENAME,
+    OUTPUT_FOLDER,
     DetectionTestingViewFile,
 )
 from contentctl.actions.detection_testing.views.DetectionTestingViewWeb import (
     DetectionTestingViewWeb,
 )
-from contentctl.objects.config import Changes, Selected, test_servers
+from contentctl.objects.config import Changes, Selected, test_servers, test_simulated
 from contentctl.objects.config import test as test_
 from contentctl.objects.detection import Detection
 from contentctl.objects.integration_test import IntegrationTest
@@ -29,7 +38,9 @@ MAXIMUM_CONFIGURATION_TIME_SECONDS = 600
 @dataclass(frozen=True)
 class TestInputDto:
     detections: List[Detection]
-    config: test_ | test_servers
+    config: test_ | test_servers | test_simulated
+    # How many detections were selected by mode, before only one shard of them was selected
+    unsharded_detection_count: Optional[int] = None
 
 
 class Test:
@@ -50,8 +61,53 @@ class Test:
                     if isinstance(test, IntegrationTest):
                         test.skip("TEST SKIPPED: Skipping all integration tests")
 
+    def select_shard(
+        self,
+        config: test_ | test_servers | test_simulated,
+        detections: List[Detection],
+    ) -> List[Detection]:
+        """
+        If sharding has been enabled, select the detections in this shard. Otherwise, return
+        all of the detections.
+
+        Args:
+            config (test_ | test_servers | test_simulated): The test configuration
+            detections (List[Detection]): The detections selected by the test mode
+
+        Returns:
+            List[Detection]: The detections to test
+        """
+        shard = config.getShard()
+        if shard is None:
+            return detections
+
+        history = None
+        if not config.disable_test_history:
+            history = DetectionTestingHistory(
+                database_path=pathlib.Path(".") / OUTPUT_FOLDER / TEST_HISTORY_FILENAME
+            )
+        try:
+            scheduler = DetectionTestingScheduler.from_previous_runs(
+                pathlib.Path(".") / OUTPUT_FOLDER / OUTPUT_FILENAME,
+                config.enable_integration_testing,
+                history,
+                detections,
+            )
+        finally:
+            if history is not None:
+                history.close()
+
+        shard_detections = scheduler.shard(detections, *shard)
+        print(
+            f"SHARD: [{config.shard}] - Test [{len(shard_detections)}] of "
+            f"[{len(detections)}] detections"
+        )
+        return shard_detections
+
     def execute(self, input_dto: TestInputDto) -> bool:
-        output_dto = DetectionTestingManagerOutputDto()
+        output_dto = DetectionTestingManagerOutputDto(
+            unshardedDetectionCount=input_dto.unsharded_detection_count
+        )
 
         web = DetectionTestingViewWeb(config=input_dto.config, sync_obj=output_dto)
         cli = DetectionTestingViewCLI(config=input_dto.config, sync_obj=output_dto)
@@ -141,6 +197,9 @@ class Test:
             print(
                 f"\tUntested Detections          : {summary.get('total_untested', 'ERROR')}"
             )
+            print(
+                f"\tCached Detections            : {summary.get('total_cached', 'ERROR')}"
+            )
             print(f"\tTest Results File            : {file.getOutputFilePath()}")
             print(
                 "\nNOTE: skipped detections include non-production, manually tested, and certain\n"
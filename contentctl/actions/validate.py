@@ -61,6 +61,17 @@ class Validate:
         """
         lookupsDirectory = repo_path / "lookups"
 
+        # Compressed lookups (.csv.gz) are only ever produced by the build, based on the
+        # compress_lookups_larger_than setting. Committing one means that a build output
+        # was copied back into the repo, so give a more specific error than the one below.
+        compressedLookupFiles = sorted(lookupsDirectory.glob("**/*.gz"))
+        if len(compressedLookupFiles) > 0:
+            raise Exception(
+                f"The following compressed files exist in '{lookupsDirectory}': {[str(path) for path in compressedLookupFiles]}. "
+                "Lookups must be stored uncompressed (.csv) in the repo. Use the build option "
+                "compress_lookups_larger_than to ship them compressed in the app instead."
+            )
+
         # Get all of the files referenced by Lookups
         usedLookupFiles: list[pathlib.Path] = [
             lookup.filename
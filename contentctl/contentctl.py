@@ -12,6 +12,7 @@ from contentctl.actions.deploy_acs import Deploy
 from contentctl.actions.detection_testing.GitService import GitService
 from contentctl.actions.initialize import Initialize
 from contentctl.actions.inspect import Inspect
+from contentctl.actions.merge_results import MergeResults
 from contentctl.actions.new_content import NewContent
 from contentctl.actions.release_notes import ReleaseNotes
 from contentctl.actions.reporting import Reporting, ReportingInputDto
@@ -23,12 +24,14 @@ from contentctl.objects.config import (
     deploy_acs,
     init,
     inspect,
+    merge_results,
     new,
     release_notes,
     report,
     test,
     test_common,
     test_servers,
+    test_simulated,
     validate,
 )
 
@@ -125,9 +128,11 @@ def test_common_func(config: test_common):
     gitServer = GitService(director=director_output_dto, config=config)
     detections_to_test = gitServer.getContent()
 
-    test_input_dto = TestInputDto(detections_to_test, config)
-
     t = Test()
+    unsharded_detection_count = len(detections_to_test)
+    detections_to_test = t.select_shard(config, detections_to_test)
+
+    test_input_dto = TestInputDto(detections_to_test, config, unsharded_detection_count)
     t.filter_tests(test_input_dto)
 
     if config.plan_only:
@@ -144,6 +149,13 @@ def test_common_func(config: test_common):
     raise Exception("There was at least one unsuccessful test")
 
 
+def merge_results_func(config: merge_results) -> None:
+    success = MergeResults().execute(config)
+    if success:
+        return
+    raise Exception("There was at least one unsuccessful test")
+
+
 def get_random_compliment():
     compliments = [
         "Your detection rules are like a zero-day shield! 🛡️",
@@ -225,7 +237,9 @@ def main():
             "new": new.model_validate(config_obj),
             "test": test.model_validate(config_obj),
             "test_servers": test_servers.model_construct(**t.__dict__),
+            "test_simulated": test_simulated.model_construct(**t.__dict__),
             "release_notes": release_notes.model_construct(**config_obj),
+            "merge_results": merge_results.model_validate(config_obj),
             "deploy_acs": deploy_acs.model_construct(**t.__dict__),
             "recognize": RecognizeCommand(),
         }
@@ -256,8 +270,14 @@ def main():
         elif type(config) is deploy_acs:
             updated_config = deploy_acs.model_validate(config)
             deploy_acs_func(updated_config)
-        elif type(config) is test or type(config) is test_servers:
+        elif (
+            type(config) is test
+            or type(config) is test_servers
+            or type(config) is test_simulated
+        ):
             test_common_func(config)
+        elif type(config) is merge_results:
+            merge_results_func(config)
         elif type(config) is RecognizeCommand:
             recognize_func()
         else:
@@ -1,4 +1,7 @@
+import gzip
+import hashlib
 import logging
+import os
 import pathlib
 import random
 import shutil
@@ -7,6 +10,12 @@ from math import ceil
 from timeit import default_timer
 from typing import TYPE_CHECKING, Tuple, Union
 
+try:
+    import fcntl
+except ImportError:
+    # fcntl is not available on Windows. clone_file will fall back to a regular copy.
+    fcntl = None
+
 import git
 import requests
 import tqdm
@@ -18,6 +27,9 @@ from contentctl.objects.security_content_object import SecurityContentObject
 TOTAL_BYTES = 0
 ALWAYS_PULL = True
 
+# ioctl request number for FICLONE on Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
 
 class Utils:
     @staticmethod
@@ -332,6 +344,80 @@ class Utils:
         if verbose_print:
             print("Done")
 
+    @staticmethod
+    def clone_file(
+        source_file: pathlib.Path,
+        destination_file: pathlib.Path,
+        allow_hardlink: bool = True,
+    ) -> pathlib.Path:
+        """Make destination_file a copy of source_file as cheaply as the filesystem allows.
+        A hardlink is attempted first, then a copy-on-write clone (reflink, supported by
+        filesystems such as btrfs and XFS), and finally shutil.copy2, which uses sendfile
+        where the platform supports it. Any existing
+        destination_file is replaced. Callers must not modify either file in place
+        afterwards, since a hardlinked destination shares its contents with the source.
+        If the destination may be modified, for example because it is left in a directory
+        that users edit, pass allow_hardlink=False so that the files never share contents.
+
+        Args:
+            source_file (pathlib.Path): file to copy
+            destination_file (pathlib.Path): path of the copy to create
+            allow_hardlink (bool): whether destination_file may be a hardlink to source_file
+
+        Returns:
+            pathlib.Path: destination_file
+        """
+        if not source_file.is_file():
+            raise Exception(f"Cannot clone [{source_file}]: it is not a file")
+        destination_file.unlink(missing_ok=True)
+
+        if allow_hardlink:
+            try:
+                os.link(source_file, destination_file)
+                return destination_file
+            except OSError:
+                # Hardlinks are not supported on this filesystem or the files are on
+                # different devices. Fall through to the next strategy.
+                pass
+
+        if fcntl is not None:
+            try:
+                with (
+                    open(source_file, "rb") as src,
+                    open(destination_file, "wb") as dst,
+                ):
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(source_file, destination_file)
+                return destination_file
+            except OSError:
+                destination_file.unlink(missing_ok=True)
+
+        shutil.copy2(source_file, destination_file)
+        return destination_file
+
+    @staticmethod
+    def get_file_sha256(
+        file_path: pathlib.Path,
+        chunk_size: int = 1024 * 1024,
+        decompress_gzip: bool = False,
+    ) -> str:
+        """Compute the SHA256 of a file without reading the entire file into memory.
+
+        Args:
+            file_path (pathlib.Path): file to hash
+            chunk_size (int, optional): number of bytes to read at a time. Defaults to 1MiB.
+            decompress_gzip (bool, optional): hash the decompressed contents of a gzip file rather than the raw bytes. Defaults to False.
+
+        Returns:
+            str: hex digest of the file contents
+        """
+        sha256 = hashlib.sha256()
+        opener = gzip.open if decompress_gzip else open
+        with opener(file_path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
     @staticmethod
     def download_file_from_http(
         file_path: str,
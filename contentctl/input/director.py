@@ -174,36 +174,50 @@ class Director:
         self.buildDataSourceCsv()
         self.buildDeprecationRemovalCsv()
 
+    def getRuntimeCsvContext(self) -> dict[str, validate | DirectorOutputDto]:
+        # RuntimeCSVs are validated with the same context as the lookups read from disk, so
+        # that the config decides whether they are compressed in the app in the same way
+        return {
+            "output_dto": self.output_dto,
+            "config": self.input_dto,
+        }
+
     def buildDeprecationRemovalCsv(self):
         if self.input_dto.enforce_deprecation_mapping_requirement is False:
             # Do not build the CSV, it would be wasteful to include it if it
             # is not even used
             return
-        deprecation_lookup = RuntimeCSV(
-            name="deprecation_info",
-            id=UUID("99262bf2-9606-4b52-b377-c96713527b35"),
-            version=1,
-            author=self.input_dto.app.author_name,
-            description="A lookup file that contains information about content that has been deprecated or removed from the app.",
-            lookup_type=Lookup_Type.csv,
-            contents=RuntimeCsvWriter.generateDeprecationCSVContent(
-                self.output_dto, self.input_dto.app
-            ),
+        deprecation_lookup = RuntimeCSV.model_validate(
+            {
+                "name": "deprecation_info",
+                "id": UUID("99262bf2-9606-4b52-b377-c96713527b35"),
+                "version": 1,
+                "author": self.input_dto.app.author_name,
+                "description": "A lookup file that contains information about content that has been deprecated or removed from the app.",
+                "lookup_type": Lookup_Type.csv,
+                "contents": RuntimeCsvWriter.generateDeprecationCSVContent(
+                    self.output_dto, self.input_dto.app
+                ),
+            },
+            context=self.getRuntimeCsvContext(),
         )
         self.output_dto.addContentToDictMappings(deprecation_lookup)
 
     def buildDataSourceCsv(self):
-        datasource_lookup = RuntimeCSV(
-            name="data_sources",
-            id=UUID("b45c1403-6e09-47b0-824f-cf6e44f15ac8"),
-            version=1,
-            author=self.input_dto.app.author_name,
-            description="A lookup file that contains the data source objects for detections.",
-            lookup_type=Lookup_Type.csv,
-            case_sensitive_match=False,
-            contents=RuntimeCsvWriter.generateDatasourceCSVContent(
-                self.output_dto.data_sources
-            ),
+        datasource_lookup = RuntimeCSV.model_validate(
+            {
+                "name": "data_sources",
+                "id": UUID("b45c1403-6e09-47b0-824f-cf6e44f15ac8"),
+                "version": 1,
+                "author": self.input_dto.app.author_name,
+                "description": "A lookup file that contains the data source objects for detections.",
+                "lookup_type": Lookup_Type.csv,
+                "case_sensitive_match": False,
+                "contents": RuntimeCsvWriter.generateDatasourceCSVContent(
+                    self.output_dto.data_sources
+                ),
+            },
+            context=self.getRuntimeCsvContext(),
         )
         self.output_dto.addContentToDictMappings(datasource_lookup)
 
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import pathlib
 import random
 from abc import ABC, abstractmethod
@@ -524,11 +526,38 @@ class build(validate):
     build_path: DirectoryPath = Field(
         default=DirectoryPath("dist/"), title="Target path for all build outputs"
     )
+    verify_lookup_hashes: bool = Field(
+        default=False,
+        description="After staging each lookup file into the app, compute the "
+        "SHA256 of the source and the staged copy and fail the build if they "
+        "differ. This roughly doubles the I/O spent on lookups, so it "
+        "should only be enabled when the integrity of the build is in doubt.",
+    )
+    compress_lookups_larger_than: Optional[PositiveInt] = Field(
+        default=None,
+        description="CSV lookups whose size in bytes is strictly larger than "
+        "this value will be shipped gzip-compressed (.csv.gz) in the app, "
+        "which Splunk can read natively. This reduces the size of the app "
+        "and the time spent replicating it across a search head cluster. "
+        "If not set, no lookups are compressed.",
+    )
+    diff_against: Optional[FilePath] = Field(
+        default=None,
+        description="Path to the build manifest of a previous build. If provided, "
+        "the stanzas and files which were added, removed, or changed since that "
+        "build are printed and written next to the new build manifest.",
+    )
 
     @field_serializer("build_path", when_used="always")
     def serialize_build_path(path: DirectoryPath) -> str:
         return str(path)
 
+    @field_serializer("diff_against", when_used="always")
+    def serialize_diff_against(path: Optional[FilePath]) -> Optional[str]:
+        if path is None:
+            return None
+        return str(path)
+
     @field_validator("build_path", mode="before")
     @classmethod
     def ensure_build_path(cls, v: Union[str, DirectoryPath]):
@@ -549,6 +578,20 @@ class build(validate):
             v.mkdir(parents=True)
         return v
 
+    @model_validator(mode="after")
+    def ensure_diff_against_builds_app(self) -> Self:
+        """
+        The build manifest is only written when the app is built, so there is nothing to diff
+        against the previous manifest otherwise. Raise a descriptive exception rather than
+        silently ignoring diff_against.
+        """
+        if self.diff_against is not None and not self.build_app:
+            raise ValueError(
+                f"diff_against ({self.diff_against}) requires build_app to be enabled, since "
+                "the build manifest is only written when the app is built"
+            )
+        return self
+
     def getBuildDir(self) -> pathlib.Path:
         return self.path / self.build_path
 
@@ -564,6 +607,12 @@ class build(validate):
     def getAPIPath(self) -> pathlib.Path:
         return self.getBuildDir() / "api"
 
+    def getManifestFilePath(self) -> pathlib.Path:
+        return self.getBuildDir() / f"{self.app.appid}-build-manifest.json"
+
+    def getManifestDiffFilePath(self) -> pathlib.Path:
+        return self.getBuildDir() / f"{self.app.appid}-build-diff.json"
+
     def getAppTemplatePath(self) -> pathlib.Path:
         return self.path / "app_template"
 
@@ -740,6 +789,32 @@ class ContainerSettings(BaseModel):
             "resolve an issue with waiting to run until app installation completes."
         ),
     )
+    autoscale: bool = Field(
+        default=False,
+        description="Start only warm_pool_size containers, then add more (up to num_containers) while the "
+        "queue of detections is long and the host has CPU and memory to spare. Containers are removed as "
+        "soon as there is nothing left for them to test.",
+    )
+    warm_pool_size: PositiveInt = Field(
+        default=1,
+        description="Number of containers to start before testing begins when autoscale is enabled.",
+    )
+    autoscale_detections_per_container: PositiveInt = Field(
+        default=25,
+        description="When autoscaling, only add a container while more than this many detections are "
+        "queued for each running container.",
+    )
+    autoscale_memory_per_container_mb: PositiveInt = Field(
+        default=4096,
+        description="When autoscaling, only add a container while at least this much memory is available "
+        "on the host.",
+    )
+    autoscale_max_load_per_cpu: float = Field(
+        default=0.8,
+        gt=0,
+        description="When autoscaling, only add a container while the 1 minute load average of the host, "
+        "divided by its number of CPUs, is below this.",
+    )
 
     def getContainers(self) -> List[Container]:
         containers = []
@@ -1038,6 +1113,16 @@ class test_common(build):
         "This flag does not actually perform the test. Instead, it builds validates all content and builds the app(s).  "
         "It MUST be used with mode.changes and must run in the context of a git repo.",
     )
+    shard: Optional[str] = Field(
+        default=None,
+        exclude=True,
+        pattern=r"^[0-9]+/[0-9]+$",
+        description="Only test one shard of the detections selected by mode, given as 'i/N' for shard i "
+        "(from 1 to N) of N. Shards are balanced using the durations recorded by previous test runs in "
+        "test_results/, falling back to an estimate, and every shard must see the "
+        "same previous results for the shards to be consistent. Use 'contentctl merge_results' to combine "
+        "the summary files of all the shards.",
+    )
     disable_tqdm: bool = Field(
         default=False,
         exclude=True,
@@ -1048,6 +1133,135 @@ class test_common(build):
         f"you also MUST set post_test_behavior to {PostTestBehavior.never_pause}. Otherwiser, a failed detection will cause"
         "the CI/CD running to pause indefinitely.",
     )
+    disable_test_history: bool = Field(
+        default=False,
+        exclude=True,
+        description="By default, the time taken to test each detection (and each phase of testing it, "
+        "such as downloading, replaying, and searching) is recorded in a SQLite database in the "
+        "test_results directory. Those durations are used to test the slowest detections first and to "
+        "estimate how long testing will take. Set this to True to neither read nor write that history.",
+    )
+    trace: bool = Field(
+        default=False,
+        exclude=True,
+        description="Record what each test instance spends its time on: setting up, and downloading, "
+        "replaying, waiting for, searching and deleting the attack data of each test group. The spans are "
+        "written to test_results/trace.json in the Chrome trace format (open it in https://ui.perfetto.dev), "
+        "with one track per instance, and the total time spent on each is added to summary.yml.",
+    )
+    no_cache: bool = Field(
+        default=False,
+        exclude=True,
+        description="By default, detections which passed testing are recorded in a SQLite database in the "
+        "test_results directory, along with a hash of the detection, the content it depends on, its attack "
+        "data, and the apps and Splunk image or server it was tested on. A detection for which none of those "
+        "have changed since it passed is not tested again; its previous result is reported (and marked as "
+        "cached) instead. Set this to True to test every detection and neither read nor write the cache.",
+    )
+    attack_data_download_cache_path: pathlib.Path = Field(
+        default=pathlib.Path.home() / ".cache" / "contentctl" / "attack_data",
+        exclude=True,
+        description="Attack data files which must be downloaded over HTTP are stored in this directory "
+        "and reused by every test instance and every test run. This is separate from, and only used for "
+        "files which are not found in, the test_data_caches.",
+    )
+    attack_data_download_cache_size_mb: int = Field(
+        default=10240,
+        ge=0,
+        exclude=True,
+        description="Maximum size of the attack data download cache, in MB. When it grows larger than this, "
+        "the least recently used files are deleted. Set this to 0 to disable the cache, in which case every "
+        "attack data file is downloaded each time it is used.",
+    )
+    attack_data_prefetch_count: int = Field(
+        default=5,
+        ge=0,
+        exclude=True,
+        description="While a detection is being tested, download the attack data for this many of the "
+        "detections that will be tested next. Has no effect when the attack data download cache is disabled.",
+    )
+    hec_replay_compression: bool = Field(
+        default=True,
+        exclude=True,
+        description="Gzip compress attack data as it is sent to HEC. If the server rejects compressed "
+        "data, it is sent uncompressed instead.",
+    )
+    hec_replay_parallel_chunk_mb: int = Field(
+        default=0,
+        ge=0,
+        exclude=True,
+        description="Split attack data files larger than this many MB into chunks, on line boundaries, "
+        "and send the chunks to HEC in parallel. This can significantly speed up the replay of very large "
+        "files, but should only be used if events in the attack data never span multiple lines, since "
+        "an event could otherwise be split between two chunks. Set to 0 to always send each file in "
+        "a single request.",
+    )
+    hec_replay_max_parallel_posts: int = Field(
+        default=4,
+        ge=1,
+        exclude=True,
+        description="Maximum number of chunks of an attack data file that are sent to HEC at the same time "
+        "when hec_replay_parallel_chunk_mb is set.",
+    )
+    attack_data_max_parallel_files: int = Field(
+        default=4,
+        ge=1,
+        exclude=True,
+        description="Maximum number of the attack data files of a test group which are downloaded and sent to "
+        "HEC at the same time. Data sent for every file of the test group is then awaited together. Set to 1 "
+        "to download and replay the files one at a time.",
+    )
+    concurrent_test_groups_per_instance: int = Field(
+        default=1,
+        ge=1,
+        exclude=True,
+        description="Number of test groups that each test instance works on at the same time. Each one "
+        "replays its attack data under a different host, so deleting one group's data does not affect the "
+        "others, and their searches run concurrently on the server up to its concurrent search limit. "
+        "Detection searches are not restricted to a host or index, so a detection could match attack data "
+        "replayed for a different detection being tested at the same time, and pass when it would fail on "
+        "its own. Values greater than 1 are therefore only accepted by test_simulated, whose search results "
+        f"are scripted, and require post_test_behavior to be {PostTestBehavior.never_pause}.",
+    )
+
+    ephemeral_replay_indexes: bool = Field(
+        default=False,
+        exclude=True,
+        description="Replay the attack data of each test group into its own short-lived index, named after "
+        "the replay index, instead of the shared replay index. The index is removed in the background after the "
+        "test group has been tested, which is much cheaper than deleting the data with '| delete'. Attack data "
+        "with a custom_index is still deleted with '| delete'. If the server already has a DETECTION_TESTING_HEC "
+        "input, it must be allowed to write to any index.",
+    )
+
+    batched_integration_testing: bool = Field(
+        default=False,
+        exclude=True,
+        description="Rather than each integration test repeatedly searching the risk and notable indexes for "
+        "the events of its own correlation search, poll for the events of every correlation search being "
+        "tested on an instance with a single grouped query, and only fetch and validate a search's events "
+        "once they exist. Combine this with concurrent_test_groups_per_instance to overlap the time each "
+        "integration test spends waiting for its events.",
+    )
+
+    deferred_integration_test_cleanup: bool = Field(
+        default=False,
+        exclude=True,
+        description="Rather than deleting the risk and notable events created by each integration test "
+        "as soon as it finishes, delete them in the background, in batches covering many correlation "
+        "searches. Integration tests only validate the events created by their own run of a correlation "
+        "search, so events waiting to be deleted do not affect other tests.",
+    )
+
+    aggregate_unit_test_validation: bool = Field(
+        default=False,
+        exclude=True,
+        description="Validate the risk and threat object fields of a detection's results inside Splunk, by "
+        "appending a stats command to its search, so that a single summary row is returned instead of the "
+        "results themselves. Tests pass and fail exactly as they would otherwise, but chatty detections are "
+        "much faster to validate. The resultCount reported for a test is still the number of results of the "
+        "detection's search.",
+    )
 
     apps: List[TestApp] = Field(
         default=DEFAULT_APPS,
@@ -1141,6 +1355,33 @@ class test_common(build):
                 )
         return self
 
+    def searchesAreIsolatedBetweenTestGroups(self) -> bool:
+        """
+        :returns: whether the searches of a test group can only match the attack data replayed
+            for that test group, so that several test groups can be tested on an instance at once
+        """
+        return False
+
+    @model_validator(mode="after")
+    def ensureConcurrentTestGroupsAreIsolated(self) -> Self:
+        if self.concurrent_test_groups_per_instance == 1:
+            return self
+        if not self.searchesAreIsolatedBetweenTestGroups():
+            raise ValueError(
+                f"concurrent_test_groups_per_instance is [{self.concurrent_test_groups_per_instance}], "
+                "but detection searches are not restricted to the host or index that their attack "
+                "data is replayed into, so a detection could match attack data replayed for another "
+                "test group and pass when it would fail on its own. "
+                "concurrent_test_groups_per_instance must be 1."
+            )
+        if self.post_test_behavior != PostTestBehavior.never_pause:
+            raise ValueError(
+                f"concurrent_test_groups_per_instance is [{self.concurrent_test_groups_per_instance}], "
+                f"so post_test_behavior must be [{PostTestBehavior.never_pause}]: a test group "
+                "cannot be paused for inspection while other test groups continue on the instance."
+            )
+        return self
+
     @model_validator(mode="after")
     def ensureEnterpriseSecurityForIntegrationTesting(self) -> Self:
         if not self.enable_integration_testing:
@@ -1157,6 +1398,27 @@ class test_common(build):
         )
         return self
 
+    @field_validator("shard", mode="after")
+    @classmethod
+    def validateShard(cls, v: Optional[str]) -> Optional[str]:
+        if v is None:
+            return v
+        shard_number, shard_count = (int(part) for part in v.split("/"))
+        if not 1 <= shard_number <= shard_count:
+            raise ValueError(
+                f"shard '{v}' is invalid: it must be 'i/N' where 1 <= i <= N"
+            )
+        return v
+
+    def getShard(self) -> Optional[tuple[int, int]]:
+        """
+        :returns: the index (from 0) and count of shards, or None if sharding is not enabled
+        """
+        if self.shard is None:
+            return None
+        shard_number, shard_count = (int(part) for part in self.shard.split("/"))
+        return shard_number - 1, shard_count
+
     @model_validator(mode="after")
     def checkPlanOnlyUse(self) -> Self:
         # Ensure that mode is CHANGES
@@ -1165,10 +1427,24 @@ class test_common(build):
         return self
 
 
+# Local repository of the container images created by 'contentctl test --snapshot'. Bump the
+# format version whenever the setup persisted in a snapshot changes, so stale snapshots are not used.
+SNAPSHOT_IMAGE_REPOSITORY = "contentctl_snapshot"
+SNAPSHOT_FORMAT_VERSION = 1
+
+
 class test(test_common):
     model_config = ConfigDict(validate_default=True, arbitrary_types_allowed=True)
     container_settings: ContainerSettings = ContainerSettings()
     test_instances: List[Container] = Field([], exclude=True, validate_default=True)
+    snapshot: bool = Field(
+        default=False,
+        exclude=True,
+        description="After the first container has been set up, save it as a local image. Later runs with the "
+        "same base image, apps and configuration start from that image, skipping app installation and most of "
+        "the setup. Your app is installed into the container on every run, so it is never part of the snapshot. "
+        f"Snapshots are not removed automatically; run 'docker image ls {SNAPSHOT_IMAGE_REPOSITORY}' to list them.",
+    )
     splunk_api_username: Optional[str] = Field(
         default=None,
         exclude=True,
@@ -1216,7 +1492,7 @@ class test(test_common):
     def getContainerEnvironmentString(
         self, stage_file: bool = False, include_custom_app: bool = True
     ) -> str:
-        apps: List[App_Base] = self.apps
+        apps: List[App_Base] = list(self.apps)
         if include_custom_app:
             apps.append(self.app)
 
@@ -1236,6 +1512,29 @@ class test(test_common):
     def getAppFilePath(self):
         return self.path / "apps.yml"
 
+    def getSnapshotImageTag(self, base_image_id: str) -> str:
+        """
+        The tag of the image that a configured container is saved to when snapshot is enabled. It
+        is derived from everything that the snapshot depends on, so changing the base image, the
+        apps or the configuration produces a new snapshot rather than reusing a stale one.
+
+        :param base_image_id: the ID of the pulled full_image_path image. A tag such as
+            splunk:9.3 moves when a new release is published, so the ID is used rather than the
+            tag, so that a snapshot is never restored on top of a base image it was not built from
+        """
+        snapshot_config = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "base_image_id": base_image_id,
+            "apps": self.getContainerEnvironmentString(
+                stage_file=False, include_custom_app=False
+            ),
+            "ephemeral_replay_indexes": self.ephemeral_replay_indexes,
+        }
+        digest = hashlib.sha256(
+            json.dumps(snapshot_config, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return f"{SNAPSHOT_IMAGE_REPOSITORY}:{digest[:16]}"
+
 
 TEST_ARGS_ENV = "CONTENTCTL_TEST_INFRASTRUCTURES"
 
@@ -1332,6 +1631,62 @@ class test_servers(test_common):
             index += 1
 
 
+class test_simulated(test_common):
+    model_config = ConfigDict(validate_default=True, arbitrary_types_allowed=True)
+    test_instances: List[Infrastructure] = Field(
+        [], exclude=True, validate_default=True
+    )
+    simulated_instances: PositiveInt = Field(
+        default=1,
+        exclude=True,
+        description="Number of simulated Splunk servers to test against. Each one runs inside this "
+        "process, and implements just enough of the REST API and HEC of a Splunk server for testing "
+        "to run against it. Nothing is really indexed or searched, so test results are only as "
+        "meaningful as the simulation script, but the overhead of contentctl itself can be measured "
+        "without starting a real server.",
+    )
+    simulation_script: Optional[FilePath] = Field(
+        default=None,
+        exclude=True,
+        description="YAML file scripting the behaviour of the simulated servers: the Splunk version and "
+        "apps (such as SplunkEnterpriseSecuritySuite) they report, how long searches and HEC "
+        "acknowledgements take, the results of searches matching a pattern, and delays or failures "
+        "of requests to matching endpoints. If not provided, searches finish immediately with a count "
+        "of the events replayed into the indexes they name.",
+    )
+
+    def searchesAreIsolatedBetweenTestGroups(self) -> bool:
+        # Search results are scripted rather than found in the replayed attack data
+        return True
+
+    @model_validator(mode="after")
+    def create_simulated_instances(self) -> Self:
+        self.test_instances = [
+            Infrastructure(
+                instance_name=f"simulated_server_{index}",
+                instance_address="127.0.0.1",
+            )
+            for index in range(self.simulated_instances)
+        ]
+        return self
+
+
+class merge_results(Config_Base):
+    summaries: List[FilePath] = Field(
+        default=[],
+        description="The summary files written by each shard of a sharded test run "
+        "(test_results/summary.yml).",
+    )
+    output_file: pathlib.Path = Field(
+        default=pathlib.Path("test_results") / "summary.yml",
+        description="Where to write the merged summary.",
+    )
+
+    @field_serializer("output_file", when_used="always")
+    def serialize_output_file(output_file: pathlib.Path) -> str:
+        return str(output_file)
+
+
 class release_notes(Config_Base):
     old_tag: Optional[str] = Field(
         None,
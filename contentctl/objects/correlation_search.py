@@ -1,10 +1,11 @@
 import json
 import logging
 import re
+import threading
 import time
 from enum import IntEnum, StrEnum
 from functools import cached_property
-from typing import Any
+from typing import Any, Callable
 
 import splunklib.client as splunklib  # type: ignore
 from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, computed_field
@@ -183,6 +184,276 @@ class PbarData(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
 
+class CorrelationSearchBatch(BaseModel):
+    """Polls for the risk and notable events of several correlation searches at once
+
+    Rather than each integration test repeatedly searching the risk and notable indexes for the
+    events of its own correlation search, every test waiting on an instance registers the search
+    name and sid of its dispatched search here. A single background thread counts the events of all
+    of them with one grouped query, and wakes each test once the events it expects exist, so that
+    the tests only fetch (and validate) the events themselves when there is something to validate.
+    :param get_service: returns a Service for the current thread
+    :param poll_seconds: the delay between polls
+    """
+
+    get_service: Callable[[], splunklib.Service] = Field(...)
+    poll_seconds: float = Field(default=TimeoutConfig.BASE_SLEEP)
+
+    # The indexes in which events have been found for each registered (search name, sid)
+    _found: dict[tuple[str, str], set[str]] = PrivateAttr(default_factory=dict)
+
+    # Errors raised while polling, keyed by the (search name, sid) that were being polled
+    _errors: dict[tuple[str, str], Exception] = PrivateAttr(default_factory=dict)
+
+    # The number of polls completed so far
+    _poll_count: int = PrivateAttr(default=0)
+
+    _condition: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _thread: threading.Thread | None = PrivateAttr(default=None)
+    _stopped: bool = PrivateAttr(default=False)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def register(self, search_name: str, sid: str) -> None:
+        """Start polling for the events of a dispatched search
+
+        :param search_name: the name of the correlation search
+        :param sid: the sid of the dispatched search
+        """
+        with self._condition:
+            self._found[(search_name, sid)] = set()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="correlation_search_batch", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def unregister(self, search_name: str, sid: str) -> None:
+        """Stop polling for the events of a dispatched search
+
+        :param search_name: the name of the correlation search
+        :param sid: the sid of the dispatched search
+        """
+        with self._condition:
+            self._found.pop((search_name, sid), None)
+            self._errors.pop((search_name, sid), None)
+
+    def wait_for_events(
+        self, search_name: str, sid: str, indexes: set[str], timeout: float
+    ) -> float:
+        """Wait until events of a registered search exist in each of the given indexes
+
+        Always waits for at least one poll to complete, so that callers which find the events
+        lacking after waiting can simply call this again.
+        :param search_name: the name of the correlation search
+        :param sid: the sid of the dispatched search
+        :param indexes: the indexes the search is expected to create events in
+        :param timeout: the longest time to wait, in seconds
+        :returns: the time waited, in seconds
+        :raises ServerError: if polling for the events failed
+        """
+        key = (search_name, sid)
+        start_time = time.time()
+        with self._condition:
+            poll_count = self._poll_count
+            self._condition.wait_for(
+                lambda: (
+                    self._stopped
+                    or key in self._errors
+                    or (
+                        self._poll_count > poll_count
+                        and indexes <= self._found.get(key, set())
+                    )
+                ),
+                timeout=max(timeout, 0),
+            )
+            if key in self._errors:
+                raise self._errors.pop(key)
+        return time.time() - start_time
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+        return f'"{escaped}"'
+
+    def poll(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], set[str]]:
+        """Count the risk and notable events of several searches with a single query
+
+        :param keys: the (search name, sid) of each search
+        :returns: the indexes in which events were found for each search
+        """
+        searches = " OR ".join(
+            f"(search_name={self._quote(name)} orig_sid={self._quote(sid)})"
+            for name, sid in keys
+        )
+        query = (
+            f"search (index={Indexes.RISK_INDEX} OR index={Indexes.NOTABLE_INDEX}) "
+            f"({searches}) | stats count by index, search_name, orig_sid"
+        )
+        job = self.get_service().search(query, exec_mode="blocking")  # type: ignore
+        try:
+            response_reader: ResponseReader = job.results(output_mode="json", count=0)  # type: ignore
+        except HTTPError as e:
+            raise ServerError(f"Error querying Splunk instance: {e}")
+
+        found: dict[tuple[str, str], set[str]] = {}
+        for result in ResultIterator(response_reader):
+            if int(result.get("count", 0)) > 0:
+                found.setdefault(
+                    (result["search_name"], result["orig_sid"]), set()
+                ).add(result["index"])
+        return found
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: len(self._found) > 0 or self._stopped)
+                if self._stopped:
+                    return
+                keys = sorted(self._found)
+
+            try:
+                found = self.poll(keys)
+            except Exception as e:
+                with self._condition:
+                    for key in keys:
+                        if key in self._found:
+                            self._errors[key] = ServerError(
+                                f"Error polling for risk and notable events: {e}"
+                            )
+            else:
+                with self._condition:
+                    for key, indexes in found.items():
+                        if key in self._found:
+                            self._found[key].update(indexes)
+
+            with self._condition:
+                self._poll_count += 1
+                self._condition.notify_all()
+                self._condition.wait_for(
+                    lambda: self._stopped, timeout=self.poll_seconds
+                )
+
+    def stop(self) -> None:
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+
+class CorrelationSearchJanitor(BaseModel):
+    """Deletes the events created by integration tests in the background, in batches
+
+    Rather than each integration test running a blocking delete search for each index its
+    correlation search created events in, the indexes and dispatched searches are scheduled
+    here. A background thread collects them for a while, then deletes the events of every
+    scheduled search with one delete search per index. Only the events of each scheduled
+    dispatch (by search name and orig_sid) are deleted, so the events of a later test of the
+    same correlation search, which may still be validating them, are left in place.
+    :param get_service: returns a Service for the current thread
+    :param report_error: called with a message if events could not be deleted
+    :param batch_seconds: how long to collect scheduled deletions before running them
+    """
+
+    get_service: Callable[[], splunklib.Service] = Field(...)
+    report_error: Callable[[str], None] = Field(...)
+    batch_seconds: float = Field(default=TimeoutConfig.ADD_WAIT_TIME)
+
+    # The (search name, sid) of the dispatched searches whose events are waiting to be deleted
+    # from each index
+    _pending: dict[str, set[tuple[str, str]]] = PrivateAttr(default_factory=dict)
+
+    _condition: threading.Condition = PrivateAttr(default_factory=threading.Condition)
+    _thread: threading.Thread | None = PrivateAttr(default=None)
+    _stopped: bool = PrivateAttr(default=False)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def schedule(self, index: str, search_name: str, sid: str) -> None:
+        """Schedule the events of one dispatch of a correlation search in an index for deletion
+
+        :param index: the index (e.g. 'risk')
+        :param search_name: the name of the correlation search
+        :param sid: the sid of the dispatched search, which its events record as orig_sid
+        """
+        with self._condition:
+            self._pending.setdefault(index, set()).add((search_name, sid))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="correlation_search_janitor", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify_all()
+
+    def delete(self, index: str, searches: set[tuple[str, str]]) -> None:
+        """Delete the events of several dispatched correlation searches from an index with a
+        single search
+
+        :param index: the index (e.g. 'risk')
+        :param searches: the (search name, sid) of each dispatched search
+        """
+        terms = " OR ".join(
+            f"(search_name={CorrelationSearchBatch._quote(name)} "
+            f"orig_sid={CorrelationSearchBatch._quote(sid)})"
+            for name, sid in sorted(searches)
+        )
+        query = f"search index={index} ({terms}) | delete"
+        job = self.get_service().search(query, exec_mode="blocking")  # type: ignore
+        try:
+            response_reader: ResponseReader = job.results(output_mode="json")  # type: ignore
+        except HTTPError as e:
+            raise ServerError(f"Error querying Splunk instance: {e}")
+
+        # As in CorrelationSearch._delete_index, look for the result for the given index
+        found_index = False
+        for result in ResultIterator(response_reader):
+            if result["index"] == index:
+                found_index = True
+                if result["errors"] != "0":
+                    raise ServerError(
+                        f"Errors encountered during delete operation on index {index}"
+                    )
+        if not found_index:
+            raise ServerError(f"No result returned showing deletion in index {index}")
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._pending) > 0 or self._stopped
+                )
+                # Collect more deletions for a while, unless we are stopping
+                self._condition.wait_for(
+                    lambda: self._stopped, timeout=self.batch_seconds
+                )
+                pending = self._pending
+                self._pending = {}
+                stopped = self._stopped
+
+            for index, searches in sorted(pending.items()):
+                try:
+                    self.delete(index, searches)
+                except Exception as e:
+                    self.report_error(
+                        f"Warning - failed to delete the events of {len(searches)} "
+                        f"correlation search(es) from index [{index}]: {e!s}"
+                    )
+            if stopped:
+                return
+
+    def close(self, timeout: float | None = None) -> None:
+        """Delete any scheduled events now, then stop the background thread
+
+        :param timeout: the maximum time to wait, in seconds
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+
 class CorrelationSearch(BaseModel):
     """Representation of a correlation search in Splunk
 
@@ -192,6 +463,10 @@ class CorrelationSearch(BaseModel):
     :param service: a Service instance representing a connection to a Splunk instance
     :param pbar_data: the encapsulated info needed for logging w/ pbar
     :param test_index: the index attack data is forwarded to for testing (optionally used in cleanup)
+    :param batch: if given, the batch used to poll for risk/notable events along with those of other
+        correlation searches being tested at the same time
+    :param janitor: if given, the janitor which deletes the events created by this search in the
+        background, rather than during cleanup
     """
 
     # the detection associated with the correlation search (e.g. "Windows Modify Registry EnableLinkedConnections")
@@ -207,6 +482,14 @@ class CorrelationSearch(BaseModel):
     # cleanup of this index
     test_index: str | None = Field(default=None, min_length=1)
 
+    # The batch polling for risk/notable events of this and other correlation searches; if None,
+    # this search polls for its own events
+    batch: CorrelationSearchBatch | None = Field(default=None)
+
+    # The janitor deleting created risk/notable events in the background; if None, this search
+    # deletes its own events during cleanup
+    janitor: CorrelationSearchJanitor | None = Field(default=None)
+
     # The search ID of the last dispatched search; this is used to query for risk/notable events
     sid: str | None = Field(default=None)
 
@@ -949,6 +1232,30 @@ class CorrelationSearch(BaseModel):
         :raises ValidationFailed: If validation of risk/notable events fails after all retries.
         """
         self.dispatch()
+        if self.batch is not None:
+            self.batch.register(self.name, self.sid)  # type: ignore
+            try:
+                self._validate_until_timeout(elapsed_sleep_time)
+            finally:
+                self.batch.unregister(self.name, self.sid)  # type: ignore
+        else:
+            self._validate_until_timeout(elapsed_sleep_time)
+
+    def _validate_until_timeout(self, elapsed_sleep_time: dict[str, int]) -> None:
+        """Validate the risk/notable events of the dispatched search until validation passes or
+        times out
+
+        :param elapsed_sleep_time: Dictionary tracking the total elapsed sleep time across retries.
+        :type elapsed_sleep_time: dict[str, int]
+
+        :raises ValidationFailed: If validation of risk/notable events fails after all retries.
+        """
+        # The indexes the batch waits for events in before each validation attempt
+        expected_indexes: set[str] = set()
+        if self.has_risk_analysis_action:
+            expected_indexes.add(Indexes.RISK_INDEX)
+        if self.has_notable_action:
+            expected_indexes.add(Indexes.NOTABLE_INDEX)
 
         wait_time = TimeoutConfig.BASE_SLEEP
         time_elapsed = 0
@@ -960,8 +1267,18 @@ class CorrelationSearch(BaseModel):
             # reset validation_error for each iteration
             validation_error = None
 
+            # when batched, wait until the batch has seen the expected events (or we time out)
+            # rather than searching for them ourselves
+            if self.batch is not None:
+                waited = self.batch.wait_for_events(
+                    self.name,
+                    self.sid,  # type: ignore
+                    expected_indexes,
+                    timeout=TimeoutConfig.RETRY_DISPATCH - time_elapsed,
+                )
+                elapsed_sleep_time["elapsed_sleep_time"] += int(waited)
             # wait at least 30 seconds before adding to the wait time (we expect the vast majority of detections to show results w/in that window)
-            if time_elapsed > TimeoutConfig.ADD_WAIT_TIME:
+            elif time_elapsed > TimeoutConfig.ADD_WAIT_TIME:
                 time.sleep(wait_time)
                 elapsed_sleep_time["elapsed_sleep_time"] += wait_time
                 wait_time = min(
@@ -1168,9 +1485,17 @@ class CorrelationSearch(BaseModel):
         if self._notable_events is not None:
             self.indexes_to_purge.add(Indexes.NOTABLE_INDEX)
 
-        # delete the indexes
+        # delete the indexes, or leave the events of this dispatch in the risk and notable indexes
+        # to the janitor. The test index is not tagged by search name, so it is always deleted now.
         for index in self.indexes_to_purge:
-            self._delete_index(index)
+            if (
+                self.janitor is not None
+                and self.sid is not None
+                and index in (Indexes.RISK_INDEX, Indexes.NOTABLE_INDEX)
+            ):
+                self.janitor.schedule(index, self.name, self.sid)
+            else:
+                self._delete_index(index)
         self.indexes_to_purge.clear()
 
         # reset caches
@@ -15,6 +15,7 @@ from pydantic import (
     FilePath,
     HttpUrl,
     NonNegativeInt,
+    PrivateAttr,
     TypeAdapter,
     ValidationInfo,
     computed_field,
@@ -242,6 +243,7 @@ class FileBackedLookup(Lookup, abc.ABC):
 
 class CSVLookup(FileBackedLookup):
     lookup_type: Literal[Lookup_Type.csv]
+    _compressed_in_app: bool = PrivateAttr(default=False)
 
     @model_serializer
     def serialize_model(self):
@@ -271,17 +273,50 @@ class CSVLookup(FileBackedLookup):
 
         return csv_file
 
+    @model_validator(mode="after")
+    def determine_compression_in_app(self, info: ValidationInfo) -> Self:
+        """
+        Determine whether this lookup should be shipped gzip-compressed in the app, which Splunk
+        can read transparently. Lookups strictly larger than the compress_lookups_larger_than
+        setting of the config are compressed. This is decided when the lookup is loaded, since it
+        changes the filename of the lookup in the app.
+        """
+        config = info.context.get("config", None) if info.context is not None else None
+        # Only build configs (and their children) have this setting
+        compression_threshold: int | None = getattr(
+            config, "compress_lookups_larger_than", None
+        )
+        self._compressed_in_app = (
+            compression_threshold is not None
+            and self.content_size > compression_threshold
+        )
+        return self
+
     @computed_field
     @cached_property
     def app_filename(self) -> FilePath:
         """
         This function computes the filenames to write into the app itself.  This is abstract because
-        CSV and MLmodel requirements are different.
+        CSV and MLmodel requirements are different. If the lookup will be shipped gzip-compressed,
+        the filename has an additional .gz extension.
         """
-
-        return pathlib.Path(
+        app_filename = pathlib.Path(
             f"{self.name}_{self.date.year}{self.date.month:02}{self.date.day:02}.{self.lookup_type}"
         )
+        if self._compressed_in_app:
+            return app_filename.with_name(f"{app_filename.name}.gz")
+        return app_filename
+
+    @property
+    def content_size(self) -> int:
+        """
+        The size, in bytes, of the uncompressed contents of the lookup
+        """
+        return self.filename.stat().st_size
+
+    @property
+    def compressed_in_app(self) -> bool:
+        return self._compressed_in_app
 
     @model_validator(mode="after")
     def ensure_correct_csv_structure(self) -> Self:
@@ -348,6 +383,10 @@ class RuntimeCSV(CSVLookup):
     def content_file_handle(self) -> TextIOBase:
         return StringIO(self.contents)
 
+    @property
+    def content_size(self) -> int:
+        return len(self.contents.encode("utf-8"))
+
 
 class KVStoreLookup(Lookup):
     lookup_type: Literal[Lookup_Type.kvstore]
@@ -18,6 +18,116 @@ from contentctl.output.json_writer import JsonWriter
 
 JSON_API_VERSION = 2
 
+# The fields included in each API object are computed once, rather than rebuilding
+# the include set for every object that is serialized
+DETECTION_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "author",
+        "date",
+        "version",
+        "id",
+        "description",
+        "tags",
+        "search",
+        "how_to_implement",
+        "known_false_positives",
+        "rba",
+        "references",
+        "datamodel",
+        "macros",
+        "lookups",
+        "source",
+        "nes_fields",
+    ]
+)
+
+MACRO_API_FIELDS: frozenset[str] = frozenset(["definition", "description", "name"])
+
+STORY_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "author",
+        "date",
+        "version",
+        "id",
+        "description",
+        "narrative",
+        "references",
+        "tags",
+        "detections_names",
+        "investigation_names",
+        "baseline_names",
+        "detections",
+    ]
+)
+
+BASELINE_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "author",
+        "date",
+        "version",
+        "id",
+        "description",
+        "type",
+        "datamodel",
+        "search",
+        "how_to_implement",
+        "known_false_positives",
+        "references",
+        "tags",
+    ]
+)
+
+INVESTIGATION_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "author",
+        "date",
+        "version",
+        "id",
+        "description",
+        "type",
+        "datamodel",
+        "search",
+        "how_to_implemnet",
+        "known_false_positives",
+        "references",
+        "inputs",
+        "tags",
+        "lowercase_name",
+    ]
+)
+
+LOOKUP_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "description",
+        "collection",
+        "fields_list",
+        "filename",
+        "default_match",
+        "match_type",
+        "min_matches",
+        "case_sensitive_match",
+    ]
+)
+
+DEPLOYMENT_API_FIELDS: frozenset[str] = frozenset(
+    [
+        "name",
+        "author",
+        "date",
+        "version",
+        "id",
+        "description",
+        "scheduling",
+        "rba",
+        "tags",
+    ]
+)
+
 
 class ApiJsonOutput:
     output_path: pathlib.Path
@@ -32,30 +142,7 @@ class ApiJsonOutput:
         objects: list[Detection],
     ) -> None:
         detections = [
-            detection.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "author",
-                        "date",
-                        "version",
-                        "id",
-                        "description",
-                        "tags",
-                        "search",
-                        "how_to_implement",
-                        "known_false_positives",
-                        "rba",
-                        "references",
-                        "datamodel",
-                        "macros",
-                        "lookups",
-                        "source",
-                        "nes_fields",
-                    ]
-                )
-            )
-            for detection in objects
+            detection.model_dump(include=DETECTION_API_FIELDS) for detection in objects
         ]
         # Only a subset of macro fields are required:
         # for detection in detections:
@@ -81,10 +168,7 @@ class ApiJsonOutput:
         self,
         objects: list[Macro],
     ) -> None:
-        macros = [
-            macro.model_dump(include=set(["definition", "description", "name"]))
-            for macro in objects
-        ]
+        macros = [macro.model_dump(include=MACRO_API_FIELDS) for macro in objects]
         for macro in macros:
             for k in ["author", "date", "version", "id", "references"]:
                 if k in macro:
@@ -99,28 +183,7 @@ class ApiJsonOutput:
         self,
         objects: list[Story],
     ) -> None:
-        stories = [
-            story.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "author",
-                        "date",
-                        "version",
-                        "id",
-                        "description",
-                        "narrative",
-                        "references",
-                        "tags",
-                        "detections_names",
-                        "investigation_names",
-                        "baseline_names",
-                        "detections",
-                    ]
-                )
-            )
-            for story in objects
-        ]
+        stories = [story.model_dump(include=STORY_API_FIELDS) for story in objects]
         # Only get certain fields from detections
         for story in stories:
             # Only use a small subset of fields from the detection
@@ -148,26 +211,7 @@ class ApiJsonOutput:
         objects: list[Baseline],
     ) -> None:
         baselines = [
-            baseline.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "author",
-                        "date",
-                        "version",
-                        "id",
-                        "description",
-                        "type",
-                        "datamodel",
-                        "search",
-                        "how_to_implement",
-                        "known_false_positives",
-                        "references",
-                        "tags",
-                    ]
-                )
-            )
-            for baseline in objects
+            baseline.model_dump(include=BASELINE_API_FIELDS) for baseline in objects
         ]
 
         JsonWriter.writeJsonObject(
@@ -181,27 +225,7 @@ class ApiJsonOutput:
         objects: list[Investigation],
     ) -> None:
         investigations = [
-            investigation.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "author",
-                        "date",
-                        "version",
-                        "id",
-                        "description",
-                        "type",
-                        "datamodel",
-                        "search",
-                        "how_to_implemnet",
-                        "known_false_positives",
-                        "references",
-                        "inputs",
-                        "tags",
-                        "lowercase_name",
-                    ]
-                )
-            )
+            investigation.model_dump(include=INVESTIGATION_API_FIELDS)
             for investigation in objects
         ]
         JsonWriter.writeJsonObject(
@@ -214,24 +238,7 @@ class ApiJsonOutput:
         self,
         objects: list[Lookup],
     ) -> None:
-        lookups = [
-            lookup.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "description",
-                        "collection",
-                        "fields_list",
-                        "filename",
-                        "default_match",
-                        "match_type",
-                        "min_matches",
-                        "case_sensitive_match",
-                    ]
-                )
-            )
-            for lookup in objects
-        ]
+        lookups = [lookup.model_dump(include=LOOKUP_API_FIELDS) for lookup in objects]
         for lookup in lookups:
             for k in ["author", "date", "version", "id", "references"]:
                 if k in lookup:
@@ -247,21 +254,7 @@ class ApiJsonOutput:
         objects: list[Deployment],
     ) -> None:
         deployments = [
-            deployment.model_dump(
-                include=set(
-                    [
-                        "name",
-                        "author",
-                        "date",
-                        "version",
-                        "id",
-                        "description",
-                        "scheduling",
-                        "rba",
-                        "tags",
-                    ]
-                )
-            )
+            deployment.model_dump(include=DEPLOYMENT_API_FIELDS)
             for deployment in objects
         ]
         # references are not to be included, but have been deleted in the
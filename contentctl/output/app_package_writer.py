@@ -0,0 +1,243 @@
+import os
+import pathlib
+import struct
+import tarfile
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+# Midnight, January 1st 1980 (UTC). This is the earliest timestamp which can be
+# represented in a zip file and is the conventional fallback for reproducible
+# builds when SOURCE_DATE_EPOCH is not provided by the environment.
+DEFAULT_SOURCE_DATE_EPOCH = 315532800
+
+# Size of each block of uncompressed data handed to a compression worker. This
+# matches the default used by pigz.
+GZIP_BLOCK_SIZE = 128 * 1024
+
+# The deflate window is 32KiB, so this is the most history a block can reference
+GZIP_DICTIONARY_SIZE = 32 * 1024
+
+GZIP_COMPRESSION_LEVEL = 9
+
+
+class ParallelGzipWriter:
+    """Write-only file object which produces a single member, standard gzip stream.
+    Uncompressed data is split into fixed size blocks which are deflated concurrently.
+    Each block is primed with the last 32KiB of the previous block and ends on a
+    byte boundary (Z_SYNC_FLUSH), so concatenating the compressed blocks yields
+    one valid deflate stream that any gzip implementation can decompress.
+    zlib releases the GIL while compressing, so threads give real parallelism.
+    """
+
+    def __init__(
+        self,
+        output: pathlib.Path,
+        workers: Optional[int] = None,
+        level: int = GZIP_COMPRESSION_LEVEL,
+        block_size: int = GZIP_BLOCK_SIZE,
+    ):
+        self.level = level
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self._output = open(output, "wb")
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._pending: deque[Future[bytes]] = deque()
+        self._buffer = bytearray()
+        self._dictionary = b""
+        self._crc = 0
+        self._size = 0
+        self._closed = False
+
+        # Magic, deflate, no flags, mtime of 0, no extra flags, unknown OS.
+        # Every field is fixed so that the header never differs between builds.
+        self._output.write(b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + b"\x00\xff")
+
+    def _compress_block(self, data: bytes, dictionary: bytes, final: bool) -> bytes:
+        if dictionary:
+            compressor = zlib.compressobj(
+                self.level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary
+            )
+        else:
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+    def _submit(self, data: bytes, final: bool) -> None:
+        self._pending.append(
+            self._executor.submit(self._compress_block, data, self._dictionary, final)
+        )
+        self._dictionary = data[-GZIP_DICTIONARY_SIZE:]
+
+        # Bound the amount of data held in memory by draining completed blocks,
+        # in order, once enough work has been queued to keep every worker busy
+        while len(self._pending) > 2 * self.workers:
+            self._output.write(self._pending.popleft().result())
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        # tarfile only needs the position within the uncompressed stream
+        return self._size
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("write to closed ParallelGzipWriter")
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]), final=False)
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            # The final block may be empty, but it must still be emitted since it
+            # carries the BFINAL bit that terminates the deflate stream
+            self._submit(bytes(self._buffer), final=True)
+            self._buffer.clear()
+            while self._pending:
+                self._output.write(self._pending.popleft().result())
+            self._output.write(
+                struct.pack("<II", self._crc & 0xFFFFFFFF, self._size & 0xFFFFFFFF)
+            )
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._output.close()
+
+    def __enter__(self) -> "ParallelGzipWriter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class AppPackageWriter:
+    @staticmethod
+    def getSourceDateEpoch() -> int:
+        """Get the timestamp that will be applied to every entry in the archive.
+        This honors the SOURCE_DATE_EPOCH convention used by reproducible builds.
+
+        Returns:
+            int: seconds since the epoch
+        """
+        source_date_epoch = os.environ.get("SOURCE_DATE_EPOCH")
+        if source_date_epoch is None:
+            return DEFAULT_SOURCE_DATE_EPOCH
+        try:
+            return int(source_date_epoch)
+        except ValueError as e:
+            raise Exception(
+                f"SOURCE_DATE_EPOCH must be an integer number of seconds, but was '{source_date_epoch}': {e!s}"
+            )
+
+    @staticmethod
+    def getSortedEntries(source_directory: pathlib.Path) -> list[pathlib.Path]:
+        """Enumerate every file and directory rooted at source_directory (including
+        the directory itself) in a stable, platform independent order.
+
+        Args:
+            source_directory (pathlib.Path): root directory of the app
+
+        Returns:
+            list[pathlib.Path]: paths in the order they should be added to the archive
+        """
+        entries: list[pathlib.Path] = [source_directory]
+        for root, dirnames, filenames in os.walk(source_directory):
+            # Sorting dirnames in place also controls the order that os.walk descends
+            dirnames.sort()
+            root_path = pathlib.Path(root)
+            for name in sorted(dirnames + filenames):
+                entries.append(root_path / name)
+        return entries
+
+    @staticmethod
+    def normalizeTarInfo(tarinfo: tarfile.TarInfo, mtime: int) -> tarfile.TarInfo:
+        """Strip all metadata from a TarInfo that depends on the machine or time
+        of the build rather than on the content of the app.
+
+        Args:
+            tarinfo (tarfile.TarInfo): entry to normalize
+            mtime (int): timestamp to apply to the entry
+
+        Returns:
+            tarfile.TarInfo: the normalized entry
+        """
+        tarinfo.mtime = mtime
+        tarinfo.uid = 0
+        tarinfo.gid = 0
+        tarinfo.uname = ""
+        tarinfo.gname = ""
+        # Permissions are reduced to the two modes that Splunk apps actually need
+        # so that differences in umask between build machines do not leak in
+        if tarinfo.isdir() or tarinfo.mode & 0o111:
+            tarinfo.mode = 0o755
+        else:
+            tarinfo.mode = 0o644
+        tarinfo.pax_headers = {}
+        return tarinfo
+
+    @staticmethod
+    def writeReproducibleTarGz(
+        source_directory: pathlib.Path,
+        output_path: pathlib.Path,
+        arcname: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> pathlib.Path:
+        """Package source_directory into a .tar.gz. Given identical inputs, the bytes of
+        the archive will be identical regardless of when or where it was built. The
+        gzip stream is compressed in parallel, but is still a standard gzip file.
+        The archive is written to a temporary file and moved into place so that an
+        interrupted build never leaves a truncated package behind.
+
+        Args:
+            source_directory (pathlib.Path): directory to package
+            output_path (pathlib.Path): path of the .tar.gz to create
+            arcname (Optional[str], optional): name of the top level directory in the archive. Defaults to the name of source_directory.
+            workers (Optional[int], optional): number of compression threads. Defaults to the number of CPUs.
+
+        Returns:
+            pathlib.Path: output_path
+        """
+        if arcname is None:
+            arcname = source_directory.name
+        mtime = AppPackageWriter.getSourceDateEpoch()
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(
+            prefix=f".{output_path.name}.", dir=output_path.parent
+        )
+        os.close(fd)
+        temp_path = pathlib.Path(temp_name)
+        try:
+            with ParallelGzipWriter(temp_path, workers=workers) as gzip_stream:
+                with tarfile.open(
+                    fileobj=gzip_stream, mode="w", format=tarfile.PAX_FORMAT
+                ) as app_archive:
+                    for entry in AppPackageWriter.getSortedEntries(source_directory):
+                        app_archive.add(
+                            entry,
+                            arcname=str(
+                                pathlib.PurePosixPath(arcname)
+                                / entry.relative_to(source_directory).as_posix()
+                            ),
+                            recursive=False,
+                            filter=lambda tarinfo: AppPackageWriter.normalizeTarInfo(
+                                tarinfo, mtime
+                            ),
+                        )
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            raise Exception(f"Failed to package app '{source_directory}': {e!s}")
+
+        return output_path
@@ -11,23 +11,30 @@ if TYPE_CHECKING:
     from contentctl.objects.macro import Macro
     from contentctl.objects.story import Story
 
+import gzip
+import io
 import pathlib
 import shutil
-import tarfile
 
+from contentctl.helper.utils import Utils
 from contentctl.objects.config import build
 
 # These must be imported separately because they are not just used for typing,
 # they are used in isinstance (which requires the object to be imported)
-from contentctl.objects.lookup import FileBackedLookup, MlModel
+from contentctl.objects.lookup import CSVLookup, FileBackedLookup, MlModel, RuntimeCSV
+from contentctl.output.app_package_writer import AppPackageWriter
 from contentctl.output.conf_writer import ConfWriter
 
 
 class ConfOutput:
     config: build
+    compressed_lookup_count: int
+    compressed_lookup_bytes_saved: int
 
     def __init__(self, config: build):
         self.config = config
+        self.compressed_lookup_count = 0
+        self.compressed_lookup_bytes_saved = 0
 
         # Create the build directory if it does not exist
         config.getPackageDirectoryPath().parent.mkdir(parents=True, exist_ok=True)
@@ -247,6 +254,7 @@ class ConfOutput:
 
     def writeLookups(self, objects: list[Lookup]) -> set[pathlib.Path]:
         written_files: set[pathlib.Path] = set()
+
         for output_app_path, template_name in [
             ("default/collections.conf", "collections.j2"),
             ("default/transforms.conf", "transforms.j2"),
@@ -275,14 +283,59 @@ class ConfOutput:
             # All File backed lookups, including __mlspl_ files, should be copied here,
             # even though the MLModel info was intentionally not written to the
             # transforms.conf file as noted above.
-            if isinstance(lookup, FileBackedLookup):
+            if not isinstance(lookup, FileBackedLookup):
+                continue
+
+            staged_lookup = lookup_folder / lookup.app_filename.name
+            if isinstance(lookup, CSVLookup) and lookup.compressed_in_app:
+                self._writeCompressedLookup(lookup, staged_lookup)
+                self.compressed_lookup_count += 1
+                self.compressed_lookup_bytes_saved += (
+                    lookup.content_size - staged_lookup.stat().st_size
+                )
+            elif isinstance(lookup, RuntimeCSV):
+                # RuntimeCSVs only exist in memory, so they must be materialized.
+                # Stream them out rather than building another copy of the contents.
                 with (
-                    open(lookup_folder / lookup.app_filename.name, "w") as output_file,
+                    open(staged_lookup, "w") as output_file,
                     lookup.content_file_handle as output,
                 ):
-                    output_file.write(output.read())
+                    shutil.copyfileobj(output, output_file)
+            else:
+                # Lookups are copied byte for byte. The filesystem is asked to do the
+                # work (reflink) so large files are never read into memory. The build
+                # output is left on disk where it may be edited, so it must never be a
+                # hardlink that shares its contents with the lookup in the repo.
+                Utils.clone_file(lookup.filename, staged_lookup, allow_hardlink=False)
+
+            if self.config.verify_lookup_hashes and not isinstance(lookup, RuntimeCSV):
+                source_hash = Utils.get_file_sha256(lookup.filename)
+                staged_hash = Utils.get_file_sha256(
+                    staged_lookup, decompress_gzip=staged_lookup.suffix == ".gz"
+                )
+                if source_hash != staged_hash:
+                    raise Exception(
+                        f"Failed to stage lookup file {lookup.filename} to {staged_lookup}: "
+                        f"SHA256 of source [{source_hash}] does not match SHA256 of staged copy [{staged_hash}]"
+                    )
         return written_files
 
+    def _writeCompressedLookup(
+        self, lookup: CSVLookup, staged_lookup: pathlib.Path
+    ) -> None:
+        # The gzip header timestamp is fixed so that the compressed lookup, and
+        # therefore the package, does not change from one build to the next
+        with gzip.GzipFile(staged_lookup, mode="wb", mtime=0) as output_file:
+            if isinstance(lookup, RuntimeCSV):
+                with (
+                    io.TextIOWrapper(output_file, encoding="utf-8") as text_output,
+                    lookup.content_file_handle as output,
+                ):
+                    shutil.copyfileobj(output, text_output)
+            else:
+                with open(lookup.filename, "rb") as output:
+                    shutil.copyfileobj(output, output_file)
+
     def writeMacros(self, objects: list[Macro]) -> set[pathlib.Path]:
         written_files: set[pathlib.Path] = set()
         written_files.add(
@@ -298,18 +351,19 @@ class ConfOutput:
         return written_files
 
     def packageAppTar(self) -> None:
-        with tarfile.open(
-            self.config.getPackageFilePath(include_version=True), "w:gz"
-        ) as app_archive:
-            app_archive.add(
-                self.config.getPackageDirectoryPath(),
-                arcname=self.config.getPackageDirectoryPath().name,
-            )
+        # Entries are sorted and their metadata normalized, so building the same
+        # content twice produces byte-for-byte identical packages
+        AppPackageWriter.writeReproducibleTarGz(
+            self.config.getPackageDirectoryPath(),
+            self.config.getPackageFilePath(include_version=True),
+            arcname=self.config.getPackageDirectoryPath().name,
+        )
 
-        shutil.copy2(
+        # The unversioned package is identical to the versioned one, so link or
+        # clone it rather than writing all of the bytes a second time
+        Utils.clone_file(
             self.config.getPackageFilePath(include_version=True),
             self.config.getPackageFilePath(include_version=False),
-            follow_symlinks=False,
         )
 
     def packageAppSlim(self) -> None:
@@ -1,8 +1,65 @@
 import json
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional, faster backend. The standard library encoder is always
+    # used as a fallback and produces identical output.
+    orjson = None
+
+# Objects are nested two levels deep in the readable output:
+# {"<object_name>": [ <object>, ... ]}
+OBJECT_INDENT = " " * 4
+
 
 class JsonWriter:
+    @staticmethod
+    def containsFloat(obj: Any) -> bool:
+        """orjson and the standard library format some floats differently (for
+        example 1e-05 vs 1e-5), so objects containing floats are always encoded
+        with the standard library to keep the output byte-for-byte identical.
+
+        Args:
+            obj (Any): object to check
+
+        Returns:
+            bool: True if obj, or anything nested inside it, is a float
+        """
+        if isinstance(obj, float):
+            return True
+        if isinstance(obj, dict):
+            return any(JsonWriter.containsFloat(v) for v in obj.values())
+        if isinstance(obj, (list, tuple)):
+            return any(JsonWriter.containsFloat(v) for v in obj)
+        return False
+
+    @staticmethod
+    def encodeIndentedObject(obj: dict[str, Any]) -> str:
+        """Encode a single object exactly as json.dump(indent=2, ensure_ascii=False)
+        would when it appears as an element of the array in the readable output.
+
+        Args:
+            obj (dict[str, Any]): object to encode
+
+        Returns:
+            str: the encoded object, indented to its position in the array
+        """
+        encoded: str | None = None
+        if orjson is not None and not JsonWriter.containsFloat(obj):
+            try:
+                encoded = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+            except TypeError:
+                # Types orjson does not support natively, such as non-str
+                # dict keys or very large integers
+                encoded = None
+        if encoded is None:
+            encoded = json.dumps(obj, ensure_ascii=False, indent=2)
+
+        # Newlines inside of strings are always escaped, so every newline in the
+        # encoded object is structural and can safely be re-indented
+        return OBJECT_INDENT + encoded.replace("\n", "\n" + OBJECT_INDENT)
+
     @staticmethod
     def writeJsonObject(
         file_path: str,
@@ -14,14 +71,22 @@ class JsonWriter:
             with open(file_path, "w") as outfile:
                 if readable_output:
                     # At the cost of slightly larger filesize, improve the redability significantly
-                    # by sorting and indenting keys/values
+                    # by sorting and indenting keys/values.
+                    # Objects are encoded and written one at a time, rather than building
+                    # the entire document in memory, but the output is identical to
+                    # json.dump({object_name: sorted_objs}, indent=2, ensure_ascii=False)
                     sorted_objs = sorted(objs, key=lambda o: o["name"])
-                    json.dump(
-                        {object_name: sorted_objs},
-                        outfile,
-                        ensure_ascii=False,
-                        indent=2,
-                    )
+                    encoded_name = json.dumps(object_name, ensure_ascii=False)
+                    if len(sorted_objs) == 0:
+                        outfile.write(f"{{\n  {encoded_name}: []\n}}")
+                        return
+
+                    outfile.write(f"{{\n  {encoded_name}: [\n")
+                    for index, obj in enumerate(sorted_objs):
+                        if index > 0:
+                            outfile.write(",\n")
+                        outfile.write(JsonWriter.encodeIndentedObject(obj))
+                    outfile.write("\n  ]\n}")
                 else:
                     json.dump({object_name: objs}, outfile, ensure_ascii=False)
 
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from contentctl.input.director import DirectorOutputDto
+
+import datetime
+import hashlib
+import json
+import pathlib
+
+from contentctl.helper.utils import Utils
+from contentctl.objects.config import build
+from contentctl.objects.lookup import FileBackedLookup, RuntimeCSV
+
+BUILD_MANIFEST_VERSION = 1
+
+
+class ManifestWriter:
+    """
+    A build manifest records a SHA256 for every file generated by the build, every stanza
+    of every generated .conf file, and every input file that the build was produced from.
+    Comparing two manifests tells downstream tooling exactly what changed between builds,
+    so that work on unchanged artifacts can be skipped.
+    """
+
+    @staticmethod
+    def getConfStanzaHashes(conf_path: pathlib.Path) -> dict[str, str]:
+        """Compute a SHA256 for each stanza in a .conf file. The comment block generated at
+        the top of every conf file contains the time of the build, so anything before the
+        first stanza is ignored. If the same stanza appears more than once (for example,
+        because multiple templates were rendered into the same file), all of its contents
+        contribute to one hash, in order.
+
+        :param conf_path: path to the conf file
+        :type conf_path: pathlib.Path
+        :returns: mapping of stanza name to the SHA256 of its contents
+        :rtype: dict[str, str]
+        """
+        stanza_hashes: dict[str, Any] = {}
+        current_stanza: Any = None
+        continued_line = False
+        with open(conf_path, "r", encoding="utf-8", errors="surrogateescape") as conf:
+            for line in conf:
+                stripped_line = line.rstrip("\r\n")
+                # A line which follows a line ending in a backslash is part of the same
+                # value, even if it happens to begin with '['
+                if (
+                    not continued_line
+                    and stripped_line.startswith("[")
+                    and stripped_line.rstrip().endswith("]")
+                ):
+                    stanza_name = stripped_line.strip()[1:-1]
+                    current_stanza = stanza_hashes.setdefault(
+                        stanza_name, hashlib.sha256()
+                    )
+                elif current_stanza is not None:
+                    current_stanza.update(
+                        stripped_line.encode("utf-8", errors="surrogateescape") + b"\n"
+                    )
+                continued_line = stripped_line.endswith("\\")
+
+        return {name: sha.hexdigest() for name, sha in stanza_hashes.items()}
+
+    @staticmethod
+    def getInputHashes(
+        config: build, director_output_dto: DirectorOutputDto
+    ) -> dict[str, str]:
+        """Compute a SHA256 for every YML and lookup file that content was built from.
+
+        :param config: the build configuration
+        :type config: build
+        :param director_output_dto: all of the content that was built
+        :type director_output_dto: DirectorOutputDto
+        :returns: mapping of the path of each input, relative to the repo, to its SHA256
+        :rtype: dict[str, str]
+        """
+        input_paths: set[pathlib.Path] = set()
+        for content_list in [
+            director_output_dto.detections,
+            director_output_dto.stories,
+            director_output_dto.baselines,
+            director_output_dto.investigations,
+            director_output_dto.playbooks,
+            director_output_dto.macros,
+            director_output_dto.lookups,
+            director_output_dto.deployments,
+            director_output_dto.dashboards,
+            director_output_dto.data_sources,
+        ]:
+            for content in content_list:
+                if content.file_path is not None:
+                    input_paths.add(content.file_path)
+                if isinstance(content, FileBackedLookup) and not isinstance(
+                    content, RuntimeCSV
+                ):
+                    input_paths.add(content.filename)
+
+        app_template_path = config.getAppTemplatePath()
+        if app_template_path.is_dir():
+            input_paths.update(p for p in app_template_path.glob("**/*") if p.is_file())
+
+        return {
+            ManifestWriter.relativePath(path, config.path): Utils.get_file_sha256(path)
+            for path in sorted(input_paths)
+        }
+
+    @staticmethod
+    def relativePath(path: pathlib.Path, root: pathlib.Path) -> str:
+        try:
+            return path.absolute().relative_to(root.absolute()).as_posix()
+        except ValueError:
+            # The file is outside of the root, so record its full path
+            return path.absolute().as_posix()
+
+    @staticmethod
+    def buildManifest(
+        config: build, director_output_dto: DirectorOutputDto
+    ) -> dict[str, Any]:
+        """Construct the manifest for the app that was just built.
+
+        :param config: the build configuration
+        :type config: build
+        :param director_output_dto: all of the content that was built
+        :type director_output_dto: DirectorOutputDto
+        :returns: the manifest
+        :rtype: dict[str, Any]
+        """
+        package_directory = config.getPackageDirectoryPath()
+        files: dict[str, str] = {}
+        stanzas: dict[str, dict[str, str]] = {}
+        for file_path in sorted(
+            p for p in package_directory.glob("**/*") if p.is_file()
+        ):
+            relative_path = file_path.relative_to(package_directory).as_posix()
+            files[relative_path] = Utils.get_file_sha256(file_path)
+            if file_path.suffix == ".conf":
+                stanzas[relative_path] = ManifestWriter.getConfStanzaHashes(file_path)
+
+        packages: dict[str, str] = {}
+        for package_path in [
+            config.getPackageFilePath(include_version=True),
+            config.getPackageFilePath(include_version=False),
+        ]:
+            if package_path.is_file():
+                packages[package_path.name] = Utils.get_file_sha256(package_path)
+
+        return {
+            "manifest_version": BUILD_MANIFEST_VERSION,
+            "generated_at": datetime.datetime.now(datetime.UTC)
+            .replace(microsecond=0, tzinfo=None)
+            .isoformat(),
+            "app": {
+                "appid": config.app.appid,
+                "version": config.app.version,
+                "build": config.app.build,
+            },
+            "packages": packages,
+            "files": files,
+            "stanzas": stanzas,
+            "inputs": ManifestWriter.getInputHashes(config, director_output_dto),
+        }
+
+    @staticmethod
+    def writeManifest(manifest_path: pathlib.Path, manifest: dict[str, Any]) -> None:
+        try:
+            with open(manifest_path, "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        except Exception as e:
+            raise Exception(f"Error writing build manifest to '{manifest_path}': {e!s}")
+
+    @staticmethod
+    def loadManifest(manifest_path: pathlib.Path) -> dict[str, Any]:
+        try:
+            with open(manifest_path, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+        except Exception as e:
+            raise Exception(
+                f"Error reading build manifest from '{manifest_path}': {e!s}"
+            )
+        if manifest.get("manifest_version") != BUILD_MANIFEST_VERSION:
+            raise Exception(
+                f"Build manifest '{manifest_path}' has manifest_version "
+                f"[{manifest.get('manifest_version')}], but only version "
+                f"[{BUILD_MANIFEST_VERSION}] is supported. Please rebuild it."
+            )
+        return manifest
+
+    @staticmethod
+    def diffHashes(old: dict[str, str], new: dict[str, str]) -> dict[str, list[str]]:
+        return {
+            "added": sorted(new.keys() - old.keys()),
+            "removed": sorted(old.keys() - new.keys()),
+            "changed": sorted(k for k in new.keys() & old.keys() if old[k] != new[k]),
+        }
+
+    @staticmethod
+    def diffManifests(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+        """Compare two manifests. Conf files are compared stanza by stanza, rather than as
+        whole files, since every conf file contains the time it was built and would
+        otherwise always appear to have changed.
+
+        :param old: the manifest to compare against
+        :type old: dict[str, Any]
+        :param new: the manifest of the current build
+        :type new: dict[str, Any]
+        :returns: the added, removed, and changed files, stanzas, and inputs
+        :rtype: dict[str, Any]
+        """
+
+        def without_conf_files(files: dict[str, str]) -> dict[str, str]:
+            return {k: v for k, v in files.items() if not k.endswith(".conf")}
+
+        stanza_diffs: dict[str, dict[str, list[str]]] = {}
+        for conf_path in sorted(old["stanzas"].keys() | new["stanzas"].keys()):
+            stanza_diff = ManifestWriter.diffHashes(
+                old["stanzas"].get(conf_path, {}), new["stanzas"].get(conf_path, {})
+            )
+            if any(len(names) > 0 for names in stanza_diff.values()):
+                stanza_diffs[conf_path] = stanza_diff
+
+        return {
+            "files": ManifestWriter.diffHashes(
+                without_conf_files(old["files"]), without_conf_files(new["files"])
+            ),
+            "stanzas": stanza_diffs,
+            "inputs": ManifestWriter.diffHashes(old["inputs"], new["inputs"]),
+        }
+
+    @staticmethod
+    def printManifestDiff(diff: dict[str, Any], diff_against: pathlib.Path) -> None:
+        print(f"Changes relative to build manifest '{diff_against}':")
+        changes_found = False
+        for conf_path, stanza_diff in diff["stanzas"].items():
+            for change_type in ["added", "removed", "changed"]:
+                for stanza_name in stanza_diff[change_type]:
+                    changes_found = True
+                    print(f"  [{change_type.upper()}] {conf_path}: [{stanza_name}]")
+        for change_type in ["added", "removed", "changed"]:
+            for file_path in diff["files"][change_type]:
+                changes_found = True
+                print(f"  [{change_type.upper()}] {file_path}")
+        if not changes_found:
+            print("  No stanzas or files changed")